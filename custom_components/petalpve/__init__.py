@@ -1,13 +1,43 @@
 """The PetalPVE integration."""
 from __future__ import annotations
 
+import asyncio
+from datetime import timedelta
+import time
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME, CONF_VERIFY_SSL, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
 
 from .api import ProxmoxClient
-from .const import CONF_REALM, DOMAIN, LOGGER
+from .const import (
+    CONF_API_BURST,
+    CONF_API_RATE,
+    CONF_ENTITY_PROFILE,
+    CONF_REALM,
+    CONF_RECORD_TRAFFIC,
+    CONF_REPLAY_FILE,
+    CONF_REPLAY_REALTIME,
+    DATA_SETUP_LOCK,
+    DEFAULT_API_BURST,
+    DEFAULT_API_RATE,
+    DEFAULT_ENTITY_PROFILE,
+    DEFAULT_RECORD_TRAFFIC,
+    DOMAIN,
+    LOGGER,
+    NODE_DETAIL_TICK,
+    PROFILE_GUEST_ENTITIES,
+    STORAGE_SENSOR_KEYS,
+    STORAGE_VERSION,
+)
 from .coordinator import ProxmoxCoordinator
+from .recording import TrafficRecorder
+from .replay import ReplayClient
+from .services import async_setup_services, async_unload_services
 
 PLATFORMS: list[Platform] = [
     Platform.BINARY_SENSOR,
@@ -21,33 +51,212 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     hass.data.setdefault(DOMAIN, {})
 
-    client = ProxmoxClient(
-        hass,
-        entry.data[CONF_HOST],
-        entry.data[CONF_USERNAME],
-        entry.data[CONF_PASSWORD],
-        entry.data[CONF_PORT],
-        entry.data.get(CONF_REALM, "pam"),
-        entry.data.get(CONF_VERIFY_SSL, True),
-    )
+    recorder = None
+    if entry.options.get(CONF_RECORD_TRAFFIC, DEFAULT_RECORD_TRAFFIC):
+        path = hass.config.path(f"{DOMAIN}_{entry.entry_id}_{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+        recorder = await hass.async_add_executor_job(TrafficRecorder, path)
+        LOGGER.warning("Recording Proxmox VE API traffic to %s", path)
+
+    limits = {
+        "api_rate": entry.options.get(CONF_API_RATE, DEFAULT_API_RATE),
+        "api_burst": entry.options.get(CONF_API_BURST, DEFAULT_API_BURST),
+    }
+    if CONF_REPLAY_FILE in entry.data:
+        # Profiling against a capture, see replay.py
+        client = ReplayClient(
+            hass, entry.data[CONF_REPLAY_FILE], entry.data.get(CONF_REPLAY_REALTIME, True),
+            recorder=recorder, **limits,
+        )
+    else:
+        client = ProxmoxClient(
+            hass,
+            entry.data[CONF_HOST],
+            entry.data[CONF_USERNAME],
+            entry.data[CONF_PASSWORD],
+            entry.data[CONF_PORT],
+            entry.data.get(CONF_REALM, "pam"),
+            entry.data.get(CONF_VERIFY_SSL, True),
+            recorder=recorder,
+            **limits,
+        )
     
-    # Verify connection again (optional, but good practice if startup is delayed)
-    if not await hass.async_add_executor_job(client.connect):
-        LOGGER.error("Could not connect to Proxmox VE at startup")
-        return False
+    coordinator = ProxmoxCoordinator(hass, client, entry)
+
+    # Entries are set up concurrently; identifying the cluster and claiming it
+    # happen under one lock so two entries for a new cluster cannot both poll it
+    async with hass.data.setdefault(DATA_SETUP_LOCK, asyncio.Lock()):
+        has_snapshot = await coordinator.async_load_snapshot()
+
+        connected = None
+        if coordinator.cluster_id is None:
+            connected = await _async_connect(client)
+            if connected:
+                try:
+                    coordinator.cluster_id = await client.async_call(client.get_cluster_id)
+                except TimeoutError:
+                    pass
 
-    coordinator = ProxmoxCoordinator(hass, client)
-    await coordinator.async_config_entry_first_refresh()
+        if (leader := _async_find_leader(hass, coordinator.cluster_id)) is not None:
+            # Another entry already polls this cluster, share its client and poll loop
+            LOGGER.debug("Sharing the Proxmox VE poll loop of %s", leader.entry.title)
+            coordinator.async_follow(leader)
+        hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    hass.data[DOMAIN][entry.entry_id] = coordinator
+    if leader is not None:
+        await leader.ready.wait()
+        if hass.data[DOMAIN].get(leader.entry.entry_id) is not leader:
+            # The leader failed to set up, retry and lead or follow another entry
+            coordinator.async_unfollow()
+            hass.data[DOMAIN].pop(entry.entry_id)
+            raise ConfigEntryNotReady(f"Proxmox VE entry {leader.entry.title} is not ready")
+        # Pick up guests the leader excluded so far but this entry does not
+        await leader.async_refresh()
+    elif has_snapshot:
+        coordinator.ready.set()
+        # Create entities from the last known snapshot straight away and let the
+        # live refresh (which also connects) replace it in the background
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_initial_refresh"
+        )
+    else:
+        try:
+            # Verify connection again (optional, but good practice if startup is delayed)
+            if connected is None:
+                connected = await _async_connect(client)
+            if not connected:
+                LOGGER.error("Could not connect to Proxmox VE at startup")
+                client.shutdown()
+                return False
+
+            try:
+                await coordinator.async_config_entry_first_refresh()
+            except Exception:
+                client.shutdown()
+                raise
+        finally:
+            if not coordinator.last_update_success or not connected:
+                hass.data[DOMAIN].pop(entry.entry_id)
+            # Entries waiting to follow this one go on either way
+            coordinator.ready.set()
+
+    _async_migrate_cluster_ids(hass, entry, coordinator)
+    _async_remove_profile_entities(hass, entry)
+    async_setup_services(hass)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    if coordinator.leader is None:
+        # Slow-changing node details are collected on their own schedule, off the refresh path
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass, coordinator.async_collect_node_details, timedelta(seconds=NODE_DETAIL_TICK)
+            )
+        )
+
     return True
 
+async def _async_connect(client: ProxmoxClient) -> bool:
+    """Connect the client, treating a timeout as a failure."""
+    try:
+        return await client.async_call(client.connect)
+    except TimeoutError:
+        return False
+
+@callback
+def _async_find_leader(hass: HomeAssistant, cluster_id: str | None) -> ProxmoxCoordinator | None:
+    """Return the coordinator already polling the given cluster, if any."""
+    if cluster_id is None:
+        return None
+    for coordinator in hass.data[DOMAIN].values():
+        if coordinator.leader is None and coordinator.cluster_id == cluster_id:
+            return coordinator
+    return None
+
+@callback
+def _async_migrate_cluster_ids(hass: HomeAssistant, entry: ConfigEntry, coordinator: ProxmoxCoordinator) -> None:
+    """Move cluster-level devices and entities off IDs every cluster used to share.
+
+    Also removes the per-node devices and entities shared storage had before
+    it became one cluster-level device.
+    """
+    scope = coordinator.cluster_scope
+    shared = {store["storage"] for store in coordinator.data["storage"].values() if store.get("shared")}
+    # Old storage unique ID -> new one; per-node ones map to None and are removed.
+    # Matched exactly, local storage names can start with a shared storage's name.
+    unique_ids: dict[str, str | None] = {}
+    # Old device identifier -> new one, or None
+    device_ids: dict[str, str | None] = {"cluster": scope}
+    for storage in shared:
+        device_ids[f"cluster_{storage}"] = f"{scope}_{storage}"
+        for key in STORAGE_SENSOR_KEYS:
+            unique_ids[f"proxmox_storage_cluster_{storage}_{key}"] = f"proxmox_storage_{scope}_{storage}_{key}"
+        for node in coordinator.data["nodes"]:
+            device_ids[f"{node}_{storage}"] = None
+            for key in STORAGE_SENSOR_KEYS:
+                unique_ids[f"proxmox_storage_{node}_{storage}_{key}"] = None
+
+    registry = er.async_get(hass)
+    for entity_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        if entity_entry.unique_id.startswith("proxmox_cluster_cluster_"):
+            new = f"proxmox_cluster_{scope}_" + entity_entry.unique_id.removeprefix("proxmox_cluster_cluster_")
+        elif entity_entry.unique_id in unique_ids:
+            new = unique_ids[entity_entry.unique_id]
+        else:
+            continue
+        if new is None:
+            registry.async_remove(entity_entry.entity_id)
+            continue
+        try:
+            registry.async_update_entity(entity_entry.entity_id, new_unique_id=new)
+        except ValueError:
+            # Another entry for the same cluster already migrated it
+            registry.async_remove(entity_entry.entity_id)
+
+    devices = dr.async_get(hass)
+    for old, new in device_ids.items():
+        device = devices.async_get_device(identifiers={(DOMAIN, old)})
+        if device is None or entry.entry_id not in device.config_entries:
+            continue
+        if new is not None and devices.async_get_device(identifiers={(DOMAIN, new)}) is None:
+            devices.async_update_device(device.id, new_identifiers={(DOMAIN, new)})
+        else:
+            # The device goes away once no entry uses it
+            devices.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+
+@callback
+def _async_remove_profile_entities(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove guest entities left over from a larger entity profile."""
+    guest_keys = PROFILE_GUEST_ENTITIES[entry.options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE)]
+    registry = er.async_get(hass)
+    for entity_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        # Unique IDs are proxmox_{resource_type}_{resource_id}_{key}
+        parts = entity_entry.unique_id.split("_", 3)
+        if len(parts) == 4 and parts[1] in ("qemu", "lxc") and parts[3] not in guest_keys:
+            registry.async_remove(entity_entry.entity_id)
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator: ProxmoxCoordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        if coordinator.leader is not None:
+            # The client belongs to the leader
+            coordinator.async_unfollow()
+        else:
+            # Followers reload to connect on their own, or to follow one another
+            for follower in list(coordinator.followers):
+                follower.async_unfollow()
+                hass.config_entries.async_schedule_reload(follower.entry.entry_id)
+            coordinator.client.shutdown()
+        async_unload_services(hass)
 
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted snapshot and backup index when the entry is deleted."""
+    for key in ("snapshot", "backups"):
+        await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.{key}").async_remove()
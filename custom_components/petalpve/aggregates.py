@@ -0,0 +1,101 @@
+"""Cluster-wide aggregates and top-N rankings for Proxmox VE."""
+from __future__ import annotations
+
+import heapq
+import time
+from typing import Any
+
+from .const import AGGREGATE_TOP_N
+
+
+class ClusterAggregator:
+    """Compute cluster totals, per-node allocation and top-N guests in one pass.
+
+    Guest I/O is reported as cumulative counters, so the previous counters
+    are kept per guest to turn them into rates.
+    """
+
+    def __init__(self, top_n: int = AGGREGATE_TOP_N) -> None:
+        """Initialize."""
+        self._top_n = top_n
+        # (vm_type, vm_id) -> (monotonic time, disk bytes, net bytes)
+        self._io_counters: dict[tuple[str, int], tuple[float, int, int]] = {}
+
+    def update(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Return the aggregates for data, annotating node dicts with allocation."""
+        now = time.monotonic()
+        nodes = data["nodes"]
+        allocated_mem = dict.fromkeys(nodes, 0)
+        allocated_cpus = dict.fromkeys(nodes, 0)
+        guests_total = 0
+        guests_running = 0
+        ranked: list[dict[str, Any]] = []
+        io_counters: dict[tuple[str, int], tuple[float, int, int]] = {}
+
+        for vm_type, key in (("qemu", "vms"), ("lxc", "lxcs")):
+            for vm_id, guest in data[key].items():
+                guests_total += 1
+                if guest.get("status") != "running":
+                    continue
+                guests_running += 1
+                node = guest.get("node")
+                if node in allocated_mem:
+                    allocated_mem[node] += guest.get("maxmem", 0)
+                    allocated_cpus[node] += guest.get("cpus", 0)
+                if "stale_since" in guest:
+                    continue
+
+                disk = guest.get("diskread", 0) + guest.get("diskwrite", 0)
+                net = guest.get("netin", 0) + guest.get("netout", 0)
+                io_counters[(vm_type, vm_id)] = (now, disk, net)
+                io_rate = None
+                previous = self._io_counters.get((vm_type, vm_id))
+                if previous and now > previous[0] and disk >= previous[1] and net >= previous[2]:
+                    io_rate = (disk - previous[1] + net - previous[2]) / (now - previous[0])
+
+                ranked.append({
+                    "vmid": vm_id,
+                    "type": vm_type,
+                    "name": guest.get("name", str(vm_id)),
+                    "node": node,
+                    "cpu": round(guest.get("cpu", 0) * 100, 2),
+                    "memory": round(guest.get("mem", 0) / 1073741824, 2),
+                    "io": round(io_rate) if io_rate is not None else None,
+                })
+
+        self._io_counters = io_counters
+
+        node_mem = node_maxmem = 0
+        node_cpu = node_maxcpu = 0.0
+        for node_name, node in nodes.items():
+            maxmem = node.get("maxmem", 0)
+            node["allocated_mem"] = allocated_mem[node_name]
+            node["allocated_cpus"] = allocated_cpus[node_name]
+            node["mem_overcommit"] = round(allocated_mem[node_name] / maxmem, 2) if maxmem else None
+            if node.get("status") == "online":
+                node_mem += node.get("mem", 0)
+                node_maxmem += maxmem
+                node_cpu += node.get("cpu", 0) * node.get("maxcpu", 0)
+                node_maxcpu += node.get("maxcpu", 0)
+
+        committed = sum(allocated_mem.values())
+        return {
+            "nodes_online": sum(1 for node in nodes.values() if node.get("status") == "online"),
+            "guests_total": guests_total,
+            "guests_running": guests_running,
+            "cpu": node_cpu / node_maxcpu if node_maxcpu else 0,
+            "mem": node_mem,
+            "maxmem": node_maxmem,
+            "committed_mem": committed,
+            "mem_overcommit": round(committed / node_maxmem, 2) if node_maxmem else None,
+            "top_cpu": self._top(ranked, "cpu"),
+            "top_memory": self._top(ranked, "memory"),
+            "top_io": self._top([guest for guest in ranked if guest["io"] is not None], "io"),
+        }
+
+    def _top(self, ranked: list[dict[str, Any]], metric: str) -> list[dict[str, Any]]:
+        """Return the top-N guests by metric."""
+        return [
+            {"vmid": guest["vmid"], "type": guest["type"], "name": guest["name"], "node": guest["node"], metric: guest[metric]}
+            for guest in heapq.nlargest(self._top_n, ranked, key=lambda guest: guest[metric])
+        ]
@@ -0,0 +1,119 @@
+"""Streaming anomaly detection on guest metrics with EWMA baselines."""
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from .const import (
+    ANOMALY_EWMA_ALPHA,
+    ANOMALY_MIN_STDDEV,
+    ANOMALY_WARMUP_SAMPLES,
+    ANOMALY_Z_THRESHOLD,
+)
+
+# metric -> value function, both in percent so the stddev floor means the same thing
+ANOMALY_METRICS = {
+    "cpu": lambda x: x.get("cpu", 0) * 100,
+    "memory": lambda x: x.get("mem", 0) / x["maxmem"] * 100 if x.get("maxmem") else 0,
+}
+
+
+class EwmaBaseline:
+    """Exponentially weighted mean and variance of one metric, updated in O(1)."""
+
+    __slots__ = ("mean", "var", "count")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def update(self, value: float, alpha: float) -> float | None:
+        """Add a sample and return its z-score against the prior baseline.
+
+        Returns None while the baseline is still warming up.
+        """
+        z_score = None
+        if self.count >= ANOMALY_WARMUP_SAMPLES:
+            stddev = max(math.sqrt(self.var), ANOMALY_MIN_STDDEV)
+            z_score = (value - self.mean) / stddev
+
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.var = (1 - alpha) * (self.var + diff * increment)
+        self.count += 1
+        return z_score
+
+
+class AnomalyDetector:
+    """Track a baseline per guest and metric and report z-score excursions.
+
+    State is three floats per guest and metric, and baselines for guests
+    that leave the store are dropped, so memory does not grow over time.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANOMALY_Z_THRESHOLD,
+        alpha: float = ANOMALY_EWMA_ALPHA,
+    ) -> None:
+        """Initialize."""
+        self._threshold = threshold
+        self._alpha = alpha
+        self._baselines: dict[tuple[str, int, str], EwmaBaseline] = {}
+        # (vm_type, vm_id, metric) -> anomaly details for currently anomalous guests
+        self.active: dict[tuple[str, int, str], dict[str, Any]] = {}
+
+    def update(self, data: dict[str, Any]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """Feed one refresh. Returns (started, ended) anomalies."""
+        started: list[dict[str, Any]] = []
+        ended: list[dict[str, Any]] = []
+        present: set[tuple[str, int]] = set()
+
+        for vm_type, key in (("qemu", "vms"), ("lxc", "lxcs")):
+            for vm_id, guest in data[key].items():
+                present.add((vm_type, vm_id))
+                # Stopped guests and carried-over data are not new samples,
+                # and whatever was anomalous about them is over
+                if guest.get("status") != "running" or "stale_since" in guest:
+                    for metric in ANOMALY_METRICS:
+                        if (vm_type, vm_id, metric) in self.active:
+                            ended.append(self.active.pop((vm_type, vm_id, metric)))
+                    continue
+                for metric, value_fn in ANOMALY_METRICS.items():
+                    index = (vm_type, vm_id, metric)
+                    baseline = self._baselines.get(index)
+                    if baseline is None:
+                        baseline = self._baselines[index] = EwmaBaseline()
+                    mean = baseline.mean
+                    value = value_fn(guest)
+                    z_score = baseline.update(value, self._alpha)
+
+                    if z_score is not None and abs(z_score) >= self._threshold:
+                        details = {
+                            "vmid": vm_id,
+                            "type": vm_type,
+                            "name": guest.get("name", str(vm_id)),
+                            "node": guest.get("node"),
+                            "metric": metric,
+                            "value": round(value, 2),
+                            "baseline": round(mean, 2),
+                            "z_score": round(z_score, 2),
+                        }
+                        if index not in self.active:
+                            started.append(details)
+                        self.active[index] = details
+                    elif index in self.active and z_score is not None:
+                        ended.append(self.active.pop(index))
+
+        for index in [index for index in self._baselines if index[:2] not in present]:
+            self._baselines.pop(index)
+            if index in self.active:
+                ended.append(self.active.pop(index))
+
+        return started, ended
@@ -1,15 +1,42 @@
 """API Client for Proxmox VE."""
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import copy
+from fnmatch import fnmatchcase
+from functools import partial
 import logging
-from typing import Any
+import threading
+import time
+from typing import Any, Callable, TypeVar
 
 from proxmoxer import ProxmoxAPI
 from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout, SSLError
 
 from homeassistant.core import HomeAssistant
 
-from .const import LOGGER
+from .const import (
+    API_ACTION_WORKERS,
+    API_CACHE_TTLS,
+    API_CALL_TIMEOUT,
+    API_MAX_WORKERS,
+    API_PRIORITY_RESERVE,
+    TASK_POLL_INTERVAL,
+    DEFAULT_API_BURST,
+    DEFAULT_API_RATE,
+    LOGGER,
+)
+from .ratelimit import TokenBucket
+from .recording import TrafficRecorder
+
+_T = TypeVar("_T")
+
+
+def _guest_path(node: str, vm_id: int, vm_type: str) -> str:
+    """Return the API path of a guest."""
+    return f"nodes/{node}/{'lxc' if vm_type == 'lxc' else 'qemu'}/{vm_id}"
+
 
 class ProxmoxClient:
     """Proxmox API Client wrapper."""
@@ -23,6 +50,10 @@ class ProxmoxClient:
         port: int,
         realm: str,
         verify_ssl: bool,
+        cache_ttls: dict[str, float] | None = None,
+        api_rate: float = DEFAULT_API_RATE,
+        api_burst: int = DEFAULT_API_BURST,
+        recorder: TrafficRecorder | None = None,
     ) -> None:
         """Initialize the Proxmox Client."""
         self._hass = hass
@@ -34,20 +65,212 @@ class ProxmoxClient:
         self._realm = realm
         self._verify_ssl = verify_ssl
         self._proxmox: ProxmoxAPI | None = None
+        # Blocking calls run in our own bounded pool so a hung pveproxy
+        # cannot tie up Home Assistant's shared executor
+        self._executor = ThreadPoolExecutor(
+            max_workers=API_MAX_WORKERS, thread_name_prefix="petalpve"
+        )
+        # Polling threads can all be waiting on the rate limiter, so user
+        # actions get threads of their own and only compete for tokens
+        self._action_executor = ThreadPoolExecutor(
+            max_workers=API_ACTION_WORKERS, thread_name_prefix="petalpve_action"
+        )
+        # Read-through response cache: path pattern -> TTL in seconds
+        self._cache_ttls = API_CACHE_TTLS if cache_ttls is None else cache_ttls
+        self._cache: dict[tuple, tuple[float, Any]] = {}
+        # Key -> [future, number of callers waiting on it]
+        self._inflight: dict[tuple, list] = {}
+        self._cache_lock = threading.Lock()
+        # Responses for guests and paths that are never read again expire unseen
+        self._sweep_interval = max(self._cache_ttls.values(), default=0)
+        self._next_sweep = 0.0
+        # Bumped on every mutation so a GET that raced it is not cached
+        self._cache_epoch = 0
+        # One request budget for every caller; mutations are user actions and take priority
+        self.rate_limiter = TokenBucket(api_rate, api_burst, API_PRIORITY_RESERVE)
+        # Captures every request that reaches the network, for offline profiling
+        self.recorder = recorder
+        # Marks action threads, whose reads take priority tokens too
+        self._local = threading.local()
+
+    async def async_call(
+        self,
+        method: Callable[..., _T],
+        *args: Any,
+        timeout: float = API_CALL_TIMEOUT,
+        priority: bool = False,
+        **kwargs: Any,
+    ) -> _T:
+        """Run a blocking client method in the PetalPVE pool with a deadline.
+
+        Priority calls are user actions; they run in their own pool so a
+        polling backlog cannot delay them. Raises TimeoutError if the call
+        does not finish in time.
+        """
+        loop = asyncio.get_running_loop()
+        call = partial(method, *args, **kwargs)
+        if priority:
+            call = partial(self._run_priority, call)
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._action_executor if priority else self._executor, call),
+            timeout,
+        )
+
+    def _run_priority(self, call: Callable[[], _T]) -> _T:
+        """Run a call in an action thread with priority access to the request budget."""
+        self._local.priority = True
+        try:
+            return call()
+        finally:
+            self._local.priority = False
+
+    async def async_wait_task(self, node: str, upid: str, timeout: float) -> str | None:
+        """Poll a task until it stops. Returns None on success, else the error."""
+        give_up = time.monotonic() + timeout
+        while time.monotonic() < give_up:
+            await asyncio.sleep(TASK_POLL_INTERVAL)
+            try:
+                status = await self.async_call(self.get_task_status, node, upid)
+            except TimeoutError:
+                continue
+            if status and status.get("status") == "stopped":
+                exit_status = status.get("exitstatus")
+                return None if exit_status == "OK" else exit_status or "unknown error"
+        return "timed out waiting for the task"
+
+    def shutdown(self) -> None:
+        """Stop the worker pool without waiting for hung calls."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._action_executor.shutdown(wait=False, cancel_futures=True)
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _cache_ttl(self, path: str) -> float:
+        """Return the cache TTL for a path, 0 if it is not cached."""
+        for pattern, ttl in self._cache_ttls.items():
+            if fnmatchcase(path, pattern):
+                return ttl
+        return 0
+
+    def _send(self, proxmox: Any, method: str, path: str, params: dict[str, Any]) -> Any:
+        """Send one request, recording it if a capture is running."""
+        if self.recorder is None:
+            return getattr(proxmox(path), method)(**params)
+        started = time.monotonic()
+        try:
+            result = getattr(proxmox(path), method)(**params)
+        except Exception as err:
+            self.recorder.record(method, path, params, started, error=err)
+            raise
+        self.recorder.record(method, path, params, started, result=result)
+        return result
+
+    def _get(self, path: str, **params: Any) -> Any:
+        """GET a resource through the response cache.
+
+        Concurrent identical GETs share one in-flight request, and responses
+        are kept for the TTL configured for the path. The coordinator
+        annotates the returned dicts, so a response that is cached or shared
+        with waiting callers is copied for each of them; one that is neither
+        is returned as is.
+        """
+        key = (path, tuple(sorted(params.items())))
+        with self._cache_lock:
+            now = time.monotonic()
+            cached = self._cache.get(key)
+            if cached is not None:
+                if cached[0] > now:
+                    return copy.deepcopy(cached[1])
+                del self._cache[key]
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = self._inflight[key] = [Future(), 0]
+                epoch = self._cache_epoch
+            else:
+                # Counted so the owner knows its response is shared
+                inflight[1] += 1
+        future = inflight[0]
+
+        if not owner:
+            return copy.deepcopy(future.result())
+
+        try:
+            self.rate_limiter.acquire(
+                priority=getattr(self._local, "priority", False), timeout=API_CALL_TIMEOUT
+            )
+            result = self._send(self._proxmox, "get", path, params)
+        except Exception as err:
+            with self._cache_lock:
+                self._inflight.pop(key, None)
+            future.set_exception(err)
+            raise
+
+        with self._cache_lock:
+            self._inflight.pop(key, None)
+            ttl = self._cache_ttl(path)
+            cache = bool(ttl) and epoch == self._cache_epoch
+            if cache:
+                now = time.monotonic()
+                self._cache[key] = (now + ttl, result)
+                if now >= self._next_sweep:
+                    self._evict_expired(now)
+        future.set_result(result)
+        return copy.deepcopy(result) if cache or inflight[1] else result
+
+    def _evict_expired(self, now: float) -> None:
+        """Drop expired responses, which are otherwise only dropped when read again. Lock held."""
+        for key in [key for key, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[key]
+        self._next_sweep = now + self._sweep_interval
+
+    def _post(self, path: str, invalidate: tuple[str, ...] = (), **data: Any) -> Any:
+        """POST to a resource and drop cached entries under the invalidated paths."""
+        self.rate_limiter.acquire(priority=True, timeout=API_CALL_TIMEOUT)
+        try:
+            return self._send(self._proxmox, "post", path, data)
+        finally:
+            self.invalidate(*invalidate)
+
+    def _delete(self, path: str, invalidate: tuple[str, ...] = (), **params: Any) -> Any:
+        """DELETE a resource and drop cached entries under the invalidated paths."""
+        self.rate_limiter.acquire(priority=True, timeout=API_CALL_TIMEOUT)
+        try:
+            return self._send(self._proxmox, "delete", path, params)
+        finally:
+            self.invalidate(*invalidate)
+
+    def invalidate(self, *prefixes: str) -> None:
+        """Drop cached responses whose path starts with any of the prefixes."""
+        with self._cache_lock:
+            self._cache_epoch += 1
+            for key in [key for key in self._cache if key[0].startswith(prefixes)]:
+                self._cache.pop(key)
+
+    @property
+    def connected(self) -> bool:
+        """Return True once a connection has been established."""
+        return self._proxmox is not None
+
+    def _create_api(self) -> Any:
+        """Return the proxmoxer API object, which logs in."""
+        return ProxmoxAPI(
+            self._host,
+            user=f"{self._user}@{self._realm}",
+            password=self._password,
+            port=self._port,
+            verify_ssl=self._verify_ssl,
+            timeout=API_CALL_TIMEOUT,
+        )
 
     def connect(self) -> bool:
         """Connect to the Proxmox API."""
         try:
-            self._proxmox = ProxmoxAPI(
-                self._host,
-                user=f"{self._user}@{self._realm}",
-                password=self._password,
-                port=self._port,
-                verify_ssl=self._verify_ssl,
-            )
+            proxmox = self._create_api()
             # Test connection
-            version = self._proxmox.version.get()
+            version = self._send(proxmox, "get", "version", {})
             LOGGER.debug("Connected to Proxmox VE: %s", version)
+            self._proxmox = proxmox
             return True
         except (RequestsConnectionError, ConnectTimeout, SSLError) as err:
             LOGGER.error("Failed to connect to Proxmox VE: %s", err)
@@ -61,7 +284,7 @@ class ProxmoxClient:
         if not self._proxmox:
             return None
         try:
-            return self._proxmox.version.get()
+            return self._get("version")
         except Exception as err:
             LOGGER.error("Failed to get version: %s", err)
             return None
@@ -71,14 +294,14 @@ class ProxmoxClient:
         if not self._proxmox:
             return []
         try:
-            return self._proxmox.nodes.get()
+            return self._get("nodes")
         except Exception as err:
             # Check for 401 Unauthorized (Ticket Expired)
             if "401" in str(err) or "Unauthorized" in str(err):
                 LOGGER.warning("Auth token expired, reconnecting...")
                 if self.connect():
                     try:
-                         return self._proxmox.nodes.get()
+                         return self._get("nodes")
                     except Exception as retry_err:
                         LOGGER.error("Failed to get nodes after reconnect: %s", retry_err)
                 else:
@@ -92,73 +315,249 @@ class ProxmoxClient:
         if not self._proxmox:
             return None
         try:
-            status = self._proxmox.nodes(node).status.get()
+            status = self._get(f"nodes/{node}/status")
             return status
         except Exception as err:
             LOGGER.error("Failed to get node status for %s: %s", node, err)
             return None
 
-    def get_vms(self, node: str) -> list[dict[str, Any]]:
-        """Get list of QEMU VMs on a node."""
+    def get_vms(self, node: str) -> list[dict[str, Any]] | None:
+        """Get list of QEMU VMs on a node. Returns None if the node could not be queried."""
         if not self._proxmox:
-            return []
+            return None
         try:
-            return self._proxmox.nodes(node).qemu.get()
+            return self._get(f"nodes/{node}/qemu")
         except Exception as err:
             # Check for 401 Unauthorized (Ticket Expired)
             if "401" in str(err) or "Unauthorized" in str(err):
                 LOGGER.warning("Auth token expired, reconnecting...")
                 if self.connect():
                     try:
-                         return self._proxmox.nodes(node).qemu.get()
+                         return self._get(f"nodes/{node}/qemu")
                     except Exception as retry_err:
                         LOGGER.error("Failed to get VMs after reconnect: %s", retry_err)
                 else:
                     LOGGER.error("Reconnection failed.")
             
             LOGGER.error("Failed to get VMs for node %s: %s", node, err)
-            return []
+            return None
 
-    def get_lxcs(self, node: str) -> list[dict[str, Any]]:
-        """Get list of LXC containers on a node."""
+    def get_lxcs(self, node: str) -> list[dict[str, Any]] | None:
+        """Get list of LXC containers on a node. Returns None if the node could not be queried."""
         if not self._proxmox:
-            return []
+            return None
         try:
-            return self._proxmox.nodes(node).lxc.get()
+            return self._get(f"nodes/{node}/lxc")
         except Exception as err:
              # Check for 401 Unauthorized (Ticket Expired)
             if "401" in str(err) or "Unauthorized" in str(err):
                 LOGGER.warning("Auth token expired, reconnecting...")
                 if self.connect():
                     try:
-                         return self._proxmox.nodes(node).lxc.get()
+                         return self._get(f"nodes/{node}/lxc")
                     except Exception as retry_err:
                         LOGGER.error("Failed to get LXCs after reconnect: %s", retry_err)
                 else:
                     LOGGER.error("Reconnection failed.")
             
             LOGGER.error("Failed to get LXCs for node %s: %s", node, err)
-            return []
+            return None
     
-    def get_storage(self, node: str) -> list[dict[str, Any]]:
-        """Get list of storage on a node."""
+    def get_storage(self, node: str) -> list[dict[str, Any]] | None:
+        """Get list of storage on a node. Returns None if the node could not be queried."""
         if not self._proxmox:
-            return []
+            return None
         try:
-            return self._proxmox.nodes(node).storage.get()
+            return self._get(f"nodes/{node}/storage")
         except Exception as err:
             LOGGER.error("Failed to get storage for node %s: %s", node, err)
-            return []
+            return None
             
+    def get_storage_rrddata(self, node: str, storage: str, timeframe: str = "week") -> list[dict[str, Any]] | None:
+        """Get usage history of a storage from the node's RRD."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/storage/{storage}/rrddata", timeframe=timeframe, cf="AVERAGE")
+        except Exception as err:
+            LOGGER.error("Failed to get RRD data for storage %s on %s: %s", storage, node, err)
+            return None
+
+    def get_cluster_resources(self, resource_type: str = "vm") -> list[dict[str, Any]] | None:
+        """Get the cluster-wide resource list, one call for every node."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get("cluster/resources", type=resource_type)
+        except Exception as err:
+            LOGGER.error("Failed to get cluster resources: %s", err)
+            return None
+
+    def get_cluster_id(self) -> str | None:
+        """Get an ID for the cluster this host belongs to, or the node itself if standalone."""
+        if not self._proxmox:
+            return None
+        try:
+            status = self._get("cluster/status")
+        except Exception as err:
+            LOGGER.error("Failed to get cluster status: %s", err)
+            return None
+        cluster = next((entry for entry in status if entry.get("type") == "cluster"), None)
+        if cluster is not None:
+            return f"cluster:{cluster['name']}"
+        local = next((entry for entry in status if entry.get("type") == "node" and entry.get("local")), None)
+        return f"node:{local['name']}" if local is not None else None
+
+    def get_ha_status(self) -> list[dict[str, Any]] | None:
+        """Get the current HA manager, LRM and service status."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get("cluster/ha/status/current")
+        except Exception as err:
+            LOGGER.error("Failed to get HA status: %s", err)
+            return None
+
+    def get_replication_jobs(self) -> list[dict[str, Any]] | None:
+        """Get the configured replication jobs."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get("cluster/replication")
+        except Exception as err:
+            LOGGER.error("Failed to get replication jobs: %s", err)
+            return None
+
+    def get_replication_status(self, node: str) -> list[dict[str, Any]] | None:
+        """Get the state of the replication jobs that run from a node."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/replication")
+        except Exception as err:
+            LOGGER.error("Failed to get replication status for node %s: %s", node, err)
+            return None
+
+    def get_ceph_status(self) -> dict[str, Any] | None:
+        """Get the Ceph cluster status."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get("cluster/ceph/status")
+        except Exception as err:
+            LOGGER.debug("Failed to get Ceph status: %s", err)
+            return None
+
+    def get_storage_content(self, node: str, storage: str, content: str | None = None) -> list[dict[str, Any]] | None:
+        """Get the volumes on a storage, optionally of one content type."""
+        if not self._proxmox:
+            return None
+        params = {"content": content} if content else {}
+        try:
+            return self._get(f"nodes/{node}/storage/{storage}/content", **params)
+        except Exception as err:
+            LOGGER.error("Failed to get content of storage %s on %s: %s", storage, node, err)
+            return None
+
+    def get_disks(self, node: str) -> list[dict[str, Any]] | None:
+        """Get the physical disks of a node."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/disks/list")
+        except Exception as err:
+            LOGGER.error("Failed to get disks of node %s: %s", node, err)
+            return None
+
+    def get_disk_smart(self, node: str, disk: str) -> dict[str, Any] | None:
+        """Get the SMART health and attributes of a disk."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/disks/smart", disk=disk)
+        except Exception as err:
+            LOGGER.debug("SMART data unavailable for %s on %s: %s", disk, node, err)
+            return None
+
+    def get_zfs_pools(self, node: str) -> list[dict[str, Any]] | None:
+        """Get the ZFS pools of a node."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/disks/zfs")
+        except Exception as err:
+            LOGGER.error("Failed to get ZFS pools of node %s: %s", node, err)
+            return None
+
+    def get_apt_updates(self, node: str) -> list[dict[str, Any]] | None:
+        """Get the package updates available on a node, from its last index refresh."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/apt/update")
+        except Exception as err:
+            LOGGER.error("Failed to get package updates of node %s: %s", node, err)
+            return None
+
+    def get_apt_versions(self, node: str) -> list[dict[str, Any]] | None:
+        """Get the versions of the Proxmox VE related packages on a node."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/apt/versions")
+        except Exception as err:
+            LOGGER.error("Failed to get package versions of node %s: %s", node, err)
+            return None
+
+    def get_pool_members(self, pool: str) -> list[dict[str, Any]] | None:
+        """Get the members of a resource pool."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"pools/{pool}").get("members", [])
+        except Exception as err:
+            LOGGER.error("Failed to get members of pool %s: %s", pool, err)
+            return None
+
+    def get_vm_agent_interfaces(self, node: str, vm_id: int) -> list[dict[str, Any]] | None:
+        """Get network interfaces reported by the QEMU guest agent."""
+        if not self._proxmox:
+            return None
+        try:
+            result = self._get(f"nodes/{node}/qemu/{vm_id}/agent/network-get-interfaces")
+            return result.get("result", []) if result else []
+        except Exception as err:
+            # An agent that is not running is common, so keep this quiet
+            LOGGER.debug("Guest agent interfaces unavailable for VM %s on %s: %s", vm_id, node, err)
+            return None
+
+    def get_vm_agent_fsinfo(self, node: str, vm_id: int) -> list[dict[str, Any]] | None:
+        """Get filesystem information reported by the QEMU guest agent."""
+        if not self._proxmox:
+            return None
+        try:
+            result = self._get(f"nodes/{node}/qemu/{vm_id}/agent/get-fsinfo")
+            return result.get("result", []) if result else []
+        except Exception as err:
+            LOGGER.debug("Guest agent fsinfo unavailable for VM %s on %s: %s", vm_id, node, err)
+            return None
+
+    def get_lxc_interfaces(self, node: str, vm_id: int) -> list[dict[str, Any]] | None:
+        """Get network interfaces of a running LXC container."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/lxc/{vm_id}/interfaces")
+        except Exception as err:
+            LOGGER.debug("Interfaces unavailable for LXC %s on %s: %s", vm_id, node, err)
+            return None
+
     def get_vm_config(self, node: str, vm_id: int, vm_type: str = "qemu") -> dict[str, Any] | None:
         """Get VM/LXC configuration."""
         if not self._proxmox:
             return None
         try:
-            if vm_type == "lxc":
-                return self._proxmox.nodes(node).lxc(vm_id).config.get()
-            else:
-                return self._proxmox.nodes(node).qemu(vm_id).config.get()
+            return self._get(f"{_guest_path(node, vm_id, vm_type)}/config")
         except Exception as err:
             LOGGER.error("Failed to get config for %s %s on %s: %s", vm_type, vm_id, node, err)
             return None
@@ -168,10 +567,8 @@ class ProxmoxClient:
         if not self._proxmox:
             return False
         try:
-            if vm_type == "lxc":
-                self._proxmox.nodes(node).lxc(vm_id).config.post(**kwargs)
-            else:
-                self._proxmox.nodes(node).qemu(vm_id).config.post(**kwargs)
+            guest = _guest_path(node, vm_id, vm_type)
+            self._post(f"{guest}/config", invalidate=(f"{guest}/config",), **kwargs)
             return True
         except Exception as err:
             LOGGER.error("Failed to set config for %s %s on %s: %s", vm_type, vm_id, node, err)
@@ -184,10 +581,8 @@ class ProxmoxClient:
         if not self._proxmox:
             return False
         try:
-            if vm_type == "lxc":
-                self._proxmox.nodes(node).lxc(vm_id).status.start.post()
-            else:
-                self._proxmox.nodes(node).qemu(vm_id).status.start.post()
+            guest = _guest_path(node, vm_id, vm_type)
+            self._post(f"{guest}/status/start", invalidate=(f"nodes/{node}/{vm_type}", guest))
             return True
         except Exception as err:
             LOGGER.error("Failed to start %s %s on %s: %s", vm_type, vm_id, node, err)
@@ -198,10 +593,8 @@ class ProxmoxClient:
         if not self._proxmox:
             return False
         try:
-            if vm_type == "lxc":
-                self._proxmox.nodes(node).lxc(vm_id).status.stop.post()
-            else:
-                self._proxmox.nodes(node).qemu(vm_id).status.stop.post()
+            guest = _guest_path(node, vm_id, vm_type)
+            self._post(f"{guest}/status/stop", invalidate=(f"nodes/{node}/{vm_type}", guest))
             return True
         except Exception as err:
             LOGGER.error("Failed to stop %s %s on %s: %s", vm_type, vm_id, node, err)
@@ -212,10 +605,8 @@ class ProxmoxClient:
         if not self._proxmox:
             return False
         try:
-            if vm_type == "lxc":
-                self._proxmox.nodes(node).lxc(vm_id).status.shutdown.post()
-            else:
-                self._proxmox.nodes(node).qemu(vm_id).status.shutdown.post()
+            guest = _guest_path(node, vm_id, vm_type)
+            self._post(f"{guest}/status/shutdown", invalidate=(f"nodes/{node}/{vm_type}", guest))
             return True
         except Exception as err:
             LOGGER.error("Failed to shutdown %s %s on %s: %s", vm_type, vm_id, node, err)
@@ -226,11 +617,95 @@ class ProxmoxClient:
         if not self._proxmox:
             return False
         try:
-            if vm_type == "lxc":
-                self._proxmox.nodes(node).lxc(vm_id).status.reboot.post()
-            else:
-                self._proxmox.nodes(node).qemu(vm_id).status.reboot.post()
+            guest = _guest_path(node, vm_id, vm_type)
+            self._post(f"{guest}/status/reboot", invalidate=(f"nodes/{node}/{vm_type}", guest))
             return True
         except Exception as err:
             LOGGER.error("Failed to reboot %s %s on %s: %s", vm_type, vm_id, node, err)
             return False
+
+    def migrate_vm(self, node: str, vm_id: int, vm_type: str, target: str, online: bool) -> str | None:
+        """Migrate a VM or Container to another node. Returns the task UPID."""
+        if not self._proxmox:
+            return None
+        try:
+            guest = _guest_path(node, vm_id, vm_type)
+            params: dict[str, Any] = {"target": target}
+            if online:
+                # Containers cannot live migrate, they are restarted on the target
+                params["online" if vm_type == "qemu" else "restart"] = 1
+            return self._post(
+                f"{guest}/migrate",
+                invalidate=(f"nodes/{node}/{vm_type}", f"nodes/{target}/{vm_type}", guest),
+                **params,
+            )
+        except Exception as err:
+            LOGGER.error("Failed to migrate %s %s from %s to %s: %s", vm_type, vm_id, node, target, err)
+            return None
+
+    def get_task_status(self, node: str, upid: str) -> dict[str, Any] | None:
+        """Get the status of a task."""
+        if not self._proxmox:
+            return None
+        try:
+            return self._get(f"nodes/{node}/tasks/{upid}/status")
+        except Exception as err:
+            LOGGER.debug("Failed to get status of task %s: %s", upid, err)
+            return None
+
+    # Snapshots
+
+    def get_snapshots(self, node: str, vm_id: int, vm_type: str = "qemu") -> list[dict[str, Any]] | None:
+        """Get the snapshots of a VM or Container."""
+        if not self._proxmox:
+            return None
+        try:
+            snapshots = self._get(f"{_guest_path(node, vm_id, vm_type)}/snapshot")
+        except Exception as err:
+            LOGGER.error("Failed to get snapshots of %s %s on %s: %s", vm_type, vm_id, node, err)
+            return None
+        # The list always ends with a "current" entry for the running state
+        return [snapshot for snapshot in snapshots if snapshot.get("name") != "current"]
+
+    def create_snapshot(
+        self, node: str, vm_id: int, vm_type: str, snapname: str, description: str | None = None, vmstate: bool = False
+    ) -> str | None:
+        """Create a snapshot. Returns the task UPID."""
+        if not self._proxmox:
+            return None
+        try:
+            guest = _guest_path(node, vm_id, vm_type)
+            params: dict[str, Any] = {"snapname": snapname}
+            if description:
+                params["description"] = description
+            if vmstate and vm_type == "qemu":
+                params["vmstate"] = 1
+            return self._post(f"{guest}/snapshot", invalidate=(f"{guest}/snapshot",), **params)
+        except Exception as err:
+            LOGGER.error("Failed to snapshot %s %s on %s: %s", vm_type, vm_id, node, err)
+            return None
+
+    def rollback_snapshot(self, node: str, vm_id: int, vm_type: str, snapname: str) -> str | None:
+        """Roll back to a snapshot. Returns the task UPID."""
+        if not self._proxmox:
+            return None
+        try:
+            guest = _guest_path(node, vm_id, vm_type)
+            return self._post(
+                f"{guest}/snapshot/{snapname}/rollback",
+                invalidate=(f"nodes/{node}/{vm_type}", guest),
+            )
+        except Exception as err:
+            LOGGER.error("Failed to roll back %s %s on %s to %s: %s", vm_type, vm_id, node, snapname, err)
+            return None
+
+    def delete_snapshot(self, node: str, vm_id: int, vm_type: str, snapname: str) -> str | None:
+        """Delete a snapshot. Returns the task UPID."""
+        if not self._proxmox:
+            return None
+        try:
+            guest = _guest_path(node, vm_id, vm_type)
+            return self._delete(f"{guest}/snapshot/{snapname}", invalidate=(f"{guest}/snapshot",))
+        except Exception as err:
+            LOGGER.error("Failed to delete snapshot %s of %s %s on %s: %s", snapname, vm_type, vm_id, node, err)
+            return None
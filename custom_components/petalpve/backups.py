@@ -0,0 +1,194 @@
+"""Incremental index of the newest backup of every guest."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .api import ProxmoxClient
+from .const import (
+    BACKUP_LIST_TIMEOUT,
+    BACKUP_RETRY,
+    BACKUP_SAVE_DELAY,
+    BACKUP_SCAN_INTERVAL,
+    DOMAIN,
+    LOGGER,
+    STORAGE_VERSION,
+)
+
+
+def backup_storages(storage: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Return the active storages that hold backups, keyed by store ID."""
+    return {
+        store_id: store for store_id, store in storage.items()
+        if "backup" in store.get("content", "").split(",")
+        and store.get("active", 1)
+        and "stale_since" not in store
+    }
+
+
+class BackupIndex:
+    """Map each vmid to its newest backup across all backup storages.
+
+    Listing a PBS or NFS backup storage can return tens of thousands of
+    volumes. Each storage is listed at most every BACKUP_SCAN_INTERVAL and
+    diffed against the volume IDs already indexed, so only added and removed
+    volumes are processed and the guests they belong to re-ranked. The index
+    is persisted so a restart does not have to rebuild it.
+
+    A listing gets BACKUP_LIST_TIMEOUT rather than the usual call timeout and
+    keeps running past the refresh budget; a later refresh picks up its
+    result. Failed listings are retried with exponential backoff.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: ProxmoxClient, entry_id: str) -> None:
+        """Initialize."""
+        self._client = client
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backups"
+        )
+        self._loaded = False
+        # store ID -> volid -> (vmid, ctime)
+        self._volumes: dict[str, dict[str, tuple[int, int]]] = {}
+        # store ID -> time.time() of the last successful listing
+        self._scanned: dict[str, float] = {}
+        # vmid -> newest backup
+        self._newest: dict[int, dict[str, Any]] = {}
+        # store ID -> listing still running
+        self._listings: dict[str, asyncio.Future] = {}
+        # store ID -> (consecutive failures, time.time() of the next attempt)
+        self._failures: dict[str, tuple[int, float]] = {}
+
+    def newest(self, vm_id: int) -> dict[str, Any] | None:
+        """Return the newest backup of a guest: volid, storage and ctime."""
+        return self._newest.get(vm_id)
+
+    async def _async_load(self) -> None:
+        """Load the persisted index."""
+        self._loaded = True
+        try:
+            stored = await self._store.async_load()
+        except Exception as err:
+            LOGGER.warning("Could not load saved Proxmox VE backup index: %s", err)
+            return
+        if not stored:
+            return
+        for store_id, volumes in stored.get("volumes", {}).items():
+            self._volumes[store_id] = {volid: (vm_id, ctime) for volid, (vm_id, ctime) in volumes.items()}
+        self._scanned = stored.get("scanned", {})
+        self._rank(set().union(*(
+            {vm_id for vm_id, _ in volumes.values()} for volumes in self._volumes.values()
+        )))
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the index to persist."""
+        return {
+            "volumes": {
+                store_id: {volid: list(entry) for volid, entry in volumes.items()}
+                for store_id, volumes in self._volumes.items()
+            },
+            "scanned": self._scanned,
+        }
+
+    def _rank(self, vm_ids: set[int]) -> None:
+        """Recompute the newest backup of the given guests."""
+        for vm_id in vm_ids:
+            self._newest.pop(vm_id, None)
+        if not vm_ids:
+            return
+        for store_id, volumes in self._volumes.items():
+            for volid, (vm_id, ctime) in volumes.items():
+                if vm_id not in vm_ids:
+                    continue
+                current = self._newest.get(vm_id)
+                if current is None or ctime > current["ctime"]:
+                    self._newest[vm_id] = {"volid": volid, "storage": store_id, "ctime": ctime}
+
+    def _apply(self, store_id: str, content: list[dict[str, Any]]) -> set[int]:
+        """Diff a storage listing against the index. Returns the guests affected."""
+        known = self._volumes.setdefault(store_id, {})
+        listed = {
+            item["volid"]: (int(item["vmid"]), int(item.get("ctime", 0)))
+            for item in content
+            if item.get("volid") and item.get("vmid") is not None
+        }
+        added = listed.keys() - known.keys()
+        removed = known.keys() - listed.keys()
+        affected = {listed[volid][0] for volid in added} | {known[volid][0] for volid in removed}
+        for volid in removed:
+            known.pop(volid)
+        for volid in added:
+            known[volid] = listed[volid]
+        return affected
+
+    async def async_update(self, storage: dict[str, Any], deadline: float) -> None:
+        """List the backup storages that are due, as far as the refresh budget allows."""
+        if not self._loaded:
+            await self._async_load()
+
+        storages = backup_storages(storage)
+        affected: set[int] = set()
+        # Forget storages that were removed from the cluster
+        for store_id in set(self._volumes) - set(storage):
+            affected |= {vm_id for vm_id, _ in self._volumes.pop(store_id).values()}
+            self._scanned.pop(store_id, None)
+            self._failures.pop(store_id, None)
+
+        now = time.time()
+        for store_id, store in storages.items():
+            listing = self._listings.get(store_id)
+            if listing is None:
+                if now - self._scanned.get(store_id, 0) < BACKUP_SCAN_INTERVAL:
+                    continue
+                if now < self._failures.get(store_id, (0, 0))[1]:
+                    continue
+                # Storages left over are picked up by a later refresh
+                if time.monotonic() >= deadline:
+                    break
+                listing = self._listings[store_id] = asyncio.ensure_future(self._client.async_call(
+                    self._client.get_storage_content, store["node"], store["storage"], "backup",
+                    timeout=BACKUP_LIST_TIMEOUT,
+                ))
+            if not listing.done():
+                await asyncio.wait([listing], timeout=max(deadline - time.monotonic(), 0))
+                if not listing.done():
+                    # Still running, a later refresh collects it
+                    continue
+            self._listings.pop(store_id)
+
+            content = None if listing.cancelled() or listing.exception() else listing.result()
+            if content is None:
+                failures = self._failures.get(store_id, (0, 0))[0] + 1
+                retry = min(BACKUP_RETRY * 2 ** (failures - 1), BACKUP_SCAN_INTERVAL)
+                LOGGER.debug("Could not list backups on %s, retrying in %s s", store_id, retry)
+                self._failures[store_id] = (failures, now + retry)
+                continue
+            self._failures.pop(store_id, None)
+            affected |= self._apply(store_id, content)
+            self._scanned[store_id] = now
+
+        if affected:
+            self._rank(affected)
+        if affected or now in self._scanned.values():
+            self._store.async_delay_save(self._data_to_save, BACKUP_SAVE_DELAY)
+
+    def without_recent_backup(self, data: dict[str, Any], max_age: float) -> list[dict[str, Any]]:
+        """Return the guests whose newest backup is older than max_age seconds, or missing."""
+        cutoff = time.time() - max_age
+        missing = []
+        for vm_type, key in (("qemu", "vms"), ("lxc", "lxcs")):
+            for vm_id, guest in data[key].items():
+                if guest.get("template"):
+                    continue
+                newest = self._newest.get(vm_id)
+                if newest is None or newest["ctime"] < cutoff:
+                    missing.append({
+                        "vmid": vm_id,
+                        "type": vm_type,
+                        "name": guest.get("name", str(vm_id)),
+                        "last_backup": newest["ctime"] if newest else None,
+                    })
+        return missing
@@ -13,8 +13,9 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE, DOMAIN, PROFILE_GUEST_ENTITIES
 from .coordinator import ProxmoxCoordinator
 
 async def async_setup_entry(
@@ -26,6 +27,7 @@ async def async_setup_entry(
     coordinator: ProxmoxCoordinator = hass.data[DOMAIN][entry.entry_id]
 
     entities: list[ProxmoxBinarySensor] = []
+    guest_keys = PROFILE_GUEST_ENTITIES[entry.options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE)]
 
     # Node Status
     for node_name, node_data in coordinator.data["nodes"].items():
@@ -41,34 +43,63 @@ async def async_setup_entry(
             )
         )
 
-    # VM Status
-    for vm_id, vm_data in coordinator.data["vms"].items():
+    # Node API reachability (last known guest data is kept while this is off)
+    for node_name, node_data in coordinator.data["nodes"].items():
         entities.append(
             ProxmoxBinarySensor(
                 coordinator,
-                vm_data["name"],
-                "qemu",
-                str(vm_id),
-                "status",
-                "Status",
-                BinarySensorDeviceClass.RUNNING,
+                node_name,
+                "node",
+                node_name,
+                "api_reachable",
+                "API Reachable",
+                BinarySensorDeviceClass.CONNECTIVITY,
             )
         )
 
-    # LXC Status
-    for vm_id, vm_data in coordinator.data["lxcs"].items():
+    # Cluster-wide guest anomaly indicator, one entity regardless of fleet size
+    if "cluster" in coordinator.data:
         entities.append(
             ProxmoxBinarySensor(
                 coordinator,
-                vm_data["name"],
-                "lxc",
-                str(vm_id),
-                "status",
-                "Status",
-                BinarySensorDeviceClass.RUNNING,
+                "Cluster",
+                "cluster",
+                coordinator.cluster_scope,
+                "anomaly",
+                "Guest Anomaly",
+                BinarySensorDeviceClass.PROBLEM,
             )
         )
-    
+
+    if "status" in guest_keys:
+        # VM Status
+        for vm_id, vm_data in coordinator.data["vms"].items():
+            entities.append(
+                ProxmoxBinarySensor(
+                    coordinator,
+                    vm_data["name"],
+                    "qemu",
+                    str(vm_id),
+                    "status",
+                    "Status",
+                    BinarySensorDeviceClass.RUNNING,
+                )
+            )
+
+        # LXC Status
+        for vm_id, vm_data in coordinator.data["lxcs"].items():
+            entities.append(
+                ProxmoxBinarySensor(
+                    coordinator,
+                    vm_data["name"],
+                    "lxc",
+                    str(vm_id),
+                    "status",
+                    "Status",
+                    BinarySensorDeviceClass.RUNNING,
+                )
+            )
+
     async_add_entities(entities)
 
 class ProxmoxBinarySensor(CoordinatorEntity[ProxmoxCoordinator], BinarySensorEntity):
@@ -93,6 +124,23 @@ class ProxmoxBinarySensor(CoordinatorEntity[ProxmoxCoordinator], BinarySensorEnt
         self._attr_unique_id = f"proxmox_{resource_type}_{resource_id}_{key}"
         self._attr_device_class = device_class
 
+    def _get_data(self) -> dict[str, Any] | None:
+        """Return the coordinator data for this resource."""
+        if self._resource_type == "node":
+            return self.coordinator.data["nodes"].get(self._resource_id)
+        elif self._resource_type == "qemu":
+             return self.coordinator.data["vms"].get(int(self._resource_id))
+        elif self._resource_type == "lxc":
+             return self.coordinator.data["lxcs"].get(int(self._resource_id))
+        elif self._resource_type == "cluster":
+             return self.coordinator.data.get("cluster")
+        return None
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return super().available and self.coordinator.is_resource_available(self._get_data())
+
     @property
     def is_on(self) -> bool | None:
         """Return true if the binary sensor is on."""
@@ -100,6 +148,8 @@ class ProxmoxBinarySensor(CoordinatorEntity[ProxmoxCoordinator], BinarySensorEnt
         if self._resource_type == "node":
             data = self.coordinator.data["nodes"].get(self._resource_id)
             if data:
+                if self._key == "api_reachable":
+                    return "unreachable_since" not in data
                  # Nodes use 'online' 1 or 0 usually, or status 'online'
                 status = data.get("status")
                 return status == "online"
@@ -113,6 +163,11 @@ class ProxmoxBinarySensor(CoordinatorEntity[ProxmoxCoordinator], BinarySensorEnt
             data = self.coordinator.data["lxcs"].get(int(self._resource_id))
             if data:
                 return data.get("status") == "running"
+
+        elif self._resource_type == "cluster":
+            data = self.coordinator.data.get("cluster")
+            if data is not None:
+                return bool(data.get("anomalies"))
                 
         return None
 
@@ -120,20 +175,21 @@ class ProxmoxBinarySensor(CoordinatorEntity[ProxmoxCoordinator], BinarySensorEnt
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return extra state attributes."""
         attrs = {}
-        data = None
-        if self._resource_type == "node":
-            data = self.coordinator.data["nodes"].get(self._resource_id)
-        elif self._resource_type == "qemu":
-             data = self.coordinator.data["vms"].get(int(self._resource_id))
-        elif self._resource_type == "lxc":
-             data = self.coordinator.data["lxcs"].get(int(self._resource_id))
-             
-        if data is not None:
+        data = self._get_data()
+
+        if self._resource_type == "cluster":
+            if data is not None:
+                attrs["anomalies"] = data.get("anomalies", [])
+        elif data is not None:
             for k, v in data.items():
                 if k in ["tags", "cpus", "name", "uptime", "pid"]:
                     attrs[k] = v
                 if k == "maxmem":
                     attrs["memory_size"] = f"{round(v / 1073741824, 2)} GB"
+                if k in ["unreachable_since", "stale_since"]:
+                    attrs[k] = dt_util.utc_from_timestamp(v).isoformat()
+        if self.coordinator.stale:
+            attrs["stale"] = True
         return attrs
 
     @property
@@ -147,6 +203,14 @@ class ProxmoxBinarySensor(CoordinatorEntity[ProxmoxCoordinator], BinarySensorEnt
                 model="Proxmox VE Node",
                 configuration_url=f"https://{self.coordinator.client._host}:{self.coordinator.client._port}",
             )
+        elif self._resource_type == "cluster":
+            return DeviceInfo(
+                identifiers={(DOMAIN, self.coordinator.cluster_scope)},
+                name="Proxmox VE Cluster",
+                manufacturer="Proxmox",
+                model="Proxmox VE Cluster",
+                configuration_url=f"https://{self.coordinator.client._host}:{self.coordinator.client._port}",
+            )
         elif self._resource_type in ("qemu", "lxc"):
             # Get VM data to find the node it's on for "via_device"
             data = None
@@ -8,7 +8,7 @@ from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE, DOMAIN, PROFILE_GUEST_ENTITIES
 from .coordinator import ProxmoxCoordinator
 
 async def async_setup_entry(
@@ -20,6 +20,7 @@ async def async_setup_entry(
     coordinator: ProxmoxCoordinator = hass.data[DOMAIN][entry.entry_id]
 
     entities: list[ProxmoxButton] = []
+    guest_keys = PROFILE_GUEST_ENTITIES[entry.options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE)]
 
     # VM Buttons
     for vm_id, vm_data in coordinator.data["vms"].items():
@@ -41,7 +42,7 @@ async def async_setup_entry(
             ProxmoxButton(coordinator, name, "lxc", str(vm_id), "reboot", "Reboot", "mdi:restart", "reboot_vm"),
         ])
 
-    async_add_entities(entities)
+    async_add_entities([entity for entity in entities if entity.key in guest_keys])
 
 class ProxmoxButton(CoordinatorEntity[ProxmoxCoordinator], ButtonEntity):
     """Proxmox Button."""
@@ -68,45 +69,31 @@ class ProxmoxButton(CoordinatorEntity[ProxmoxCoordinator], ButtonEntity):
         self._method_name = method_name
         self._vm_id = int(resource_id)
 
+    @property
+    def key(self) -> str:
+        """Return the button key."""
+        return self._key
+
     async def async_press(self) -> None:
         """Press the button."""
-        node = None
-        # Find the node for this VM/LXC
-        if self._resource_type == "qemu":
-             data = self.coordinator.data["vms"].get(self._vm_id)
-        elif self._resource_type == "lxc":
-             data = self.coordinator.data["lxcs"].get(self._vm_id)
-             
-        if not data:
-             return
-
-        node = data.get("node") # API returns 'node' in the list view? It usually does not on single node view, but cluster view yes.
-        # Wait, the get_vms calls were per node. The coordinator stores them flat by ID? 
-        # If IDs are unique across cluster? Yes usually. 
-        # But wait, our coordinator structure is:
-        # vms[vmid] = vm_data
-        # We need to make sure we store the node name in the vm_data in the coordinator!
-        # Checking coordinator.py...
-        # "new_data["vms"][vm["vmid"]] = vm" -> api.get_vms() returns list of dicts.
-        # proxmoxer nodes(node).qemu.get() returns objects. Does it include 'node'?
-        # Usually it does NOT include the node name if queried from /nodes/{node}/qemu
-        # It DOES if queried from /cluster/resources but that is different endpoint.
-        # We queried per node. So we need to inject the node name in coordinator.py.
-        
-        # Let's double check coordinator.py logic or rely on injection.
-        # I better fix coordinator.py to inject 'node' into the vm/lxc data.
-        
-        # Assuming we fix coordinator.py, here is the call:
-        method = getattr(self.coordinator.client, self._method_name)
-        await self.hass.async_add_executor_job(
-            method,
-            node,
+        # The coordinator injects 'node' into the guest data and follows migrations
+        await self.coordinator.async_guest_action(
+            getattr(self.coordinator.client, self._method_name),
+            self._resource_type,
             self._vm_id,
-            self._resource_type
         )
         # Request update
         await self.coordinator.async_request_refresh()
 
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        if self._resource_type == "qemu":
+            data = self.coordinator.data["vms"].get(self._vm_id)
+        else:
+            data = self.coordinator.data["lxcs"].get(self._vm_id)
+        return super().available and self.coordinator.is_resource_available(data)
+
     @property
     def device_info(self) -> DeviceInfo:
         """Return device information about this entity."""
@@ -0,0 +1,68 @@
+"""Staggered per-node collection of data that changes over hours, not seconds."""
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+from .const import LOGGER, NODE_DETAIL_MAX_PER_TICK, NODE_DETAIL_RETRY, NODE_DETAIL_STARTUP_SPREAD
+
+# Fraction of the interval each schedule is randomly moved by, so nodes drift apart
+JITTER = 0.1
+
+
+class NodeDetailCollector:
+    """Fetch slow-changing node details on a jittered schedule per node and kind.
+
+    Each (node, kind) pair gets its own due time, spread at random over the
+    first NODE_DETAIL_STARTUP_SPREAD seconds and then over a jittered
+    interval, so nodes are never all queried at once. Results are kept
+    until the next successful fetch, which makes the interval the TTL.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # kind -> (interval, fetch function returning None on failure)
+        self._kinds: dict[str, tuple[float, Callable[[str], Awaitable[Any]]]] = {}
+        self._due: dict[tuple[str, str], float] = {}
+        # node -> kind -> last result
+        self.results: dict[str, dict[str, Any]] = {}
+
+    def register(self, kind: str, interval: float, fetch: Callable[[str], Awaitable[Any]]) -> None:
+        """Add a kind of detail to collect from every node."""
+        self._kinds[kind] = (interval, fetch)
+
+    async def async_collect(self, nodes: list[str]) -> bool:
+        """Fetch what is due on the given nodes. Returns True if any result changed."""
+        now = time.monotonic()
+        for node in set(self.results) - set(nodes):
+            self.results.pop(node)
+        for index in [index for index in self._due if index[0] not in nodes]:
+            self._due.pop(index)
+
+        due = []
+        for node in nodes:
+            for kind in self._kinds:
+                index = (node, kind)
+                if index not in self._due:
+                    self._due[index] = now + random.uniform(0, NODE_DETAIL_STARTUP_SPREAD)
+                elif self._due[index] <= now:
+                    due.append(index)
+        due.sort(key=self._due.__getitem__)
+
+        changed = False
+        for node, kind in due[:NODE_DETAIL_MAX_PER_TICK]:
+            interval, fetch = self._kinds[kind]
+            try:
+                result = await fetch(node)
+            except TimeoutError:
+                result = None
+            if result is None:
+                LOGGER.debug("Could not collect %s from node %s, retrying later", kind, node)
+                self._due[(node, kind)] = now + NODE_DETAIL_RETRY
+                continue
+            self._due[(node, kind)] = now + interval * random.uniform(1 - JITTER, 1 + JITTER)
+            if self.results.setdefault(node, {}).get(kind) != result:
+                self.results[node][kind] = result
+                changed = True
+        return changed
@@ -8,11 +8,37 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME, CONF_VERIFY_SSL
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 
 from .api import ProxmoxClient
-from .const import CONF_REALM, DEFAULT_PORT, DEFAULT_REALM, DEFAULT_VERIFY_SSL, DOMAIN, LOGGER
+from .const import (
+    CONF_API_BURST,
+    CONF_API_RATE,
+    CONF_ENTITY_PROFILE,
+    CONF_LXC_EXCLUDE,
+    CONF_NODE_EXCLUDE,
+    CONF_REALM,
+    CONF_RECORD_TRAFFIC,
+    CONF_STATE_HEARTBEAT,
+    CONF_UNREACHABLE_GRACE_PERIOD,
+    CONF_VM_EXCLUDE,
+    DEFAULT_API_BURST,
+    DEFAULT_API_RATE,
+    DEFAULT_ENTITY_PROFILE,
+    DEFAULT_PORT,
+    DEFAULT_REALM,
+    DEFAULT_RECORD_TRAFFIC,
+    DEFAULT_STATE_HEARTBEAT,
+    DEFAULT_UNREACHABLE_GRACE_PERIOD,
+    DEFAULT_VERIFY_SSL,
+    DOMAIN,
+    LOGGER,
+    MIN_STATE_WRITE_INTERVAL,
+    PROFILE_GUEST_ENTITIES,
+)
+from .filters import ExclusionFilter
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -30,6 +56,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -68,3 +102,64 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=STEP_USER_DATA_SCHEMA,
             errors=errors,
         )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle PetalPVE options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            for key in (CONF_NODE_EXCLUDE, CONF_VM_EXCLUDE, CONF_LXC_EXCLUDE):
+                try:
+                    ExclusionFilter(user_input.get(key))
+                except ValueError:
+                    errors[key] = "invalid_exclude"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    # Comma-separated: ids, ranges (9000-9999), name globs (ci-*), tag:<tag>, pool:<pool>
+                    vol.Optional(CONF_NODE_EXCLUDE, default=options.get(CONF_NODE_EXCLUDE, "")): str,
+                    vol.Optional(CONF_VM_EXCLUDE, default=options.get(CONF_VM_EXCLUDE, "")): str,
+                    vol.Optional(CONF_LXC_EXCLUDE, default=options.get(CONF_LXC_EXCLUDE, "")): str,
+                    vol.Optional(
+                        CONF_ENTITY_PROFILE,
+                        default=options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE),
+                    ): vol.In(list(PROFILE_GUEST_ENTITIES)),
+                    vol.Optional(
+                        CONF_UNREACHABLE_GRACE_PERIOD,
+                        default=options.get(CONF_UNREACHABLE_GRACE_PERIOD, DEFAULT_UNREACHABLE_GRACE_PERIOD),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_STATE_HEARTBEAT,
+                        default=options.get(CONF_STATE_HEARTBEAT, DEFAULT_STATE_HEARTBEAT),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=MIN_STATE_WRITE_INTERVAL)),
+                    vol.Optional(
+                        CONF_API_RATE,
+                        default=options.get(CONF_API_RATE, DEFAULT_API_RATE),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+                    vol.Optional(
+                        CONF_API_BURST,
+                        default=options.get(CONF_API_BURST, DEFAULT_API_BURST),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        CONF_RECORD_TRAFFIC,
+                        default=options.get(CONF_RECORD_TRAFFIC, DEFAULT_RECORD_TRAFFIC),
+                    ): bool,
+                }
+            ),
+            errors=errors,
+        )
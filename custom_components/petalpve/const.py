@@ -3,6 +3,8 @@
 import logging
 
 DOMAIN = "petalpve"
+# hass.data key of the lock that serializes matching entries to clusters
+DATA_SETUP_LOCK = f"{DOMAIN}_setup_lock"
 LOGGER = logging.getLogger(__package__)
 
 CONF_HOST = "host"
@@ -14,15 +16,130 @@ CONF_VERIFY_SSL = "verify_ssl"
 CONF_NODE_EXCLUDE = "node_exclude"
 CONF_VM_EXCLUDE = "vm_exclude"
 CONF_LXC_EXCLUDE = "lxc_exclude"
+CONF_UNREACHABLE_GRACE_PERIOD = "unreachable_grace_period"
+CONF_ENTITY_PROFILE = "entity_profile"
+CONF_STATE_HEARTBEAT = "state_heartbeat"
+CONF_API_RATE = "api_rate"
+CONF_API_BURST = "api_burst"
+CONF_RECORD_TRAFFIC = "record_traffic"
+# Entry data keys that swap the live API for a recorded capture, set by the
+# replay harness in tests/test_replay.py rather than by the config flow
+CONF_REPLAY_FILE = "replay_file"
+CONF_REPLAY_REALTIME = "replay_realtime"
 
 DEFAULT_PORT = 8006
 DEFAULT_REALM = "pam"
 DEFAULT_VERIFY_SSL = True
+DEFAULT_UNREACHABLE_GRACE_PERIOD = 300 # seconds before an unreachable node's guests go unavailable
+DEFAULT_STATE_HEARTBEAT = 900 # seconds after which a deadbanded sensor writes its state regardless
+DEFAULT_API_RATE = 10.0 # requests per second across all PetalPVE callers
+DEFAULT_API_BURST = 20
+DEFAULT_RECORD_TRAFFIC = False
+
+# Entity profiles decide which per-guest entities are created
+PROFILE_MINIMAL = "minimal"
+PROFILE_STANDARD = "standard"
+PROFILE_FULL = "full"
+# No per-guest entities; guest CPU and memory go to long-term statistics instead
+PROFILE_STATISTICS = "statistics"
+DEFAULT_ENTITY_PROFILE = PROFILE_FULL
+
+PROFILE_GUEST_ENTITIES = {
+    PROFILE_MINIMAL: {"status"},
+    PROFILE_STANDARD: {"status", "cpu", "memory"},
+    PROFILE_FULL: {
+        "status", "cpu", "memory", "disk_used", "disk_total", "console_url",
+        "ip_address", "guest_disk_used", "last_backup", "snapshots", "start", "stop", "shutdown",
+        "reboot", "onboot",
+    },
+    PROFILE_STATISTICS: set(),
+}
+
+# Guest entities fed by the guest agent and container interface lookups
+GUEST_AGENT_ENTITIES = {"ip_address", "guest_disk_used"}
+
+# Keys of the sensors every storage gets, see sensor.py
+STORAGE_SENSOR_KEYS = ("used", "total", "usage_pct", "days_until_full", "growth_rate")
+
+# Heavy extras that are created disabled in the entity registry
+GUEST_ENTITIES_DISABLED_BY_DEFAULT = {"console_url", "disk_total"}
+
+# Deadbands for noisy metric sensors, keyed by sensor key:
+# (absolute threshold in the sensor's unit, relative threshold as a fraction of the last written value).
+# A new value is only written once it moves past either threshold.
+SENSOR_DEADBANDS: dict[str, tuple[float | None, float | None]] = {
+    "cpu": (2.0, None),
+    "cpu_usage": (2.0, None),
+    "memory": (None, 0.02),
+    "memory_usage": (1.0, None),
+    "disk_used": (None, 0.01),
+    "guest_disk_used": (None, 0.01),
+    "used": (None, 0.005),
+    "usage_pct": (0.5, None),
+}
+MIN_STATE_WRITE_INTERVAL = 60 # seconds, max write rate for a deadbanded sensor
+
+# Number of guests listed by the cluster top-N sensors
+AGGREGATE_TOP_N = 5
+
+# Guest anomaly detection (EWMA baseline per guest and metric)
+ANOMALY_Z_THRESHOLD = 3.0
+ANOMALY_EWMA_ALPHA = 0.05 # ~20 refreshes of memory
+ANOMALY_WARMUP_SAMPLES = 20 # samples before a baseline is trusted
+ANOMALY_MIN_STDDEV = 2.0 # percentage points, stops idle guests alerting on tiny blips
+EVENT_ANOMALY = f"{DOMAIN}_anomaly"
+
+# Fired when a guest shows up on a different node
+EVENT_GUEST_MIGRATED = f"{DOMAIN}_guest_migrated"
+
+# Storage forecasting (recomputed on the slow tier)
+FORECAST_MAX_SAMPLES = 2016 # a week of slow-tier samples
+FORECAST_MIN_SAMPLES = 6
+FORECAST_MIN_SPAN = 21600 # seconds of history needed before forecasting
 
 # Update intervals
 SCAN_INTERVAL_FAST = 30 # seconds (for sensors that change often)
 SCAN_INTERVAL_SLOW = 300 # seconds (for resources that rarely change)
 
+# Blocking API calls
+API_MAX_WORKERS = 4 # size of the PetalPVE thread pool, also the node crawl concurrency
+API_ACTION_WORKERS = 2 # threads kept for user actions, so they never queue behind polling
+API_CALL_TIMEOUT = 10 # seconds per API call
+REFRESH_BUDGET = 25 # seconds for a whole refresh, nodes not done by then keep their last data
+
+# Tokens background polling leaves for user-initiated actions
+API_PRIORITY_RESERVE = 2
+
+# Short-lived response cache in ProxmoxClient, path pattern -> TTL in seconds.
+# Kept below SCAN_INTERVAL_FAST so it only absorbs bursts of identical reads;
+# paths that are not listed are still coalesced while in flight.
+API_CACHE_TTLS: dict[str, float] = {
+    "nodes": 5,
+    "nodes/*/qemu": 5,
+    "nodes/*/lxc": 5,
+    "nodes/*/storage": 5,
+    "nodes/*/qemu/*/config": 20,
+    "nodes/*/lxc/*/config": 20,
+    "pools/*": 60,
+}
+
+# Traffic captures for offline profiling
+RECORDING_VERSION = 1
+# Seconds without a request that separate two refresh cycles in a capture
+REPLAY_CYCLE_GAP = 2.0
+RECORDING_FLUSH_EVERY = 100 # records between flushes, so a crash loses little of the capture
+REDACTED = "**REDACTED**"
+# Keys whose values never reach a capture, matched case-insensitively as substrings
+SECRET_KEYS = ("password", "ticket", "token", "secret", "csrf")
+
+# Persisted snapshot of the last good refresh
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60 # seconds, batches snapshot writes across refreshes
+
+# Guest agent / container interface data
+GUEST_AGENT_TTL = 120 # seconds a successful agent response is reused
+GUEST_AGENT_NEGATIVE_TTL = 600 # seconds before retrying an agent that did not respond
+
 # Services
 SERVICE_REBOOT_NODE = "reboot_node"
 SERVICE_SHUTDOWN_NODE = "shutdown_node"
@@ -31,6 +148,43 @@ SERVICE_STOP_VM = "stop_vm"
 SERVICE_SHUTDOWN_VM = "shutdown_vm"
 SERVICE_REBOOT_VM = "reboot_vm"
 
+SERVICE_EVACUATE_NODE = "evacuate_node"
+SERVICE_REBALANCE = "rebalance"
+SERVICE_SNAPSHOT_CREATE = "snapshot_create"
+SERVICE_SNAPSHOT_ROLLBACK = "snapshot_rollback"
+SERVICE_SNAPSHOT_DELETE = "snapshot_delete"
+SERVICE_SNAPSHOT_LIST = "snapshot_list"
+
 ATTR_NODE = "node"
 ATTR_VM_ID = "vm_id"
 ATTR_VM_TYPE = "vm_type" # qemu or lxc
+ATTR_TARGET_NODES = "target_nodes"
+ATTR_MAX_PARALLEL = "max_parallel"
+ATTR_SNAPSHOT_NAME = "name"
+ATTR_DESCRIPTION = "description"
+ATTR_INCLUDE_RAM = "include_ram"
+
+# Migrations
+MIGRATION_MAX_PARALLEL = 2 # concurrent migrations when the service call does not say
+TASK_POLL_INTERVAL = 5 # seconds between task status checks
+MIGRATION_TIMEOUT = 3600 # seconds before a migration task is given up on
+SNAPSHOT_TASK_TIMEOUT = 1800 # seconds before a snapshot task is given up on
+
+# Rebalancing recommendations (recomputed on the slow tier)
+REBALANCE_MAX_MOVES = 5 # migrations recommended per pass
+REBALANCE_MIN_GAIN = 0.02 # imbalance reduction a migration must bring
+
+# Backup index
+BACKUP_SCAN_INTERVAL = 3600 # seconds between listings of one backup storage
+BACKUP_SAVE_DELAY = 300 # seconds, batches index writes
+BACKUP_LIST_TIMEOUT = 120 # seconds, listing a large PBS datastore takes far longer than other calls
+BACKUP_RETRY = 300 # seconds before the first retry of a failed listing, doubling up to BACKUP_SCAN_INTERVAL
+BACKUP_MAX_AGE = 172800 # seconds after which a guest counts as without a recent backup
+
+# Staggered node details (disks, SMART, ZFS, package updates), collected outside the refresh
+NODE_DETAIL_TICK = 60 # seconds between checks for due collections
+NODE_DETAIL_MAX_PER_TICK = 2 # collections started per check
+NODE_DETAIL_STARTUP_SPREAD = 600 # seconds the first collection of every node is spread over
+NODE_DETAIL_RETRY = 1800 # seconds before retrying a failed collection
+DISK_HEALTH_INTERVAL = 86400 # disks and SMART results are refreshed daily
+UPDATES_INTERVAL = 21600 # pending package updates and kernels, four times a day
@@ -1,21 +1,74 @@
 """DataUpdateCoordinator for Proxmox VE."""
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+from datetime import datetime, timedelta
 import logging
-from typing import Any
+import time
+from typing import Any, Awaitable, Callable
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .api import ProxmoxClient
-from .const import DOMAIN, LOGGER, SCAN_INTERVAL_FAST, SCAN_INTERVAL_SLOW
+from .const import (
+    API_CALL_TIMEOUT,
+    BACKUP_MAX_AGE,
+    CONF_ENTITY_PROFILE,
+    CONF_LXC_EXCLUDE,
+    CONF_NODE_EXCLUDE,
+    CONF_UNREACHABLE_GRACE_PERIOD,
+    CONF_VM_EXCLUDE,
+    DEFAULT_ENTITY_PROFILE,
+    DEFAULT_UNREACHABLE_GRACE_PERIOD,
+    DISK_HEALTH_INTERVAL,
+    DOMAIN,
+    EVENT_ANOMALY,
+    EVENT_GUEST_MIGRATED,
+    GUEST_AGENT_ENTITIES,
+    LOGGER,
+    PROFILE_GUEST_ENTITIES,
+    PROFILE_STATISTICS,
+    REFRESH_BUDGET,
+    SCAN_INTERVAL_FAST,
+    SCAN_INTERVAL_SLOW,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_TASK_TIMEOUT,
+    STORAGE_VERSION,
+    UPDATES_INTERVAL,
+)
+from .aggregates import ClusterAggregator
+from .anomaly import AnomalyDetector
+from .backups import BackupIndex
+from .collector import NodeDetailCollector
+from .evacuation import Migration, MigrationBatch
+from .filters import ExclusionFilter
+from .forecast import StorageForecaster
+from .placement import recommend
+from .snapshots import SnapshotCache
+from .guest_agent import GuestAgentCache
+from .health import (
+    running_kernel,
+    summarize_ceph,
+    summarize_disks,
+    summarize_ha,
+    summarize_replication,
+    summarize_smart,
+    summarize_updates,
+    summarize_zfs,
+    update_replication_lag,
+    uses_ceph,
+)
+from .statistics import GuestStatistics
 
 class ProxmoxCoordinator(DataUpdateCoordinator):
     """Class to manage fetching Proxmox VE data."""
 
-    def __init__(self, hass: HomeAssistant, client: ProxmoxClient) -> None:
+    def __init__(self, hass: HomeAssistant, client: ProxmoxClient, entry: ConfigEntry) -> None:
         """Initialize."""
         super().__init__(
             hass=hass,
@@ -24,56 +77,664 @@ class ProxmoxCoordinator(DataUpdateCoordinator):
             update_interval=timedelta(seconds=SCAN_INTERVAL_FAST),
         )
         self.client = client
+        self.entry = entry
+        self.guest_agent = GuestAgentCache(client)
+        self.aggregator = ClusterAggregator()
+        self.anomaly_detector = AnomalyDetector()
+        self.forecaster = StorageForecaster()
+        self.backups = BackupIndex(hass, client, entry.entry_id)
+        self.snapshots = SnapshotCache(client)
+        self._guest_keys = PROFILE_GUEST_ENTITIES[entry.options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE)]
+        self._forecasts: dict[str, dict[str, Any]] = {}
+        self._placement: dict[str, Any] | None = None
+        # HA, replication and Ceph summaries, refreshed on the slow tier
+        self._health: dict[str, Any] = {}
+        # Disk health and package updates, collected per node on a jittered schedule outside the refresh
+        self.node_details = NodeDetailCollector()
+        self.node_details.register("disks", DISK_HEALTH_INTERVAL, self._async_fetch_disk_health)
+        self.node_details.register("updates", UPDATES_INTERVAL, self._async_fetch_updates)
+        self._collecting = False
         self.data: dict[str, Any] = {
             "nodes": {},
             "vms": {},
             "lxcs": {},
             "storage": {},
         }
+        # Unfiltered result of the last crawl, which followers build their own view from
+        self.raw_data: dict[str, Any] = self.data
+        # True while self.data comes from the persisted snapshot rather than a live refresh
+        self.stale = False
+        # Entries that target the same cluster share the first one's client and poll loop
+        self.cluster_id: str | None = None
+        self.leader: ProxmoxCoordinator | None = None
+        self.followers: list[ProxmoxCoordinator] = []
+        self._unsub_leader: Callable[[], None] | None = None
+        # Set once this entry has data that followers can build on
+        self.ready = asyncio.Event()
+        # Output of _async_derive and the crawl it was derived from
+        self._derived: dict[str, Any] = {}
+        self._derived_from: dict[str, Any] | None = None
+        # Node name -> time.time() of the first failed cycle
+        self._unreachable_since: dict[str, float] = {}
+        # Exclusions are applied at fetch time so excluded resources never reach self.data,
+        # except those another entry sharing the poll loop still needs
+        self.node_filter = ExclusionFilter(entry.options.get(CONF_NODE_EXCLUDE))
+        self.vm_filter = ExclusionFilter(entry.options.get(CONF_VM_EXCLUDE))
+        self.lxc_filter = ExclusionFilter(entry.options.get(CONF_LXC_EXCLUDE))
+        self._pool_members: dict[str, set[int]] = {}
+        self.statistics: GuestStatistics | None = None
+        if entry.options.get(CONF_ENTITY_PROFILE) == PROFILE_STATISTICS:
+            self.statistics = GuestStatistics(hass)
+        # The latest batch of migrations started by a service call
+        self.migration: MigrationBatch | None = None
+        self._last_slow_update = 0.0
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.snapshot"
+        )
+
+    async def async_load_snapshot(self) -> bool:
+        """Load the last good snapshot into self.data. Returns True if one was found."""
+        try:
+            snapshot = await self._store.async_load()
+        except Exception as err:
+            LOGGER.warning("Could not load saved Proxmox VE snapshot: %s", err)
+            return False
+        if not snapshot or not snapshot.get("nodes"):
+            return False
+
+        self.cluster_id = snapshot.pop("cluster_id", None)
+        # JSON turns integer vmid keys into strings
+        for key in ("vms", "lxcs"):
+            snapshot[key] = {int(vm_id): guest for vm_id, guest in snapshot.get(key, {}).items()}
+        # Shared storage used to be keyed cluster_<storage> for every cluster
+        snapshot["storage"] = {
+            f"{self.cluster_scope}_{store['storage']}" if store.get("shared") else store_id: store
+            for store_id, store in snapshot.get("storage", {}).items()
+        }
+
+        # The exclusions may have changed since the snapshot was saved
+        self.raw_data = snapshot
+        self.data = self._view(snapshot, self._pool_members)
+        self.stale = True
+        LOGGER.debug("Restored Proxmox VE snapshot with %s guests", len(snapshot["vms"]) + len(snapshot["lxcs"]))
+        return True
+
+    def _view(self, data: dict[str, Any], pool_members: dict[str, set[int]]) -> dict[str, Any]:
+        """Return data narrowed to this entry's exclusions."""
+        # Nodes are copied since each entry annotates them with its own allocation
+        nodes = {
+            name: {**node} for name, node in data["nodes"].items()
+            if not self.node_filter.matches_node(name)
+        }
+        view = {**data, "nodes": nodes}
+        for key, guest_filter in (("vms", self.vm_filter), ("lxcs", self.lxc_filter)):
+            view[key] = {
+                vm_id: guest for vm_id, guest in data[key].items()
+                if guest.get("node") in nodes
+                and not guest_filter.matches_guest(guest, pool_members)
+            }
+        view["storage"] = {
+            store_id: store for store_id, store in data["storage"].items()
+            if store.get("shared") or store.get("node") in nodes
+        }
+        return view
+
+    def _crawl_filters(self) -> tuple[ExclusionFilter, ExclusionFilter, ExclusionFilter]:
+        """Return the node, VM and LXC exclusions to apply while crawling.
+
+        These are this entry's own exclusions, unless a follower excludes
+        something different, in which case nothing is excluded at crawl time
+        and every entry narrows the result to its own view.
+        """
+        own = (self.entry.options.get(CONF_NODE_EXCLUDE), self.entry.options.get(CONF_VM_EXCLUDE),
+               self.entry.options.get(CONF_LXC_EXCLUDE))
+        for follower in self.followers:
+            options = follower.entry.options
+            if (options.get(CONF_NODE_EXCLUDE), options.get(CONF_VM_EXCLUDE), options.get(CONF_LXC_EXCLUDE)) != own:
+                return ExclusionFilter(None), ExclusionFilter(None), ExclusionFilter(None)
+        return self.node_filter, self.vm_filter, self.lxc_filter
+
+    @callback
+    def _async_derive(self, view: dict[str, Any]) -> None:
+        """Add the totals, backup coverage and anomalies of this entry's own view.
+
+        These only cover the guests this entry includes, so they are derived
+        per entry rather than from a crawl shared with other entries.
+        """
+        # Cluster totals, per-node allocation and top-N guests in one pass
+        derived = self.aggregator.update(view)
+        derived["without_backup"] = self.backups.without_recent_backup(view, BACKUP_MAX_AGE)
+
+        # Guests whose CPU or memory departs from their own baseline
+        started, ended = self.anomaly_detector.update(view)
+        derived["anomalies"] = list(self.anomaly_detector.active.values())
+        for details in started:
+            self.hass.bus.async_fire(EVENT_ANOMALY, {**details, "state": "start"})
+        for details in ended:
+            self.hass.bus.async_fire(EVENT_ANOMALY, {**details, "state": "end"})
+
+        self._derived = derived
+        view["cluster"] = {**view.get("cluster", {}), **derived}
+
+    @callback
+    def async_follow(self, leader: ProxmoxCoordinator) -> None:
+        """Take data from another entry's poll loop instead of polling."""
+        # The client of this entry was only needed to identify the cluster
+        self.client.shutdown()
+        self.client = leader.client
+        self.snapshots = leader.snapshots
+        self.backups = leader.backups
+        self.leader = leader
+        self.update_interval = None
+        leader.followers.append(self)
+        self._unsub_leader = leader.async_add_listener(self._async_handle_leader_update)
+        self._async_handle_leader_update()
+
+    def _profiles_use(self, keys: set[str]) -> bool:
+        """Return True if this entry or one following it creates any of the guest entities."""
+        return any(keys & coordinator._guest_keys for coordinator in (self, *self.followers))
+
+    @callback
+    def async_unfollow(self) -> None:
+        """Stop taking data from the leader."""
+        if self.leader is None:
+            return
+        if self._unsub_leader is not None:
+            self._unsub_leader()
+            self._unsub_leader = None
+        self.leader.followers.remove(self)
+        self.leader = None
+
+    @callback
+    def _async_handle_leader_update(self) -> None:
+        """Rebuild this entry's view from the leader's latest crawl."""
+        leader = self.leader
+        if leader is None:
+            return
+        self.stale = leader.stale
+        if not leader.last_update_success:
+            self.last_update_success = False
+            self.async_update_listeners()
+            return
+        view = self._view(leader.raw_data, leader._pool_members)
+        if leader.stale:
+            self.async_set_updated_data(view)
+            return
+        if leader.raw_data is self._derived_from:
+            # Progress or node details of a crawl already seen, do not count its samples twice
+            view["cluster"] = {**view.get("cluster", {}), **self._derived}
+            self.async_set_updated_data(view)
+            return
+        self._derived_from = leader.raw_data
+        self._async_derive(view)
+        if self.statistics is not None:
+            self.statistics.async_add_samples(view)
+        self.async_set_updated_data(view)
+        if view["nodes"]:
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+    @property
+    def cluster_scope(self) -> str:
+        """Return the ID that keeps this cluster's devices apart from other clusters'."""
+        return self.cluster_id or self.entry.entry_id
+
+    @property
+    def unreachable_grace_period(self) -> int:
+        """Seconds an unreachable node's guests keep their last known state."""
+        return self.entry.options.get(CONF_UNREACHABLE_GRACE_PERIOD, DEFAULT_UNREACHABLE_GRACE_PERIOD)
+
+    def is_resource_available(self, data: dict[str, Any] | None) -> bool:
+        """Return False once stale data is older than the grace period."""
+        if not data:
+            return False
+        stale_since = data.get("stale_since")
+        if stale_since is None:
+            return True
+        return time.time() - stale_since <= self.unreachable_grace_period
+
+    def _apply_node_failures(self, new_data: dict[str, Any], failed: list[tuple[str, str]]) -> None:
+        """Keep last known data for nodes that could not be queried this cycle."""
+        now = time.time()
+        failed_nodes = {node_name for node_name, _ in failed}
+
+        for node_name in set(self._unreachable_since) - failed_nodes:
+            LOGGER.info("Proxmox VE node %s is reachable again", node_name)
+            self._unreachable_since.pop(node_name)
+
+        for node_name, key in failed:
+            if node_name not in self._unreachable_since:
+                LOGGER.warning("Proxmox VE node %s is unreachable, keeping last known data", node_name)
+            since = self._unreachable_since.setdefault(node_name, now)
+            new_data["nodes"][node_name]["unreachable_since"] = since
+            for item_id, item in self.raw_data.get(key, {}).items():
+                # A guest that already showed up elsewhere has migrated; fresh data wins
+                if item.get("node") == node_name and item_id not in new_data[key]:
+                    new_data[key][item_id] = {**item, "stale_since": item.get("stale_since", since)}
+
+    def _guest_key(self, vm_type: str) -> str:
+        """Return the data key holding guests of a type."""
+        return "vms" if vm_type == "qemu" else "lxcs"
+
+    def _async_guest_moved(self, vm_type: str, vm_id: int, guest: dict[str, Any], old_node: str | None) -> None:
+        """Relink a migrated guest's device to its new node and announce the move."""
+        registry = dr.async_get(self.hass)
+        device = registry.async_get_device(identifiers={(DOMAIN, str(vm_id))})
+        node_device = registry.async_get_device(identifiers={(DOMAIN, guest["node"])})
+        if device is not None and node_device is not None and device.via_device_id != node_device.id:
+            registry.async_update_device(device.id, via_device_id=node_device.id)
+        LOGGER.info("Proxmox VE %s %s moved from %s to %s", vm_type, vm_id, old_node, guest["node"])
+        self.hass.bus.async_fire(EVENT_GUEST_MIGRATED, {
+            "vmid": vm_id,
+            "type": vm_type,
+            "name": guest.get("name", str(vm_id)),
+            "from_node": old_node,
+            "to_node": guest["node"],
+        })
+
+    def _detect_migrations(self, new_data: dict[str, Any]) -> None:
+        """Compare guest nodes with the previous refresh."""
+        for vm_type in ("qemu", "lxc"):
+            key = self._guest_key(vm_type)
+            previous = self.raw_data.get(key, {})
+            for vm_id, guest in new_data[key].items():
+                old_node = previous.get(vm_id, {}).get("node")
+                if old_node is not None and old_node != guest["node"]:
+                    self._async_guest_moved(vm_type, vm_id, guest, old_node)
+
+    async def async_locate_guest(self, vm_type: str, vm_id: int) -> str | None:
+        """Return the node a guest currently runs on, with a single cluster-wide call."""
+        try:
+            resources = await self.client.async_call(self.client.get_cluster_resources, priority=True)
+        except TimeoutError:
+            return None
+        for resource in resources or []:
+            if resource.get("vmid") == vm_id and resource.get("type") == vm_type:
+                return resource.get("node")
+        return None
+
+    async def async_guest_action(
+        self, method: Callable[..., Any], vm_type: str, vm_id: int, **kwargs: Any
+    ) -> Any:
+        """Run a guest action, following the guest if it has migrated since the last refresh.
+
+        Returns the method's result, which is falsy if the action failed.
+        """
+        guest = self.data[self._guest_key(vm_type)].get(vm_id)
+        if not guest:
+            return None
+        node = guest.get("node")
+        if result := await self.client.async_call(method, node, vm_id, vm_type, priority=True, **kwargs):
+            return result
+
+        # The action may have gone to the node the guest just left
+        current = await self.async_locate_guest(vm_type, vm_id)
+        if current is None or current == node:
+            return result
+        guest["node"] = current
+        self._async_guest_moved(vm_type, vm_id, guest, node)
+        return await self.client.async_call(method, current, vm_id, vm_type, priority=True, **kwargs)
+
+    async def async_snapshot_task(
+        self, method: Callable[..., str | None], vm_type: str, vm_id: int, **kwargs: Any
+    ) -> str | None:
+        """Run a snapshot task on a guest and wait for it. Returns None on success, else the error."""
+        upid = await self.async_guest_action(method, vm_type, vm_id, **kwargs)
+        if not upid:
+            return "task could not be started"
+        # UPID:{node}:{pid}:...
+        error = await self.client.async_wait_task(upid.split(":")[1], upid, SNAPSHOT_TASK_TIMEOUT)
+
+        # The snapshot list only changes through tasks, so this is when it is refreshed
+        guest = self.data[self._guest_key(vm_type)].get(vm_id)
+        if guest is not None:
+            await self.snapshots.async_refresh_guest(vm_type, vm_id, guest["node"])
+            guest["snapshots"] = self.snapshots.summary(vm_type, vm_id)
+            self.async_update_listeners()
+        return error
+
+    def async_start_migrations(self, reason: str, migrations: list[Migration], max_parallel: int) -> None:
+        """Run a batch of migrations in the background."""
+        if self.migration is not None and self.migration.running:
+            raise HomeAssistantError("A Proxmox VE migration batch is already running")
+        self.migration = MigrationBatch(self, reason, migrations, max_parallel, self._async_migration_progress)
+        self._async_migration_progress()
+        self.entry.async_create_background_task(
+            self.hass, self.migration.async_run(), f"{DOMAIN}_migrations"
+        )
+
+    @callback
+    def _async_migration_progress(self) -> None:
+        """Publish migration progress without waiting for the next refresh."""
+        if "cluster" in self.data and self.migration is not None:
+            # Followers rebuild their view from raw_data on the update below
+            for data in (self.raw_data, self.data):
+                data.setdefault("cluster", {})["migration"] = self.migration.as_dict()
+            self.async_update_listeners()
+
+    def _slow_tier_due(self) -> bool:
+        """Return True if resources that rarely change should be refreshed this cycle."""
+        return time.monotonic() - self._last_slow_update >= SCAN_INTERVAL_SLOW
+
+    async def _async_within_budget(self, phase: str, deadline: float, coro: Awaitable[None]) -> None:
+        """Run a refresh phase until the refresh budget is spent, keeping what it finished."""
+        try:
+            async with asyncio.timeout(max(deadline - time.monotonic(), 0)):
+                await coro
+        except TimeoutError:
+            LOGGER.debug("Refresh budget spent during the %s update", phase)
+
+    async def _async_update_pool_members(self) -> None:
+        """Refresh membership of the pools used in exclusion filters."""
+        pools = set()
+        for coordinator in (self, *self.followers):
+            pools |= coordinator.vm_filter.pools | coordinator.lxc_filter.pools
+        for pool in pools:
+            try:
+                members = await self.client.async_call(self.client.get_pool_members, pool)
+            except TimeoutError:
+                members = None
+            if members is not None:
+                self._pool_members[pool] = {
+                    int(member["vmid"]) for member in members if "vmid" in member
+                }
+
+    async def _async_update_forecasts(self, storage: dict[str, Any], deadline: float) -> None:
+        """Extend storage usage history and refit the time-to-full forecasts."""
+        now = time.time()
+        for store_id, store in storage.items():
+            if "stale_since" in store or not store.get("total"):
+                continue
+            if self.forecaster.needs_seed(store_id):
+                # Seeding can wait for a later cycle if the refresh budget is spent
+                if time.monotonic() >= deadline:
+                    continue
+                try:
+                    rrd = await self.client.async_call(
+                        self.client.get_storage_rrddata, store["node"], store["storage"],
+                        timeout=min(API_CALL_TIMEOUT, deadline - time.monotonic()),
+                    )
+                except TimeoutError:
+                    continue
+                self.forecaster.seed(store_id, rrd or [])
+            self.forecaster.add_sample(store_id, now, store.get("used", 0))
+            forecast = self.forecaster.forecast(store_id, store.get("used", 0), store["total"])
+            if forecast is None:
+                self._forecasts.pop(store_id, None)
+            else:
+                self._forecasts[store_id] = forecast
+        self.forecaster.prune(set(storage))
+
+    async def _async_slow_call(self, method: Any, *args: Any) -> Any:
+        """Call a slow-tier method, treating a timeout as no answer."""
+        try:
+            return await self.client.async_call(method, *args)
+        except TimeoutError:
+            return None
+
+    async def _async_update_health(self, new_data: dict[str, Any]) -> None:
+        """Refresh the HA, replication and Ceph summaries."""
+        ha_status, jobs = await asyncio.gather(
+            self._async_slow_call(self.client.get_ha_status),
+            self._async_slow_call(self.client.get_replication_jobs),
+        )
+        if ha_status is not None:
+            self._health["ha"] = summarize_ha(ha_status)
+
+        if jobs is not None:
+            statuses: list[dict[str, Any]] = []
+            if jobs:
+                # Each node only reports the jobs it replicates from
+                for node_status in await asyncio.gather(*(
+                    self._async_slow_call(self.client.get_replication_status, node_name)
+                    for node_name, node in new_data["nodes"].items()
+                    if node.get("status") == "online" and "unreachable_since" not in node
+                )):
+                    statuses.extend(node_status or [])
+            self._health["replication"] = summarize_replication(jobs, statuses)
+
+        if uses_ceph(new_data["storage"]) or "ceph" in self._health:
+            ceph_status = await self._async_slow_call(self.client.get_ceph_status)
+            if ceph_status is not None:
+                self._health["ceph"] = summarize_ceph(ceph_status)
+
+    async def _async_fetch_disk_health(self, node_name: str) -> dict[str, Any] | None:
+        """Fetch the disks, their SMART results and the ZFS pools of a node."""
+        disks, pools = await asyncio.gather(
+            self._async_slow_call(self.client.get_disks, node_name),
+            self._async_slow_call(self.client.get_zfs_pools, node_name),
+        )
+        if disks is None:
+            return None
+        devpaths = [disk["devpath"] for disk in disks if disk.get("devpath")]
+        smart = {}
+        for devpath, result in zip(devpaths, await asyncio.gather(*(
+            self._async_slow_call(self.client.get_disk_smart, node_name, devpath)
+            for devpath in devpaths
+        ))):
+            if result is not None:
+                smart[devpath] = summarize_smart(result)
+        return {
+            "disk_health": summarize_disks(disks, smart),
+            # Nodes without ZFS may not answer the pool listing at all
+            "zfs": summarize_zfs(pools or []),
+        }
+
+    async def _async_fetch_updates(self, node_name: str) -> dict[str, Any] | None:
+        """Fetch the pending package updates and the kernels of a node."""
+        updates, versions, status = await asyncio.gather(
+            self._async_slow_call(self.client.get_apt_updates, node_name),
+            self._async_slow_call(self.client.get_apt_versions, node_name),
+            self._async_slow_call(self.client.get_node_status, node_name),
+        )
+        if updates is None:
+            return None
+        return {
+            "updates": summarize_updates(updates, versions or [], running_kernel(status or {})),
+        }
+
+    def _apply_node_details(self, nodes: dict[str, Any]) -> None:
+        """Merge the collected node details into node data."""
+        for node_name, node in nodes.items():
+            for details in self.node_details.results.get(node_name, {}).values():
+                node.update(details)
+
+    async def async_collect_node_details(self, now: datetime | None = None) -> None:
+        """Run the node detail collections that are due and publish any change."""
+        if self._collecting or not self.client.connected:
+            return
+        self._collecting = True
+        try:
+            nodes = [
+                node_name for node_name, node in self.raw_data["nodes"].items()
+                if node.get("status") == "online" and "unreachable_since" not in node
+            ]
+            if await self.node_details.async_collect(nodes):
+                # Views share the node dicts of the crawl, so this reaches followers too
+                self._apply_node_details(self.raw_data["nodes"])
+                self.async_update_listeners()
+        finally:
+            self._collecting = False
+
+    async def _async_node_call(self, method: Any, node_name: str) -> list[dict[str, Any]] | None:
+        """Call a per-node list method, treating a timeout as a failed node."""
+        try:
+            return await self.client.async_call(method, node_name)
+        except TimeoutError:
+            LOGGER.warning("Timed out calling %s on node %s", method.__name__, node_name)
+            return None
+
+    async def _async_fetch_node(self, node_name: str) -> tuple[list | None, list | None, list | None]:
+        """Fetch VMs, LXCs and storage of one node."""
+        return await asyncio.gather(
+            self._async_node_call(self.client.get_vms, node_name),
+            self._async_node_call(self.client.get_lxcs, node_name),
+            self._async_node_call(self.client.get_storage, node_name),
+        )
+
+    def _snapshot(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {**self.data, "cluster_id": self.cluster_id}
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Update data via library."""
+        if self.leader is not None:
+            # Polling happens in the leader, a refresh request here is passed on to it
+            await self.leader.async_refresh()
+            if not self.leader.last_update_success:
+                raise UpdateFailed("Shared Proxmox VE poll failed")
+            # The leader's update already rebuilt this entry's view
+            return self.data
+
         try:
-            # We run the API calls in the executor
+            # Everything below shares one budget; nodes that overrun it keep their last data
+            deadline = time.monotonic() + REFRESH_BUDGET
+
+            # Startup from a snapshot defers the connection to the first refresh
+            if not self.client.connected:
+                if not await self.client.async_call(self.client.connect):
+                    raise UpdateFailed("Could not connect to Proxmox VE")
+
+            # We run the API calls in the PetalPVE executor
             # Fetch nodes first
-            nodes = await self.hass.async_add_executor_job(self.client.get_nodes)
+            nodes = await self.client.async_call(self.client.get_nodes)
+            if not nodes:
+                # Keep the previous data rather than dropping every entity
+                raise UpdateFailed("No nodes returned by Proxmox VE")
             
+            slow_tier = self._slow_tier_due()
+            if slow_tier:
+                await self._async_within_budget("pool", deadline, self._async_update_pool_members())
+
             new_data = {
                 "nodes": {},
                 "vms": {},
                 "lxcs": {},
                 "storage": {},
             }
-            
+            # (node, data key) pairs that failed this cycle and keep their previous data
+            failed: list[tuple[str, str]] = []
+
+            node_filter, vm_filter, lxc_filter = self._crawl_filters()
             for node in nodes:
-                node_name = node["node"]
-                new_data["nodes"][node_name] = node
-                
+                if not node_filter.matches_node(node["node"]):
+                    new_data["nodes"][node["node"]] = node
+
+            # Crawl online nodes concurrently, the client's bounded pool caps parallel calls
+            tasks = {
+                node_name: self.hass.async_create_task(self._async_fetch_node(node_name))
+                for node_name, node in new_data["nodes"].items()
+                if node.get("status") == "online"
+            }
+            if tasks:
+                _, pending = await asyncio.wait(
+                    tasks.values(), timeout=max(deadline - time.monotonic(), 0)
+                )
+                for task in pending:
+                    task.cancel()
+            
+            for node_name, node in new_data["nodes"].items():
                 # Enrich node data with status if needed, but get_nodes returns basic stats
                 # Maybe fetch detailed node status?
-                # node_status = await self.hass.async_add_executor_job(self.client.get_node_status, node_name)
+                # node_status = await self.client.async_call(self.client.get_node_status, node_name)
+
+                task = tasks.get(node_name)
+                if task is None or task.cancelled() or not task.done():
+                    # Calls to an offline node only time out
+                    if task is not None:
+                        LOGGER.warning("Refresh budget spent before node %s answered", node_name)
+                    failed.extend((node_name, key) for key in ("vms", "lxcs", "storage"))
+                    continue
+                vms, lxcs, storage = task.result()
                 
-                # Fetch VMs
-                vms = await self.hass.async_add_executor_job(self.client.get_vms, node_name)
-                for vm in vms:
+                # VMs
+                if vms is None:
+                    failed.append((node_name, "vms"))
+                for vm in vms or []:
+                    if vm_filter.matches_guest(vm, self._pool_members):
+                        continue
                     vm["node"] = node_name
                     new_data["vms"][vm["vmid"]] = vm
                     
-                # Fetch LXCs
-                lxcs = await self.hass.async_add_executor_job(self.client.get_lxcs, node_name)
-                for lxc in lxcs:
+                # LXCs
+                if lxcs is None:
+                    failed.append((node_name, "lxcs"))
+                for lxc in lxcs or []:
+                    if lxc_filter.matches_guest(lxc, self._pool_members):
+                        continue
                     lxc["node"] = node_name
                     new_data["lxcs"][lxc["vmid"]] = lxc
 
-                # Fetch Storage
-                storage = await self.hass.async_add_executor_job(self.client.get_storage, node_name)
-                for store in storage:
-                     # Unique storage ID: node_id + storage_id
-                    store_id = f"{node_name}_{store['storage']}"
+                # Storage
+                if storage is None:
+                    failed.append((node_name, "storage"))
+                for store in storage or []:
+                    if store.get("shared"):
+                        # Shared storage (NFS, Ceph, PBS, ...) is reported by every node.
+                        # Keep a single cluster-level copy, preferring a node where it is active.
+                        store_id = f"{self.cluster_scope}_{store['storage']}"
+                        existing = new_data["storage"].get(store_id)
+                        if existing and (existing.get("active") or not store.get("active")):
+                            continue
+                    else:
+                        # Unique storage ID: node_id + storage_id
+                        store_id = f"{node_name}_{store['storage']}"
                     store["node"] = node_name
                     new_data["storage"][store_id] = store
 
-            return new_data
+            self._apply_node_failures(new_data, failed)
+            self._apply_node_details(new_data["nodes"])
+            self._detect_migrations(new_data)
+
+            # Guest IPs and filesystems, served from a per-guest TTL cache
+            if self._profiles_use(GUEST_AGENT_ENTITIES):
+                await self.guest_agent.async_refresh(new_data["vms"], new_data["lxcs"], deadline)
+
+            # Snapshot lists are fetched once per guest, then only after snapshot tasks
+            if self._profiles_use({"snapshots"}):
+                await self.snapshots.async_update(new_data["vms"], new_data["lxcs"], deadline)
+                for vm_type in ("qemu", "lxc"):
+                    for vm_id, guest in new_data[self._guest_key(vm_type)].items():
+                        guest["snapshots"] = self.snapshots.summary(vm_type, vm_id)
+
+            # Backup storages are listed on their own slow schedule and diffed into the index
+            await self.backups.async_update(new_data["storage"], deadline)
+            for key in ("vms", "lxcs"):
+                for vm_id, guest in new_data[key].items():
+                    guest["last_backup"] = self.backups.newest(vm_id)
+
+            # Cluster-wide state every entry sharing this poll loop sees alike
+            new_data["cluster"] = {"api": self.client.rate_limiter.stats()}
+            if self.migration is not None:
+                new_data["cluster"]["migration"] = self.migration.as_dict()
+
+            if slow_tier:
+                await self._async_update_forecasts(new_data["storage"], deadline)
+                self._placement = recommend(new_data)
+                await self._async_within_budget("health", deadline, self._async_update_health(new_data))
+                self._last_slow_update = time.monotonic()
+            if self._placement is not None:
+                new_data["cluster"]["placement"] = self._placement
+            if "replication" in self._health:
+                update_replication_lag(self._health["replication"])
+            new_data["cluster"].update(self._health)
+
+            # Forecasts only change on the slow tier, fast cycles reuse them
+            for store_id, store in new_data["storage"].items():
+                if store_id in self._forecasts:
+                    store["forecast"] = self._forecasts[store_id]
+
+            self.raw_data = new_data
+            view = self._view(new_data, self._pool_members) if self.followers else new_data
+            self._async_derive(view)
+            if self.statistics is not None:
+                self.statistics.async_add_samples(view)
+
+            self.stale = False
+            if new_data["nodes"]:
+                self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+            return view
 
+        except UpdateFailed:
+            raise
         except Exception as err:
             raise UpdateFailed(f"Error communicating with API: {err}") from err
@@ -0,0 +1,231 @@
+"""Node evacuation and batched live migrations for Proxmox VE."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from .const import LOGGER, MIGRATION_TIMEOUT
+
+if TYPE_CHECKING:
+    from .coordinator import ProxmoxCoordinator
+
+MIGRATION_QUEUED = "queued"
+MIGRATION_RUNNING = "migrating"
+MIGRATION_DONE = "done"
+MIGRATION_FAILED = "failed"
+MIGRATION_NO_TARGET = "no_target"
+
+
+@dataclass
+class Migration:
+    """One guest move and its progress."""
+
+    vm_type: str
+    vmid: int
+    name: str
+    source: str
+    target: str | None
+    # Live migration for a running VM, restart migration for a running container
+    online: bool = False
+    state: str = MIGRATION_QUEUED
+    upid: str | None = None
+    error: str | None = None
+
+
+def _headroom(node: dict[str, Any]) -> dict[str, float]:
+    """Return free memory (bytes) and idle CPU (cores) of a node."""
+    maxcpu = node.get("maxcpu", 0)
+    return {
+        "mem": node.get("maxmem", 0) - node.get("mem", 0),
+        "maxmem": node.get("maxmem", 0),
+        "cpu": maxcpu - node.get("cpu", 0) * maxcpu,
+        "maxcpu": maxcpu,
+    }
+
+
+def choose_target(
+    guest: dict[str, Any], candidates: dict[str, dict[str, float]]
+) -> str | None:
+    """Pick the candidate with the most headroom left after taking the guest.
+
+    Headroom is the smaller of the free memory and idle CPU fractions, so a
+    node that is short on either resource ranks low. A running guest needs
+    its full memory allocation on the target; a stopped guest needs none.
+    Candidates are updated in place so later guests see the reservation.
+    """
+    running = guest.get("status") == "running"
+    mem = guest.get("maxmem", 0) if running else 0
+    cpu = guest.get("cpu", 0) * guest.get("cpus", 0) if running else 0
+    best = None
+    best_score = None
+    for name, room in candidates.items():
+        if room["mem"] < mem:
+            continue
+        mem_left = (room["mem"] - mem) / room["maxmem"] if room["maxmem"] else 0
+        cpu_left = (room["cpu"] - cpu) / room["maxcpu"] if room["maxcpu"] else 0
+        score = min(mem_left, cpu_left)
+        if best_score is None or score > best_score:
+            best, best_score = name, score
+    if best is not None:
+        candidates[best]["mem"] -= mem
+        candidates[best]["cpu"] -= cpu
+    return best
+
+
+def guests_from_resources(resources: list[dict[str, Any]]) -> dict[str, dict[int, dict[str, Any]]]:
+    """Return cluster/resources guests keyed like coordinator data, ignoring exclusions."""
+    guests: dict[str, dict[int, dict[str, Any]]] = {"vms": {}, "lxcs": {}}
+    for resource in resources:
+        key = {"qemu": "vms", "lxc": "lxcs"}.get(resource.get("type"))
+        if key is None or resource.get("vmid") is None:
+            continue
+        # The cluster listing calls the guest's core count maxcpu
+        guests[key][int(resource["vmid"])] = {**resource, "cpus": resource.get("maxcpu", 0)}
+    return guests
+
+
+def plan_evacuation(
+    data: dict[str, Any], source: str, targets: list[str] | None = None
+) -> list[Migration]:
+    """Plan a target node for every guest on source, largest guests first.
+
+    data must list every guest on the source, not just those an entry
+    includes, or excluded guests would be left behind on a node that looks
+    empty.
+    """
+    candidates = {
+        name: _headroom(node)
+        for name, node in data["nodes"].items()
+        if name != source
+        and node.get("status") == "online"
+        and "unreachable_since" not in node
+        and (not targets or name in targets)
+    }
+    guests = [
+        (vm_type, vm_id, guest)
+        for vm_type, key in (("qemu", "vms"), ("lxc", "lxcs"))
+        for vm_id, guest in data[key].items()
+        if guest.get("node") == source and not guest.get("template")
+    ]
+    # First fit decreasing: the big guests are the hard ones to place
+    guests.sort(
+        key=lambda item: (item[2].get("status") == "running", item[2].get("maxmem", 0)),
+        reverse=True,
+    )
+
+    migrations = []
+    for vm_type, vm_id, guest in guests:
+        target = choose_target(guest, candidates)
+        migrations.append(Migration(
+            vm_type=vm_type,
+            vmid=vm_id,
+            name=guest.get("name", str(vm_id)),
+            source=source,
+            target=target,
+            online=guest.get("status") == "running",
+            state=MIGRATION_QUEUED if target else MIGRATION_NO_TARGET,
+        ))
+    return migrations
+
+
+class MigrationBatch:
+    """Run a set of migrations concurrently and track each through its task UPID."""
+
+    def __init__(
+        self,
+        coordinator: ProxmoxCoordinator,
+        reason: str,
+        migrations: list[Migration],
+        max_parallel: int,
+        on_progress: Callable[[], None],
+    ) -> None:
+        """Initialize."""
+        self._coordinator = coordinator
+        self._client = coordinator.client
+        self.reason = reason
+        self.migrations = migrations
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self._on_progress = on_progress
+        self.started = time.time()
+        self.finished: float | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return True until every migration has finished."""
+        return self.finished is None
+
+    @property
+    def state(self) -> str:
+        """Return the overall state of the batch."""
+        if self.running:
+            return "running"
+        if any(migration.state != MIGRATION_DONE for migration in self.migrations):
+            return "incomplete"
+        return "completed"
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return progress for sensor attributes."""
+        counts: dict[str, int] = {}
+        for migration in self.migrations:
+            counts[migration.state] = counts.get(migration.state, 0) + 1
+        return {
+            "state": self.state,
+            "reason": self.reason,
+            "started": self.started,
+            "finished": self.finished,
+            "counts": counts,
+            "migrations": [asdict(migration) for migration in self.migrations],
+        }
+
+    def _set_state(self, migration: Migration, state: str, error: str | None = None) -> None:
+        """Update a migration and notify listeners."""
+        migration.state = state
+        migration.error = error
+        self._on_progress()
+
+    async def async_run(self) -> None:
+        """Run every queued migration, at most max_parallel at a time."""
+        try:
+            await asyncio.gather(*(
+                self._async_migrate(migration)
+                for migration in self.migrations
+                if migration.state == MIGRATION_QUEUED
+            ))
+        finally:
+            self.finished = time.time()
+            self._on_progress()
+            await self._coordinator.async_request_refresh()
+
+    async def _async_migrate(self, migration: Migration) -> None:
+        """Start one migration and wait for its task to finish."""
+        async with self._semaphore:
+            try:
+                upid = await self._client.async_call(
+                    self._client.migrate_vm,
+                    migration.source,
+                    migration.vmid,
+                    migration.vm_type,
+                    migration.target,
+                    migration.online,
+                    priority=True,
+                )
+            except TimeoutError:
+                upid = None
+            if not upid:
+                self._set_state(migration, MIGRATION_FAILED, "migration could not be started")
+                return
+
+            migration.upid = upid
+            self._set_state(migration, MIGRATION_RUNNING)
+            LOGGER.info(
+                "Migrating %s %s from %s to %s", migration.vm_type, migration.vmid,
+                migration.source, migration.target,
+            )
+            error = await self._client.async_wait_task(migration.source, upid, MIGRATION_TIMEOUT)
+            if error is None:
+                self._set_state(migration, MIGRATION_DONE)
+            else:
+                LOGGER.warning("Migration of %s %s failed: %s", migration.vm_type, migration.vmid, error)
+                self._set_state(migration, MIGRATION_FAILED, error)
@@ -0,0 +1,73 @@
+"""Exclusion filters for Proxmox VE nodes and guests."""
+from __future__ import annotations
+
+from fnmatch import fnmatchcase
+import re
+from typing import Any
+
+_ID_RE = re.compile(r"^\d+$")
+_RANGE_RE = re.compile(r"^(\d+)\s*-\s*(\d+)$")
+
+
+class ExclusionFilter:
+    """Match nodes or guests against a comma-separated exclusion spec.
+
+    Supported tokens:
+        100            exact vmid
+        9000-9999      inclusive vmid range
+        ci-*           name glob
+        tag:ci         guest tag
+        pool:scratch   guest pool membership
+    """
+
+    def __init__(self, spec: str | None) -> None:
+        """Parse the spec. Raises ValueError for an invalid range."""
+        self.ids: set[int] = set()
+        self.ranges: list[tuple[int, int]] = []
+        self.globs: list[str] = []
+        self.tags: set[str] = set()
+        self.pools: set[str] = set()
+
+        for token in (spec or "").split(","):
+            token = token.strip()
+            if not token:
+                continue
+            if token.startswith("tag:"):
+                self.tags.add(token[4:].strip().lower())
+            elif token.startswith("pool:"):
+                self.pools.add(token[5:].strip())
+            elif _ID_RE.match(token):
+                self.ids.add(int(token))
+            elif match := _RANGE_RE.match(token):
+                low, high = int(match.group(1)), int(match.group(2))
+                if low > high:
+                    raise ValueError(f"Invalid id range: {token}")
+                self.ranges.append((low, high))
+            else:
+                self.globs.append(token.lower())
+
+    def __bool__(self) -> bool:
+        """Return True if the filter excludes anything."""
+        return bool(self.ids or self.ranges or self.globs or self.tags or self.pools)
+
+    def matches_node(self, node_name: str) -> bool:
+        """Return True if the node is excluded. Nodes match by name or glob."""
+        name = node_name.lower()
+        return any(fnmatchcase(name, pattern) for pattern in self.globs)
+
+    def matches_guest(self, guest: dict[str, Any], pool_members: dict[str, set[int]]) -> bool:
+        """Return True if the guest is excluded."""
+        vm_id = int(guest["vmid"])
+        if vm_id in self.ids:
+            return True
+        if any(low <= vm_id <= high for low, high in self.ranges):
+            return True
+        name = str(guest.get("name", "")).lower()
+        if any(fnmatchcase(name, pattern) for pattern in self.globs):
+            return True
+        if self.tags:
+            # Tags are ';' separated, older releases used ',' or spaces
+            tags = set(re.split(r"[;,\s]+", str(guest.get("tags") or "").lower()))
+            if self.tags & tags:
+                return True
+        return any(vm_id in pool_members.get(pool, ()) for pool in self.pools)
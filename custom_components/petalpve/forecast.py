@@ -0,0 +1,79 @@
+"""Storage time-to-full forecasting for Proxmox VE."""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+from .const import FORECAST_MAX_SAMPLES, FORECAST_MIN_SAMPLES, FORECAST_MIN_SPAN
+
+SECONDS_PER_DAY = 86400
+
+
+def linear_trend(samples: list[tuple[float, float]]) -> float | None:
+    """Return the least squares slope (units per second) of (time, value) samples."""
+    count = len(samples)
+    if count < 2:
+        return None
+    mean_t = sum(t for t, _ in samples) / count
+    mean_v = sum(v for _, v in samples) / count
+    var_t = sum((t - mean_t) ** 2 for t, _ in samples)
+    if var_t == 0:
+        return None
+    return sum((t - mean_t) * (v - mean_v) for t, v in samples) / var_t
+
+
+class StorageForecaster:
+    """Keep a bounded usage history per storage and fit a growth trend.
+
+    History is seeded from the storage RRD data the first time a storage is
+    seen, then extended with one sample per slow-tier cycle.
+    """
+
+    def __init__(self, max_samples: int = FORECAST_MAX_SAMPLES) -> None:
+        """Initialize."""
+        self._max_samples = max_samples
+        self._history: dict[str, deque[tuple[float, float]]] = {}
+
+    def needs_seed(self, store_id: str) -> bool:
+        """Return True if there is no history for the storage yet."""
+        return store_id not in self._history
+
+    def seed(self, store_id: str, rrd: list[dict[str, Any]]) -> None:
+        """Seed history from rrddata rows ({"time": ..., "used": ...})."""
+        history = self._history.setdefault(store_id, deque(maxlen=self._max_samples))
+        for row in sorted(rrd, key=lambda row: row.get("time", 0)):
+            if row.get("time") is not None and row.get("used") is not None:
+                history.append((float(row["time"]), float(row["used"])))
+
+    def add_sample(self, store_id: str, timestamp: float, used: float) -> None:
+        """Append a usage sample."""
+        history = self._history.setdefault(store_id, deque(maxlen=self._max_samples))
+        if history and timestamp <= history[-1][0]:
+            return
+        history.append((timestamp, used))
+
+    def prune(self, store_ids: set[str]) -> None:
+        """Forget storages that no longer exist."""
+        for store_id in set(self._history) - store_ids:
+            self._history.pop(store_id)
+
+    def forecast(self, store_id: str, used: float, total: float) -> dict[str, Any] | None:
+        """Return growth rate (bytes/day) and days until full, or None without enough history."""
+        history = self._history.get(store_id)
+        if not history or len(history) < FORECAST_MIN_SAMPLES:
+            return None
+        if history[-1][0] - history[0][0] < FORECAST_MIN_SPAN:
+            return None
+        slope = linear_trend(list(history))
+        if slope is None:
+            return None
+
+        growth_per_day = slope * SECONDS_PER_DAY
+        days_until_full = None
+        if growth_per_day > 0 and total > used:
+            days_until_full = round((total - used) / growth_per_day, 1)
+        return {
+            "growth_rate": growth_per_day,
+            "days_until_full": days_until_full,
+            "samples": len(history),
+        }
@@ -0,0 +1,223 @@
+"""Guest agent and container interface data for Proxmox VE."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import ipaddress
+import time
+from typing import Any
+
+from .api import ProxmoxClient
+from .const import GUEST_AGENT_NEGATIVE_TTL, GUEST_AGENT_TTL, SCAN_INTERVAL_SLOW
+
+
+@dataclass
+class _CacheEntry:
+    """A cached per-guest result. data is None for a negative entry."""
+
+    expires: float
+    data: dict[str, Any] | None
+
+
+def agent_enabled(config: dict[str, Any] | None) -> bool:
+    """Return True if a QEMU config has the guest agent enabled.
+
+    The option is either a bare flag ("1") or a property string
+    such as "enabled=1,fstrim_cloned_disks=1".
+    """
+    if not config:
+        return False
+    value = str(config.get("agent", "0"))
+    for part in value.split(","):
+        if "=" in part:
+            key, _, flag = part.partition("=")
+            if key.strip() == "enabled":
+                return flag.strip() == "1"
+        elif part.strip():
+            return part.strip() == "1"
+    return False
+
+
+def _usable_address(address: str) -> bool:
+    """Filter out loopback and link-local addresses."""
+    try:
+        ip = ipaddress.ip_address(address.split("/")[0])
+    except ValueError:
+        return False
+    return not (ip.is_loopback or ip.is_link_local)
+
+
+def parse_qemu_interfaces(interfaces: list[dict[str, Any]]) -> dict[str, list[str]]:
+    """Map interface name to addresses from network-get-interfaces."""
+    result: dict[str, list[str]] = {}
+    for iface in interfaces:
+        name = iface.get("name", "")
+        if name == "lo":
+            continue
+        addresses = [
+            addr["ip-address"]
+            for addr in iface.get("ip-addresses", []) or []
+            if addr.get("ip-address") and _usable_address(addr["ip-address"])
+        ]
+        if addresses:
+            result[name] = addresses
+    return result
+
+
+def parse_lxc_interfaces(interfaces: list[dict[str, Any]]) -> dict[str, list[str]]:
+    """Map interface name to addresses from /lxc/{vmid}/interfaces."""
+    result: dict[str, list[str]] = {}
+    for iface in interfaces:
+        name = iface.get("name", "")
+        if name == "lo":
+            continue
+        addresses = []
+        for field in ("inet", "inet6"):
+            for addr in str(iface.get(field) or "").split():
+                addr = addr.split("/")[0]
+                if _usable_address(addr):
+                    addresses.append(addr)
+        if addresses:
+            result[name] = addresses
+    return result
+
+
+def parse_fsinfo(filesystems: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Reduce get-fsinfo output to one entry per mountpoint with sizes."""
+    seen: set[str] = set()
+    result = []
+    for fs in filesystems:
+        mountpoint = fs.get("mountpoint")
+        if not mountpoint or mountpoint in seen or "total-bytes" not in fs:
+            continue
+        seen.add(mountpoint)
+        result.append({
+            "mountpoint": mountpoint,
+            "type": fs.get("type"),
+            "used": fs.get("used-bytes", 0),
+            "total": fs.get("total-bytes", 0),
+        })
+    return result
+
+
+def _build_info(interfaces: dict[str, list[str]], filesystems: list[dict[str, Any]] | None) -> dict[str, Any]:
+    """Build the guest_info dict stored alongside the guest data."""
+    addresses = [addr for addrs in interfaces.values() for addr in addrs]
+    # Prefer IPv4 for the primary address
+    addresses.sort(key=lambda addr: ":" in addr)
+    info: dict[str, Any] = {
+        "interfaces": interfaces,
+        "ip_addresses": addresses,
+    }
+    if filesystems is not None:
+        info["filesystems"] = filesystems
+        info["fs_used"] = sum(fs["used"] for fs in filesystems)
+        info["fs_total"] = sum(fs["total"] for fs in filesystems)
+    return info
+
+
+class GuestAgentCache:
+    """Per-guest TTL cache of guest agent and container interface data.
+
+    Only running guests are queried, and QEMU guests only when the agent
+    is enabled in their config. Guests whose agent does not answer are
+    negatively cached so a dead agent does not cost a timeout every cycle.
+    """
+
+    def __init__(self, client: ProxmoxClient) -> None:
+        """Initialize."""
+        self._client = client
+        self._entries: dict[tuple[str, int], _CacheEntry] = {}
+        self._agent_config: dict[tuple[str, int], _CacheEntry] = {}
+
+    async def async_refresh(self, vms: dict[int, Any], lxcs: dict[int, Any], deadline: float) -> None:
+        """Attach cached or freshly fetched guest_info to running guests.
+
+        Expired entries are fetched concurrently until the refresh deadline,
+        so a few unresponsive agents cannot hold up the others. A fetch the
+        deadline cuts short leaves the guest's previous entry in place.
+        """
+        now = time.monotonic()
+        running: dict[tuple[str, int], dict[str, Any]] = {}
+        for vm_type, guests in (("qemu", vms), ("lxc", lxcs)):
+            for vm_id, guest in guests.items():
+                # Skip stopped guests and guests carried over from an unreachable node
+                if guest.get("status") == "running" and "stale_since" not in guest:
+                    running[(vm_type, vm_id)] = guest
+
+        due = [
+            key for key in running
+            if key not in self._entries or self._entries[key].expires <= now
+        ]
+        remaining = deadline - time.monotonic()
+        if due and remaining > 0:
+            # The client's bounded pool caps how many run at once
+            tasks = {
+                asyncio.ensure_future(self._async_fetch(vm_type, vm_id, running[(vm_type, vm_id)]["node"], now)):
+                (vm_type, vm_id)
+                for vm_type, vm_id in due
+            }
+            done, pending = await asyncio.wait(tasks, timeout=remaining)
+            for task in pending:
+                task.cancel()
+            for task in done:
+                self._entries[tasks[task]] = task.result()
+
+        for key, guest in running.items():
+            entry = self._entries.get(key)
+            if entry is not None and entry.data is not None:
+                guest["guest_info"] = entry.data
+
+        # Forget guests that stopped or disappeared
+        for key in set(self._entries) - set(running):
+            self._entries.pop(key)
+        for key in set(self._agent_config) - set(running):
+            self._agent_config.pop(key)
+
+    async def _async_call(self, method: Any, *args: Any) -> Any:
+        """Call the client, treating a timeout like an agent that did not answer."""
+        try:
+            return await self._client.async_call(method, *args)
+        except TimeoutError:
+            return None
+
+    async def _async_fetch(self, vm_type: str, vm_id: int, node: str, now: float) -> _CacheEntry:
+        """Fetch guest info for one guest."""
+        if vm_type == "lxc":
+            interfaces = await self._async_call(
+                self._client.get_lxc_interfaces, node, vm_id
+            )
+            if interfaces is None:
+                return _CacheEntry(now + GUEST_AGENT_NEGATIVE_TTL, None)
+            return _CacheEntry(now + GUEST_AGENT_TTL, _build_info(parse_lxc_interfaces(interfaces), None))
+
+        if not await self._async_agent_enabled(vm_id, node, now):
+            return _CacheEntry(now + SCAN_INTERVAL_SLOW, None)
+
+        interfaces = await self._async_call(
+            self._client.get_vm_agent_interfaces, node, vm_id
+        )
+        if interfaces is None:
+            return _CacheEntry(now + GUEST_AGENT_NEGATIVE_TTL, None)
+        fsinfo = await self._async_call(
+            self._client.get_vm_agent_fsinfo, node, vm_id
+        )
+        return _CacheEntry(
+            now + GUEST_AGENT_TTL,
+            _build_info(
+                parse_qemu_interfaces(interfaces),
+                parse_fsinfo(fsinfo) if fsinfo is not None else None,
+            ),
+        )
+
+    async def _async_agent_enabled(self, vm_id: int, node: str, now: float) -> bool:
+        """Return whether the VM has the agent enabled, caching the config lookup."""
+        key = ("qemu", vm_id)
+        entry = self._agent_config.get(key)
+        if entry is None or entry.expires <= now:
+            config = await self._async_call(
+                self._client.get_vm_config, node, vm_id, "qemu"
+            )
+            entry = _CacheEntry(now + SCAN_INTERVAL_SLOW, {"enabled": agent_enabled(config)})
+            self._agent_config[key] = entry
+        return bool(entry.data and entry.data["enabled"])
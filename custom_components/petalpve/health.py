@@ -0,0 +1,241 @@
+"""HA, replication and Ceph health summaries for Proxmox VE."""
+from __future__ import annotations
+
+import re
+import time
+from typing import Any
+
+# HA service states that need attention
+HA_PROBLEM_STATES = {"error", "fence", "recovery", "freeze"}
+
+CEPH_STORAGE_TYPES = {"rbd", "cephfs"}
+
+# SMART health, worst first
+DISK_HEALTH_ORDER = ["FAILED", "UNKNOWN", "PASSED"]
+
+# ZFS pool states, worst first
+ZFS_HEALTH_ORDER = ["FAULTED", "UNAVAIL", "REMOVED", "OFFLINE", "DEGRADED", "ONLINE"]
+
+# Kernel packages: pve-kernel-6.2.16-3-pve, proxmox-kernel-6.8.12-4-pve-signed
+KERNEL_PACKAGE = re.compile(r"^(?:pve|proxmox)-kernel-(\d+\.\d+\.\d+-\d+-pve)(?:-signed)?$")
+
+# ATA attributes that count failing sectors
+SMART_SECTOR_ATTRIBUTES = {
+    "5": "reallocated_sectors",
+    "197": "pending_sectors",
+    "198": "uncorrectable_sectors",
+}
+
+
+def summarize_ha(status: list[dict[str, Any]]) -> dict[str, Any]:
+    """Summarize /cluster/ha/status/current."""
+    quorum = next((entry for entry in status if entry.get("type") == "quorum"), {})
+    master = next((entry for entry in status if entry.get("type") == "master"), None)
+    services = [entry for entry in status if entry.get("type") == "service"]
+    problems = [
+        {"sid": entry.get("sid"), "node": entry.get("node"), "state": entry.get("state")}
+        for entry in services
+        if entry.get("state") in HA_PROBLEM_STATES
+    ]
+    dead_lrms = [
+        entry.get("node") for entry in status
+        if entry.get("type") == "lrm" and entry.get("status", "").startswith("old timestamp")
+    ]
+
+    if master is None and not services:
+        state = "not_configured"
+    elif quorum.get("status") != "OK" or problems or dead_lrms:
+        state = "degraded"
+    else:
+        state = "ok"
+    return {
+        "state": state,
+        "quorum": quorum.get("status"),
+        "manager": master.get("node") if master else None,
+        "services": len(services),
+        "problems": problems,
+        "dead_lrms": dead_lrms,
+    }
+
+
+def summarize_replication(
+    jobs: list[dict[str, Any]], statuses: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """Merge /cluster/replication with the per-node replication status, keyed by job ID."""
+    by_id = {status["id"]: status for status in statuses if "id" in status}
+    result: dict[str, dict[str, Any]] = {}
+    for job in jobs:
+        job_id = job.get("id")
+        if job_id is None:
+            continue
+        status = by_id.get(job_id, {})
+        last_sync = status.get("last_sync") or None
+        result[job_id] = {
+            "guest": job.get("guest"),
+            "target": job.get("target"),
+            "schedule": job.get("schedule", "*/15"),
+            "disabled": bool(job.get("disable")),
+            "last_sync": last_sync,
+            "lag": None,
+            "duration": status.get("duration"),
+            "fail_count": status.get("fail_count", 0),
+            "error": status.get("error"),
+        }
+
+    replication = {
+        "jobs": result,
+        "max_lag": None,
+        "failing": sorted(job_id for job_id, job in result.items() if job["fail_count"] or job["error"]),
+    }
+    update_replication_lag(replication)
+    return replication
+
+
+def update_replication_lag(replication: dict[str, Any]) -> None:
+    """Recompute lag from the last sync times, so it keeps growing between slow-tier fetches."""
+    now = time.time()
+    lags = []
+    for job in replication["jobs"].values():
+        job["lag"] = round(now - job["last_sync"]) if job["last_sync"] else None
+        if job["lag"] is not None and not job["disabled"]:
+            lags.append(job["lag"])
+    replication["max_lag"] = max(lags) if lags else None
+
+
+def summarize_ceph(status: dict[str, Any]) -> dict[str, Any]:
+    """Summarize /cluster/ceph/status."""
+    health = status.get("health", {})
+    osdmap = status.get("osdmap", {})
+    # Older releases nest the counters one level deeper
+    osdmap = osdmap.get("osdmap", osdmap)
+    pgmap = status.get("pgmap", {})
+    return {
+        "health": health.get("status"),
+        "checks": {
+            name: {
+                "severity": check.get("severity"),
+                "message": check.get("summary", {}).get("message"),
+            }
+            for name, check in health.get("checks", {}).items()
+        },
+        "osds": osdmap.get("num_osds"),
+        "osds_up": osdmap.get("num_up_osds"),
+        "osds_in": osdmap.get("num_in_osds"),
+        "bytes_used": pgmap.get("bytes_used"),
+        "bytes_total": pgmap.get("bytes_total"),
+        "degraded_ratio": pgmap.get("degraded_ratio"),
+    }
+
+
+def uses_ceph(storage: dict[str, Any]) -> bool:
+    """Return True if any storage is backed by Ceph."""
+    return any(store.get("type") in CEPH_STORAGE_TYPES for store in storage.values())
+
+
+def _worst(states: list[str], order: list[str]) -> str | None:
+    """Return the worst state, unlisted states ranking just above the best."""
+    if not states:
+        return None
+    return min(states, key=lambda state: order.index(state) if state in order else len(order) - 1.5)
+
+
+def summarize_smart(smart: dict[str, Any]) -> dict[str, Any]:
+    """Summarize /nodes/{node}/disks/smart for one disk."""
+    summary: dict[str, Any] = {"health": smart.get("health")}
+    for attribute in smart.get("attributes", []):
+        name = SMART_SECTOR_ATTRIBUTES.get(str(attribute.get("id", "")).strip())
+        if name is None:
+            continue
+        raw = str(attribute.get("raw", "")).split()
+        if raw and raw[0].isdigit():
+            summary[name] = int(raw[0])
+    return summary
+
+
+def summarize_disks(disks: list[dict[str, Any]], smart: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Summarize /nodes/{node}/disks/list together with per-disk SMART results."""
+    result = {}
+    for disk in disks:
+        devpath = disk.get("devpath")
+        if not devpath:
+            continue
+        wearout = disk.get("wearout")
+        health = smart.get(devpath, {}).get("health") or disk.get("health") or "UNKNOWN"
+        result[devpath] = {
+            **smart.get(devpath, {}),
+            "model": disk.get("model"),
+            "type": disk.get("type"),
+            "health": "PASSED" if health == "OK" else health,
+            # Percent of rated life used, N/A for disks that do not report it
+            "wearout": wearout if isinstance(wearout, (int, float)) else None,
+        }
+    wearouts = [disk["wearout"] for disk in result.values() if disk["wearout"] is not None]
+    return {
+        "health": _worst([disk["health"] for disk in result.values()], DISK_HEALTH_ORDER),
+        "max_wearout": max(wearouts) if wearouts else None,
+        "disks": result,
+    }
+
+
+def summarize_zfs(pools: list[dict[str, Any]]) -> dict[str, Any]:
+    """Summarize /nodes/{node}/disks/zfs."""
+    result = {
+        pool["name"]: {
+            "health": pool.get("health"),
+            "size": pool.get("size"),
+            "alloc": pool.get("alloc"),
+            "frag": pool.get("frag"),
+        }
+        for pool in pools
+        if "name" in pool
+    }
+    return {
+        "health": _worst([pool["health"] for pool in result.values() if pool["health"]], ZFS_HEALTH_ORDER),
+        "pools": result,
+    }
+
+
+def _is_security_update(package: dict[str, Any]) -> bool:
+    """Return True if an update comes from a security repository."""
+    return any("security" in str(package.get(field, "")).lower() for field in ("Origin", "Label", "Section"))
+
+
+def _kernel_version(release: str) -> tuple[int, ...]:
+    """Return a sortable version for a kernel release such as 6.8.12-4-pve."""
+    return tuple(int(part) for part in re.findall(r"\d+", release))
+
+
+def running_kernel(status: dict[str, Any]) -> str | None:
+    """Return the running kernel release from /nodes/{node}/status."""
+    release = status.get("current-kernel", {}).get("release")
+    if release:
+        return release
+    # Older releases only report "Linux 6.2.16-3-pve #1 SMP ..."
+    kversion = status.get("kversion", "").split()
+    return kversion[1] if len(kversion) > 1 else None
+
+
+def summarize_updates(
+    updates: list[dict[str, Any]], versions: list[dict[str, Any]], running: str | None
+) -> dict[str, Any]:
+    """Summarize pending updates and installed kernels of a node."""
+    security = [package for package in updates if _is_security_update(package)]
+    kernels = [
+        match.group(1)
+        for package in versions
+        if package.get("CurrentState", "Installed") == "Installed"
+        and (match := KERNEL_PACKAGE.match(package.get("Package", "")))
+    ]
+    installed = max(kernels, key=_kernel_version) if kernels else None
+    return {
+        "pending": len(updates),
+        "security": len(security),
+        "packages": sorted(
+            f"{package.get('Package')} {package.get('OldVersion', '?')} -> {package.get('Version', '?')}"
+            for package in updates
+        ),
+        "security_packages": sorted(package.get("Package") for package in security),
+        "running_kernel": running,
+        "installed_kernel": installed,
+        "reboot_required": bool(running and installed and running != installed),
+    }
@@ -0,0 +1,146 @@
+"""Load balancing recommendations for Proxmox VE guests."""
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from .const import REBALANCE_MAX_MOVES, REBALANCE_MIN_GAIN
+
+
+def _imbalance(loads: dict[str, float]) -> float:
+    """Return the standard deviation of node loads."""
+    if len(loads) < 2:
+        return 0.0
+    mean = sum(loads.values()) / len(loads)
+    return math.sqrt(sum((load - mean) ** 2 for load in loads.values()) / len(loads))
+
+
+class PlacementModel:
+    """Node capacities and usage that can be shifted guest by guest.
+
+    A node's load is the larger of its memory and CPU utilisation, since
+    whichever runs out first is what throttles its guests.
+    """
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        """Build the model from coordinator data."""
+        self.nodes: dict[str, dict[str, float]] = {}
+        for name, node in data["nodes"].items():
+            if node.get("status") != "online" or "unreachable_since" in node:
+                continue
+            if not node.get("maxmem") or not node.get("maxcpu"):
+                continue
+            self.nodes[name] = {
+                "mem": node.get("mem", 0),
+                "maxmem": node["maxmem"],
+                "cpu": node.get("cpu", 0) * node["maxcpu"],
+                "maxcpu": node["maxcpu"],
+            }
+
+        # Only running VMs change load when moved, and only VMs move without downtime
+        self.guests: dict[int, dict[str, Any]] = {}
+        for vm_id, guest in data["vms"].items():
+            if guest.get("status") != "running" or "stale_since" in guest or guest.get("template"):
+                continue
+            if guest.get("node") not in self.nodes or guest.get("lock"):
+                continue
+            self.guests[vm_id] = {
+                "name": guest.get("name", str(vm_id)),
+                "node": guest["node"],
+                "mem": guest.get("mem", 0),
+                "maxmem": guest.get("maxmem", 0),
+                "cpu": guest.get("cpu", 0) * guest.get("cpus", 0),
+            }
+
+    def load(self, name: str, mem_delta: float = 0, cpu_delta: float = 0) -> float:
+        """Return a node's load after adding the deltas."""
+        node = self.nodes[name]
+        return max(
+            (node["mem"] + mem_delta) / node["maxmem"],
+            (node["cpu"] + cpu_delta) / node["maxcpu"],
+        )
+
+    def loads(self) -> dict[str, float]:
+        """Return the load of every node."""
+        return {name: self.load(name) for name in self.nodes}
+
+    def fits(self, guest: dict[str, Any], target: str) -> bool:
+        """Return True if the target can hold the guest's full memory allocation."""
+        node = self.nodes[target]
+        return node["maxmem"] - node["mem"] >= guest["maxmem"]
+
+    def move(self, vm_id: int, target: str) -> None:
+        """Apply a migration to the model."""
+        guest = self.guests[vm_id]
+        source = self.nodes[guest["node"]]
+        source["mem"] -= guest["mem"]
+        source["cpu"] -= guest["cpu"]
+        self.nodes[target]["mem"] += guest["mem"]
+        self.nodes[target]["cpu"] += guest["cpu"]
+        guest["node"] = target
+
+
+def recommend(
+    data: dict[str, Any],
+    max_moves: int = REBALANCE_MAX_MOVES,
+    min_gain: float = REBALANCE_MIN_GAIN,
+) -> dict[str, Any]:
+    """Return the current imbalance and greedy migrations that reduce it.
+
+    Each round scores every (guest, target) pair by the imbalance it would
+    leave behind and keeps the best one, until no move gains min_gain. Only
+    the source and target loads change per pair, so a round is
+    O(guests * nodes) rather than a full recomputation per pair.
+    """
+    model = PlacementModel(data)
+    loads = model.loads()
+    initial_loads = loads
+    imbalance = _imbalance(loads)
+    current = imbalance
+    moves: list[dict[str, Any]] = []
+    moved: set[int] = set()
+
+    while len(moves) < max_moves and len(loads) > 1:
+        count = len(loads)
+        total = sum(loads.values())
+        squares = sum(load * load for load in loads.values())
+        best = None
+        for vm_id, guest in model.guests.items():
+            if vm_id in moved:
+                continue
+            source = guest["node"]
+            source_load = model.load(source, -guest["mem"], -guest["cpu"])
+            for target in loads:
+                if target == source or not model.fits(guest, target):
+                    continue
+                target_load = model.load(target, guest["mem"], guest["cpu"])
+                new_total = total - loads[source] - loads[target] + source_load + target_load
+                new_squares = (
+                    squares - loads[source] ** 2 - loads[target] ** 2
+                    + source_load ** 2 + target_load ** 2
+                )
+                variance = max(new_squares / count - (new_total / count) ** 2, 0)
+                score = math.sqrt(variance)
+                if best is None or score < best[0]:
+                    best = (score, vm_id, target)
+
+        if best is None or current - best[0] < min_gain:
+            break
+        score, vm_id, target = best
+        moves.append({
+            "vmid": vm_id,
+            "name": model.guests[vm_id]["name"],
+            "source": model.guests[vm_id]["node"],
+            "target": target,
+        })
+        model.move(vm_id, target)
+        moved.add(vm_id)
+        loads = model.loads()
+        current = score
+
+    return {
+        "imbalance": round(imbalance, 3),
+        "projected_imbalance": round(current, 3),
+        "node_loads": {name: round(load, 3) for name, load in initial_loads.items()},
+        "recommendations": moves,
+    }
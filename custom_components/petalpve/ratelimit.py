@@ -0,0 +1,78 @@
+"""Global API request budget for Proxmox VE."""
+from __future__ import annotations
+
+from collections import deque
+import threading
+import time
+from typing import Any
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no token became available in time."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every PetalPVE API caller.
+
+    Priority callers (user-initiated actions) may use every token, while
+    background callers leave a small reserve untouched so an action never
+    queues behind a full polling cycle.
+    """
+
+    def __init__(self, rate: float, burst: int, priority_reserve: int) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._reserve = min(priority_reserve, max(burst - 1, 0))
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        self._recent: deque[float] = deque()
+        self._throttled = 0
+
+    def _refill(self, now: float) -> None:
+        """Add tokens for the time since the last refill."""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: bool = False, timeout: float | None = None) -> None:
+        """Take one token, waiting up to timeout seconds for it."""
+        needed = 1 if priority else 1 + self._reserve
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            waited = False
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= needed:
+                    self._tokens -= 1
+                    self._recent.append(now)
+                    while self._recent[0] < now - 60:
+                        self._recent.popleft()
+                    if waited:
+                        self._throttled += 1
+                    # A priority caller may have been waiting on the same tokens
+                    self._condition.notify_all()
+                    return
+                wait = (needed - self._tokens) / self.rate
+                if deadline is not None:
+                    if now >= deadline:
+                        raise RateLimitExceeded("PetalPVE API request budget exhausted")
+                    wait = min(wait, deadline - now)
+                waited = True
+                self._condition.wait(wait)
+
+    def stats(self) -> dict[str, Any]:
+        """Return current usage for the diagnostic sensor."""
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            while self._recent and self._recent[0] < now - 60:
+                self._recent.popleft()
+            return {
+                "requests_per_minute": len(self._recent),
+                "tokens_available": round(self._tokens, 1),
+                "rate": self.rate,
+                "burst": self.burst,
+                "throttled": self._throttled,
+            }
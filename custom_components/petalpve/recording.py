@@ -0,0 +1,90 @@
+"""Capture of Proxmox VE API traffic for offline profiling."""
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+import time
+from typing import Any
+
+from .const import RECORDING_FLUSH_EVERY, RECORDING_VERSION, REDACTED, SECRET_KEYS
+
+
+def redact(value: Any) -> Any:
+    """Return a copy of value with the values of secret-looking keys replaced."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if any(secret in str(key).lower() for secret in SECRET_KEYS) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def request_key(method: str, path: str, params: dict[str, Any]) -> str:
+    """Return the key a request is matched on when replaying."""
+    return json.dumps([method, path, redact(params)], sort_keys=True, default=str)
+
+
+class TrafficRecorder:
+    """Write every API request and response to a gzipped JSON lines file.
+
+    The first line is a header, then one line per request with its offset
+    from the start of the capture, its duration and either the response or
+    the error message. Secrets are redacted before anything is written.
+    Records are written as they happen and flushed every
+    RECORDING_FLUSH_EVERY requests, so a capture can run for hours.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open the capture file. Blocking."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._start = time.monotonic()
+        self._pending = 0
+        self.count = 0
+        self._write({"version": RECORDING_VERSION, "started": time.time()})
+
+    def _write(self, record: dict[str, Any]) -> None:
+        """Append one line."""
+        self._file.write(json.dumps(record, separators=(",", ":"), default=str))
+        self._file.write("\n")
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any],
+        started: float,
+        result: Any = None,
+        error: Exception | None = None,
+    ) -> None:
+        """Append a finished request, started at the given time.monotonic()."""
+        record: dict[str, Any] = {
+            "t": round(started - self._start, 4),
+            "method": method,
+            "path": path,
+            "params": redact(params),
+            "duration": round(time.monotonic() - started, 4),
+        }
+        if error is not None:
+            record["error"] = str(error)
+        else:
+            record["result"] = redact(result)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write(record)
+            self.count += 1
+            self._pending += 1
+            if self._pending >= RECORDING_FLUSH_EVERY:
+                self._file.flush()
+                self._pending = 0
+
+    def close(self) -> None:
+        """Finish the capture."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
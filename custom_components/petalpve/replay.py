@@ -0,0 +1,190 @@
+"""Replay of captured Proxmox VE API traffic.
+
+A capture is recorded by turning on the "record_traffic" option, which
+writes <config>/petalpve_<entry_id>_<time>.jsonl.gz. Replaying it runs the
+coordinator against the capture instead of a cluster:
+
+    PETALPVE_REPLAY_FILE=/path/to/capture.jsonl.gz PETALPVE_REPLAY_CYCLES=20 \
+        pytest tests/test_replay.py -k benchmark -s
+
+The harness sets up an entry with the "replay_file" data key, refreshes it
+back to back through async_benchmark and prints the refresh durations next
+to the pacing of the captured cycles. PETALPVE_REPLAY_REALTIME=0 answers
+without the recorded latency, which profiles the integration alone.
+"""
+from __future__ import annotations
+
+from collections import deque
+import gzip
+import json
+import threading
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .api import ProxmoxClient
+from .const import LOGGER, RECORDING_VERSION, REPLAY_CYCLE_GAP
+from .recording import request_key
+
+
+class ReplayError(Exception):
+    """A request that was not captured, or failed when it was."""
+
+
+class ReplayProxmox:
+    """Stand-in for proxmoxer's ProxmoxAPI that answers from a capture.
+
+    Each request is answered with the responses captured for the same
+    method, path and parameters, in capture order. The last one is repeated
+    once they run out, so a replay can run longer than the capture. In
+    realtime mode every answer takes as long as it took on the real cluster.
+    """
+
+    def __init__(self, path: str, realtime: bool = True) -> None:
+        """Load the capture. Blocking."""
+        self.realtime = realtime
+        self._lock = threading.Lock()
+        self._responses: dict[str, deque[dict[str, Any]]] = {}
+        # (offset, duration) of every captured request, for pacing statistics
+        self._timeline: list[tuple[float, float]] = []
+        self.served = 0
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != RECORDING_VERSION:
+                raise ReplayError(f"Unsupported capture version {header.get('version')}")
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = request_key(record["method"], record["path"], record["params"])
+                self._responses.setdefault(key, deque()).append(record)
+                self._timeline.append((record["t"], record["duration"]))
+        self._timeline.sort()
+        LOGGER.debug("Loaded %s distinct requests from %s", len(self._responses), path)
+
+    def pacing(self) -> dict[str, Any]:
+        """Return how the captured requests were paced, from their recorded offsets.
+
+        Requests separated by less than REPLAY_CYCLE_GAP belong to the same
+        refresh cycle, so the cycle durations compare with async_benchmark's.
+        """
+        if not self._timeline:
+            return {"requests": 0}
+        cycles: list[float] = []
+        cycle_start = cycle_end = self._timeline[0][0]
+        for start, duration in self._timeline:
+            if start - cycle_end >= REPLAY_CYCLE_GAP:
+                cycles.append(cycle_end - cycle_start)
+                cycle_start = start
+            cycle_end = max(cycle_end, start + duration)
+        cycles.append(cycle_end - cycle_start)
+
+        # Most requests started within one second
+        peak = first = 0
+        for last, (start, _) in enumerate(self._timeline):
+            while start - self._timeline[first][0] >= 1:
+                first += 1
+            peak = max(peak, last - first + 1)
+
+        span = cycle_end - self._timeline[0][0]
+        return {
+            "requests": len(self._timeline),
+            "span": span,
+            "rate": len(self._timeline) / span if span else 0.0,
+            "peak_rate": peak,
+            "cycles": _summary(cycles),
+        }
+
+    def __call__(self, path: str) -> _ReplayResource:
+        """Return the resource at path, like ProxmoxAPI(path)."""
+        return _ReplayResource(self, path)
+
+    def respond(self, method: str, path: str, params: dict[str, Any]) -> Any:
+        """Return the next captured response to a request."""
+        with self._lock:
+            responses = self._responses.get(request_key(method, path, params))
+            if not responses:
+                raise ReplayError(f"No captured response to {method.upper()} {path}")
+            record = responses.popleft() if len(responses) > 1 else responses[0]
+            self.served += 1
+        if self.realtime:
+            # Runs in the client's worker pool, like the request it stands in for
+            time.sleep(record["duration"])
+        if "error" in record:
+            raise ReplayError(record["error"])
+        return record["result"]
+
+
+class _ReplayResource:
+    """One API path of a ReplayProxmox."""
+
+    def __init__(self, api: ReplayProxmox, path: str) -> None:
+        """Initialize."""
+        self._api = api
+        self._path = path
+
+    def get(self, **params: Any) -> Any:
+        """GET from the capture."""
+        return self._api.respond("get", self._path, params)
+
+    def post(self, **data: Any) -> Any:
+        """POST to the capture."""
+        return self._api.respond("post", self._path, data)
+
+    def delete(self, **params: Any) -> Any:
+        """DELETE in the capture."""
+        return self._api.respond("delete", self._path, params)
+
+
+class ReplayClient(ProxmoxClient):
+    """ProxmoxClient that serves a capture instead of a cluster.
+
+    Everything above the transport, including the response cache and the
+    rate limiter, runs as it does against a live cluster, so the
+    coordinator and the platforms can be profiled on a repeatable workload.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str, realtime: bool = True, **kwargs: Any) -> None:
+        """Initialize."""
+        super().__init__(hass, "replay", "replay", "", 0, "pam", False, **kwargs)
+        self._path = path
+        self._realtime = realtime
+
+    def _create_api(self) -> ReplayProxmox:
+        """Load the capture in place of logging in."""
+        return ReplayProxmox(self._path, self._realtime)
+
+
+def _summary(durations: list[float]) -> dict[str, float]:
+    """Return the count, spread and total of a list of durations."""
+    durations = sorted(durations)
+    return {
+        "count": len(durations),
+        "min": durations[0],
+        "median": durations[len(durations) // 2],
+        "max": durations[-1],
+        "total": sum(durations),
+    }
+
+
+async def async_benchmark(coordinator: Any, cycles: int) -> dict[str, Any]:
+    """Refresh a coordinator back to back and return refresh durations in seconds.
+
+    Against a ReplayClient the result also holds the request rate of the
+    replay and the pacing of the capture it replays.
+    """
+    durations = []
+    for _ in range(cycles):
+        started = time.monotonic()
+        await coordinator.async_refresh()
+        durations.append(time.monotonic() - started)
+
+    result: dict[str, Any] = {"refreshes": _summary(durations)}
+    api = coordinator.client._proxmox
+    if isinstance(api, ReplayProxmox):
+        total = result["refreshes"]["total"]
+        result["requests"] = api.served
+        result["rate"] = api.served / total if total else 0.0
+        result["captured"] = api.pacing()
+    return result
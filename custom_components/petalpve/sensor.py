@@ -9,16 +9,27 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE, UnitOfInformation, UnitOfTime
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
 from datetime import timedelta
+import time
 
-from .const import DOMAIN
+from .const import (
+    CONF_ENTITY_PROFILE,
+    CONF_STATE_HEARTBEAT,
+    DEFAULT_ENTITY_PROFILE,
+    DEFAULT_STATE_HEARTBEAT,
+    DOMAIN,
+    GUEST_ENTITIES_DISABLED_BY_DEFAULT,
+    MIN_STATE_WRITE_INTERVAL,
+    PROFILE_GUEST_ENTITIES,
+    SENSOR_DEADBANDS,
+)
 from .coordinator import ProxmoxCoordinator
 
 async def async_setup_entry(
@@ -30,6 +41,7 @@ async def async_setup_entry(
     coordinator: ProxmoxCoordinator = hass.data[DOMAIN][entry.entry_id]
 
     entities: list[ProxmoxSensor] = []
+    guest_keys = PROFILE_GUEST_ENTITIES[entry.options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE)]
 
     # Node Sensors
     for node_name, node_data in coordinator.data["nodes"].items():
@@ -57,7 +69,169 @@ async def async_setup_entry(
             None, SensorDeviceClass.TIMESTAMP, None,
             lambda x: dt_util.now() - timedelta(seconds=x.get("uptime", 0)) if x and x.get("uptime", 0) > 0 else None
         ))
+        # Memory allocated to running guests
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "memory_allocated", "Memory Allocated",
+            UnitOfInformation.GIGABYTES, SensorDeviceClass.DATA_SIZE, SensorStateClass.MEASUREMENT,
+            lambda x: round(x.get("allocated_mem", 0) / 1073741824, 2) if x else 0
+        ))
+        # Allocated vs physical memory
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "memory_overcommit", "Memory Overcommit",
+            None, None, SensorStateClass.MEASUREMENT,
+            lambda x: x.get("mem_overcommit") if x else None
+        ))
+        # Disk and ZFS health, collected daily
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "disk_health", "Disk Health",
+            None, None, None,
+            lambda x: x["disk_health"]["health"] if x and x.get("disk_health") else None,
+            lambda x: {"disks": x["disk_health"]["disks"]} if x.get("disk_health") else {}
+        ))
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "disk_wearout", "Disk Wearout",
+            PERCENTAGE, None, SensorStateClass.MEASUREMENT,
+            lambda x: x["disk_health"]["max_wearout"] if x and x.get("disk_health") else None,
+            lambda x: {
+                devpath: disk["wearout"] for devpath, disk in x["disk_health"]["disks"].items()
+                if disk["wearout"] is not None
+            } if x.get("disk_health") else {}
+        ))
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "zfs_health", "ZFS Pool Health",
+            None, None, None,
+            lambda x: x["zfs"]["health"] if x and x.get("zfs") else None,
+            lambda x: {"pools": x["zfs"]["pools"]} if x.get("zfs") else {}
+        ))
+        # Package updates and kernels, collected a few times a day
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "pending_updates", "Pending Updates",
+            None, None, SensorStateClass.MEASUREMENT,
+            lambda x: x["updates"]["pending"] if x and x.get("updates") else None,
+            lambda x: {"packages": x["updates"]["packages"]} if x.get("updates") else {}
+        ))
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "security_updates", "Security Updates",
+            None, None, SensorStateClass.MEASUREMENT,
+            lambda x: x["updates"]["security"] if x and x.get("updates") else None,
+            lambda x: {"packages": x["updates"]["security_packages"]} if x.get("updates") else {}
+        ))
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "running_kernel", "Running Kernel",
+            None, None, None,
+            lambda x: x["updates"]["running_kernel"] if x and x.get("updates") else None,
+            lambda x: {"reboot_required": x["updates"]["reboot_required"]} if x.get("updates") else {}
+        ))
+        entities.append(ProxmoxSensor(
+            coordinator, node_name, "node", node_name, "installed_kernel", "Installed Kernel",
+            None, None, None,
+            lambda x: x["updates"]["installed_kernel"] if x and x.get("updates") else None
+        ))
+
+    # Cluster Sensors
+    if "cluster" in coordinator.data:
+        entities.extend([
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "cpu_usage", "CPU Usage",
+                PERCENTAGE, None, SensorStateClass.MEASUREMENT,
+                lambda x: round(x.get("cpu", 0) * 100, 2)
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "memory_usage", "Memory Usage",
+                PERCENTAGE, None, SensorStateClass.MEASUREMENT,
+                lambda x: round((x.get("mem", 0) / x.get("maxmem", 1)) * 100, 2) if x.get("maxmem", 0) > 0 else 0
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "memory_committed", "Memory Committed",
+                UnitOfInformation.GIGABYTES, SensorDeviceClass.DATA_SIZE, SensorStateClass.MEASUREMENT,
+                lambda x: round(x.get("committed_mem", 0) / 1073741824, 2)
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "memory_overcommit", "Memory Overcommit",
+                None, None, SensorStateClass.MEASUREMENT,
+                lambda x: x.get("mem_overcommit")
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "guests_running", "Guests Running",
+                None, None, SensorStateClass.MEASUREMENT,
+                lambda x: x.get("guests_running", 0),
+                lambda x: {"guests_total": x.get("guests_total", 0), "nodes_online": x.get("nodes_online", 0)}
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "api_requests", "API Requests",
+                "requests/min", None, SensorStateClass.MEASUREMENT,
+                lambda x: x.get("api", {}).get("requests_per_minute"),
+                lambda x: {k: v for k, v in x.get("api", {}).items() if k != "requests_per_minute"},
+                EntityCategory.DIAGNOSTIC,
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "top_cpu", "Top CPU Guest",
+                None, None, None,
+                lambda x: x["top_cpu"][0]["name"] if x.get("top_cpu") else None,
+                lambda x: {"ranking": x.get("top_cpu", [])}
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "top_memory", "Top Memory Guest",
+                None, None, None,
+                lambda x: x["top_memory"][0]["name"] if x.get("top_memory") else None,
+                lambda x: {"ranking": x.get("top_memory", [])}
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "top_io", "Top I/O Guest",
+                None, None, None,
+                lambda x: x["top_io"][0]["name"] if x.get("top_io") else None,
+                lambda x: {"ranking": x.get("top_io", [])}
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "without_backup", "Guests Without Recent Backup",
+                None, None, SensorStateClass.MEASUREMENT,
+                lambda x: len(x.get("without_backup", [])),
+                lambda x: {"guests": x.get("without_backup", [])}
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "imbalance", "Load Imbalance",
+                None, None, SensorStateClass.MEASUREMENT,
+                lambda x: x["placement"]["imbalance"] if x.get("placement") else None,
+                lambda x: {k: v for k, v in (x.get("placement") or {}).items() if k != "imbalance"}
+            ),
+            ProxmoxSensor(
+                coordinator, "Cluster", "cluster", coordinator.cluster_scope, "migrations", "Migrations",
+                None, None, None,
+                lambda x: x["migration"]["state"] if x.get("migration") else "idle",
+                lambda x: {k: v for k, v in (x.get("migration") or {}).items() if k != "state"}
+            ),
+        ])
 
+    # HA, replication and Ceph health, only where the cluster uses them
+    cluster = coordinator.data.get("cluster", {})
+    if cluster.get("ha", {}).get("state", "not_configured") != "not_configured":
+        entities.append(ProxmoxSensor(
+            coordinator, "Cluster", "cluster", coordinator.cluster_scope, "ha_status", "HA Status",
+            None, None, None,
+            lambda x: x["ha"]["state"] if x.get("ha") else None,
+            lambda x: {k: v for k, v in x.get("ha", {}).items() if k != "state"}
+        ))
+    if cluster.get("replication", {}).get("jobs"):
+        entities.append(ProxmoxSensor(
+            coordinator, "Cluster", "cluster", coordinator.cluster_scope, "replication_max_lag", "Replication Max Lag",
+            UnitOfTime.SECONDS, SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT,
+            lambda x: x["replication"]["max_lag"] if x.get("replication") else None,
+            lambda x: {"failing": x.get("replication", {}).get("failing", [])}
+        ))
+        for job_id in cluster["replication"]["jobs"]:
+            entities.append(ProxmoxSensor(
+                coordinator, f"Replication {job_id}", "replication", job_id, "lag", "Lag",
+                UnitOfTime.SECONDS, SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT,
+                lambda x: x.get("lag") if x else None,
+                lambda x: {k: v for k, v in x.items() if k != "lag"} if x else {}
+            ))
+    if "ceph" in cluster:
+        entities.append(ProxmoxSensor(
+            coordinator, "Cluster", "cluster", coordinator.cluster_scope, "ceph_health", "Ceph Health",
+            None, None, None,
+            lambda x: x["ceph"]["health"] if x.get("ceph") else None,
+            lambda x: {k: v for k, v in x.get("ceph", {}).items() if k != "health"}
+        ))
 
     # VM Sensors
     for vm_id, vm_data in coordinator.data["vms"].items():
@@ -100,6 +274,19 @@ async def async_setup_entry(
             None, None, None,
             get_vm_console_url
         ))
+
+        # Guest Agent
+        entities.append(ProxmoxSensor(
+            coordinator, name, "qemu", str(vm_id), "ip_address", "IP Address",
+            None, None, None,
+            _primary_ip, _ip_attributes
+        ))
+        entities.append(ProxmoxSensor(
+            coordinator, name, "qemu", str(vm_id), "guest_disk_used", "Guest Disk Used",
+            UnitOfInformation.GIGABYTES, SensorDeviceClass.DATA_SIZE, SensorStateClass.MEASUREMENT,
+            lambda x: round(x["guest_info"]["fs_used"] / 1073741824, 2) if x and "fs_used" in x.get("guest_info", {}) else None,
+            _fs_attributes
+        ))
     # LXC Sensors
     for vm_id, vm_data in coordinator.data["lxcs"].items():
         name = vm_data["name"]
@@ -142,13 +329,43 @@ async def async_setup_entry(
             get_lxc_console_url
         ))
 
-    # Storage Sensors
+        # Interfaces
+        entities.append(ProxmoxSensor(
+            coordinator, name, "lxc", str(vm_id), "ip_address", "IP Address",
+            None, None, None,
+            _primary_ip, _ip_attributes
+        ))
+
+    # Newest backup and snapshots of every guest
+    for resource_type, key in (("qemu", "vms"), ("lxc", "lxcs")):
+        for vm_id, guest_data in coordinator.data[key].items():
+            entities.append(ProxmoxSensor(
+                coordinator, guest_data["name"], resource_type, str(vm_id), "last_backup", "Last Backup",
+                None, SensorDeviceClass.TIMESTAMP, None,
+                lambda x: dt_util.utc_from_timestamp(x["last_backup"]["ctime"]) if x.get("last_backup") else None,
+                lambda x: {k: v for k, v in x["last_backup"].items() if k != "ctime"} if x.get("last_backup") else {}
+            ))
+            entities.append(ProxmoxSensor(
+                coordinator, guest_data["name"], resource_type, str(vm_id), "snapshots", "Snapshots",
+                None, None, SensorStateClass.MEASUREMENT,
+                lambda x: x["snapshots"]["count"] if x.get("snapshots") else None,
+                _snapshot_attributes
+            ))
+
+    # Drop guest sensors the entity profile does not include
+    entities = [
+        entity for entity in entities
+        if entity.resource_type not in ("qemu", "lxc") or entity.key in guest_keys
+    ]
 
     # Storage Sensors
     for store_id, store_data in coordinator.data["storage"].items():
-        # Store ID is node_storage_name. Let's use a cleaner name if possible or just the combine
+        # Store ID is node_storage_name, or clusterscope_storage_name for shared storage
         # store_data has 'node' and 'storage' keys
-        name = f"{store_data['node']} {store_data['storage']}"
+        if store_data.get("shared"):
+            name = f"Cluster {store_data['storage']}"
+        else:
+            name = f"{store_data['node']} {store_data['storage']}"
         
         entities.append(ProxmoxSensor(
             coordinator, name, "storage", store_id, "used", "Used", 
@@ -166,10 +383,63 @@ async def async_setup_entry(
             PERCENTAGE, None, SensorStateClass.MEASUREMENT,
             lambda x: round((x.get("used", 0) / x.get("total", 1)) * 100, 1) if x and x.get("total", 0) > 0 else 0
         ))
+        # Forecast
+        entities.append(ProxmoxSensor(
+            coordinator, name, "storage", store_id, "days_until_full", "Days Until Full",
+            UnitOfTime.DAYS, SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT,
+            lambda x: x["forecast"]["days_until_full"] if x and "forecast" in x else None
+        ))
+        entities.append(ProxmoxSensor(
+            coordinator, name, "storage", store_id, "growth_rate", "Growth Rate",
+            "GB/d", None, SensorStateClass.MEASUREMENT,
+            lambda x: round(x["forecast"]["growth_rate"] / 1073741824, 3) if x and "forecast" in x else None,
+            lambda x: {"samples": x["forecast"]["samples"]} if "forecast" in x else {}
+        ))
     
     async_add_entities(entities)
 
 
+def _primary_ip(data: dict[str, Any]) -> str | None:
+    """Return the first address reported for a guest."""
+    addresses = data.get("guest_info", {}).get("ip_addresses")
+    return addresses[0] if addresses else None
+
+
+def _snapshot_attributes(data: dict[str, Any]) -> dict[str, Any]:
+    """Return the snapshot names and the age of the oldest one."""
+    snapshots = data.get("snapshots")
+    if not snapshots:
+        return {}
+    attrs: dict[str, Any] = {"names": snapshots["names"]}
+    if snapshots["oldest"]:
+        attrs["oldest"] = dt_util.utc_from_timestamp(snapshots["oldest"]).isoformat()
+        attrs["oldest_age_days"] = round((time.time() - snapshots["oldest"]) / 86400, 1)
+    return attrs
+
+
+def _ip_attributes(data: dict[str, Any]) -> dict[str, Any]:
+    """Return all addresses per interface."""
+    info = data.get("guest_info", {})
+    return {
+        "ip_addresses": info.get("ip_addresses", []),
+        "interfaces": info.get("interfaces", {}),
+    }
+
+
+def _fs_attributes(data: dict[str, Any]) -> dict[str, Any]:
+    """Return per-mountpoint usage from the guest agent."""
+    info = data.get("guest_info", {})
+    if "fs_total" not in info:
+        return {}
+    return {
+        "total": f"{round(info['fs_total'] / 1073741824, 2)} GB",
+        "filesystems": {
+            fs["mountpoint"]: f"{round(fs['used'] / 1073741824, 2)} / {round(fs['total'] / 1073741824, 2)} GB"
+            for fs in info.get("filesystems", [])
+        },
+    }
+
+
 class ProxmoxSensor(CoordinatorEntity[ProxmoxCoordinator], SensorEntity):
     """Proxmox Sensor."""
 
@@ -185,6 +455,8 @@ class ProxmoxSensor(CoordinatorEntity[ProxmoxCoordinator], SensorEntity):
         device_class: SensorDeviceClass | None,
         state_class: SensorStateClass | None,
         value_fn: callable,
+        attributes_fn: callable | None = None,
+        entity_category: EntityCategory | None = None,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -193,28 +465,114 @@ class ProxmoxSensor(CoordinatorEntity[ProxmoxCoordinator], SensorEntity):
         self._key = key
         self._attr_name = f"{name} {suffix}"
         self._attr_unique_id = f"proxmox_{resource_type}_{resource_id}_{key}"
+        if resource_type in ("qemu", "lxc"):
+            self._attr_entity_registry_enabled_default = key not in GUEST_ENTITIES_DISABLED_BY_DEFAULT
         self._attr_native_unit_of_measurement = native_unit_of_measurement
         self._attr_device_class = device_class
         self._attr_state_class = state_class
+        self._attr_entity_category = entity_category
         self._value_fn = value_fn
+        self._attributes_fn = attributes_fn
+        self._deadband = SENSOR_DEADBANDS.get(key)
+        # Last state written to HA, used by the deadband
+        self._written_value: StateType = None
+        self._written_at = 0.0
+        self._written_flags: tuple[bool, bool] | None = None
 
     @property
-    def native_value(self) -> StateType:
-        """Return the state of the sensor."""
-        data = None
+    def resource_type(self) -> str:
+        """Return the resource type (node, qemu, lxc, storage)."""
+        return self._resource_type
+
+    @property
+    def key(self) -> str:
+        """Return the sensor key."""
+        return self._key
+
+    async def async_added_to_hass(self) -> None:
+        """Record the initial state for the deadband."""
+        await super().async_added_to_hass()
+        self._record_write()
+
+    def _record_write(self) -> None:
+        """Remember what was last written."""
+        self._written_value = self.native_value
+        self._written_at = time.monotonic()
+        self._written_flags = (self.available, self.coordinator.stale)
+
+    def _should_write(self) -> bool:
+        """Return True if the new value is worth a state write."""
+        if self._deadband is None:
+            return True
+        if (self.available, self.coordinator.stale) != self._written_flags:
+            return True
+
+        elapsed = time.monotonic() - self._written_at
+        heartbeat = self.coordinator.entry.options.get(CONF_STATE_HEARTBEAT, DEFAULT_STATE_HEARTBEAT)
+        if elapsed >= heartbeat:
+            return True
+
+        value, last = self.native_value, self._written_value
+        if not isinstance(value, (int, float)) or not isinstance(last, (int, float)):
+            return value != last
+        if elapsed < MIN_STATE_WRITE_INTERVAL:
+            return False
+
+        absolute, relative = self._deadband
+        delta = abs(value - last)
+        if absolute is not None and delta >= absolute:
+            return True
+        if relative is not None and delta >= abs(last) * relative:
+            return True
+        return False
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the value moved past the deadband or the heartbeat is due."""
+        if self._should_write():
+            self._record_write()
+            self.async_write_ha_state()
+
+    def _get_data(self) -> dict[str, Any] | None:
+        """Return the coordinator data for this resource."""
         if self._resource_type == "node":
-            data = self.coordinator.data["nodes"].get(self._resource_id)
+            return self.coordinator.data["nodes"].get(self._resource_id)
         elif self._resource_type == "qemu":
-             data = self.coordinator.data["vms"].get(int(self._resource_id))
+             return self.coordinator.data["vms"].get(int(self._resource_id))
         elif self._resource_type == "lxc":
-             data = self.coordinator.data["lxcs"].get(int(self._resource_id))
+             return self.coordinator.data["lxcs"].get(int(self._resource_id))
         elif self._resource_type == "storage":
-             data = self.coordinator.data["storage"].get(self._resource_id)
-             
+             return self.coordinator.data["storage"].get(self._resource_id)
+        elif self._resource_type == "cluster":
+             return self.coordinator.data.get("cluster")
+        elif self._resource_type == "replication":
+             return self.coordinator.data.get("cluster", {}).get("replication", {}).get("jobs", {}).get(self._resource_id)
+        return None
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return super().available and self.coordinator.is_resource_available(self._get_data())
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        data = self._get_data()
         if data:
             return self._value_fn(data)
         return None
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return extra state attributes."""
+        attrs: dict[str, Any] = {}
+        data = self._get_data()
+        if data and self._attributes_fn is not None:
+            attrs.update(self._attributes_fn(data))
+        if self.coordinator.stale:
+            attrs["stale"] = True
+        return attrs or None
+
     @property
     def device_info(self) -> DeviceInfo:
         """Return device information about this entity."""
@@ -254,10 +612,26 @@ class ProxmoxSensor(CoordinatorEntity[ProxmoxCoordinator], SensorEntity):
                 model="Virtual Machine" if self._resource_type == "qemu" else "LXC Container",
                 via_device=(DOMAIN, node) if node else None,
             )
+        elif self._resource_type in ("cluster", "replication"):
+            return DeviceInfo(
+                identifiers={(DOMAIN, self.coordinator.cluster_scope)},
+                name="Proxmox VE Cluster",
+                manufacturer="Proxmox",
+                model="Proxmox VE Cluster",
+                configuration_url=f"https://{self.coordinator.client._host}:{self.coordinator.client._port}",
+            )
         elif self._resource_type == "storage":
-            # self._resource_id is "node_storage"
-            # We want to link this to the node device
+            # self._resource_id is "node_storage", or "clusterscope_storage" for shared storage
             data = self.coordinator.data["storage"].get(self._resource_id)
+            if data and data.get("shared"):
+                # Shared storage is one cluster-level device, not tied to the node that reported it
+                return DeviceInfo(
+                    identifiers={(DOMAIN, self._resource_id)},
+                    name=f"Storage {data.get('storage')}",
+                    manufacturer="Proxmox",
+                    model=f"Shared Storage ({data.get('type', 'unknown')})",
+                )
+            # We want to link this to the node device
             node = data.get("node") if data else None
             return DeviceInfo(
                 identifiers={(DOMAIN, self._resource_id)},
@@ -0,0 +1,240 @@
+"""Services for PetalPVE."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    ATTR_DESCRIPTION,
+    ATTR_INCLUDE_RAM,
+    ATTR_MAX_PARALLEL,
+    ATTR_NODE,
+    ATTR_SNAPSHOT_NAME,
+    ATTR_TARGET_NODES,
+    ATTR_VM_ID,
+    DOMAIN,
+    MIGRATION_MAX_PARALLEL,
+    SERVICE_EVACUATE_NODE,
+    SERVICE_REBALANCE,
+    SERVICE_SNAPSHOT_CREATE,
+    SERVICE_SNAPSHOT_DELETE,
+    SERVICE_SNAPSHOT_LIST,
+    SERVICE_SNAPSHOT_ROLLBACK,
+)
+from .coordinator import ProxmoxCoordinator
+from .evacuation import MIGRATION_NO_TARGET, Migration, guests_from_resources, plan_evacuation
+from .placement import recommend
+
+EVACUATE_NODE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_NODE): cv.string,
+    vol.Optional(ATTR_TARGET_NODES): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_MAX_PARALLEL, default=MIGRATION_MAX_PARALLEL): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+})
+
+REBALANCE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_MAX_PARALLEL, default=MIGRATION_MAX_PARALLEL): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+})
+
+GUESTS_SCHEMA = vol.Schema({
+    vol.Required(ATTR_VM_ID): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+})
+
+# Proxmox VE snapshot names start with a letter and are at most 40 characters
+SNAPSHOT_SCHEMA = GUESTS_SCHEMA.extend({
+    vol.Required(ATTR_SNAPSHOT_NAME): vol.All(cv.string, vol.Match(r"^[a-zA-Z][a-zA-Z0-9_-]{1,39}$")),
+})
+
+SNAPSHOT_CREATE_SCHEMA = SNAPSHOT_SCHEMA.extend({
+    vol.Optional(ATTR_DESCRIPTION): cv.string,
+    vol.Optional(ATTR_INCLUDE_RAM, default=False): cv.boolean,
+})
+
+SNAPSHOT_SERVICES = (
+    SERVICE_SNAPSHOT_CREATE,
+    SERVICE_SNAPSHOT_ROLLBACK,
+    SERVICE_SNAPSHOT_DELETE,
+    SERVICE_SNAPSHOT_LIST,
+)
+
+
+def _coordinator_for_node(hass: HomeAssistant, node: str) -> tuple[ProxmoxCoordinator, dict[str, Any]]:
+    """Return the coordinator that polls a node's cluster, and the node's data."""
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        if node in coordinator.data["nodes"]:
+            # Batches run on the leader, which guards against two running at once
+            return coordinator.leader or coordinator, coordinator.data["nodes"]
+    raise HomeAssistantError(f"Unknown Proxmox VE node: {node}")
+
+
+def _resolve_guests(hass: HomeAssistant, vm_ids: list[int]) -> list[tuple[ProxmoxCoordinator, str, int]]:
+    """Return (coordinator, vm_type, vm_id) for every requested guest."""
+    guests = []
+    for vm_id in vm_ids:
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            if vm_id in coordinator.data["vms"]:
+                guests.append((coordinator, "qemu", vm_id))
+                break
+            if vm_id in coordinator.data["lxcs"]:
+                guests.append((coordinator, "lxc", vm_id))
+                break
+        else:
+            raise HomeAssistantError(f"Unknown Proxmox VE guest: {vm_id}")
+    return guests
+
+
+async def _async_snapshot_tasks(hass: HomeAssistant, call: ServiceCall, method_name: str, **kwargs: Any) -> None:
+    """Run a snapshot task on every requested guest concurrently and wait for all of them."""
+    guests = _resolve_guests(hass, call.data[ATTR_VM_ID])
+    errors = await asyncio.gather(*(
+        coordinator.async_snapshot_task(
+            getattr(coordinator.client, method_name), vm_type, vm_id,
+            snapname=call.data[ATTR_SNAPSHOT_NAME], **kwargs,
+        )
+        for coordinator, vm_type, vm_id in guests
+    ))
+    failed = [f"{vm_id}: {error}" for (_, _, vm_id), error in zip(guests, errors) if error]
+    if method_name == "rollback_snapshot":
+        # A rollback changes the guest's power state
+        for coordinator in {coordinator for coordinator, _, _ in guests}:
+            await coordinator.async_request_refresh()
+    if failed:
+        raise HomeAssistantError(f"Snapshot task failed for {', '.join(failed)}")
+
+
+async def _async_snapshot_list(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the snapshots of every requested guest."""
+    guests = _resolve_guests(hass, call.data[ATTR_VM_ID])
+    results = await asyncio.gather(*(
+        coordinator.snapshots.async_refresh_guest(vm_type, vm_id, coordinator.data[
+            "vms" if vm_type == "qemu" else "lxcs"
+        ][vm_id]["node"])
+        for coordinator, vm_type, vm_id in guests
+    ))
+    return {
+        "snapshots": {
+            str(vm_id): [
+                {
+                    "name": snapshot.get("name"),
+                    "description": snapshot.get("description", ""),
+                    "snaptime": snapshot.get("snaptime"),
+                    "parent": snapshot.get("parent"),
+                    "include_ram": bool(snapshot.get("vmstate")),
+                }
+                for snapshot in snapshots or []
+            ]
+            for (_, _, vm_id), snapshots in zip(guests, results)
+        }
+    }
+
+
+async def _async_evacuate_node(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Migrate every guest off a node."""
+    node = call.data[ATTR_NODE]
+    coordinator, nodes = _coordinator_for_node(hass, node)
+    if nodes[node].get("status") != "online":
+        raise HomeAssistantError(f"Proxmox VE node {node} is not online")
+
+    # Plan from the whole cluster, guests an entry excludes have to move too
+    try:
+        resources = await coordinator.client.async_call(coordinator.client.get_cluster_resources, priority=True)
+    except TimeoutError:
+        resources = None
+    if resources is None:
+        raise HomeAssistantError(f"Could not list the guests on Proxmox VE node {node}")
+    migrations = plan_evacuation(
+        {"nodes": nodes, **guests_from_resources(resources)}, node, call.data.get(ATTR_TARGET_NODES)
+    )
+    if not migrations:
+        return
+    if all(migration.state == MIGRATION_NO_TARGET for migration in migrations):
+        raise HomeAssistantError(f"No node has room for the guests on {node}")
+    coordinator.async_start_migrations(f"evacuate {node}", migrations, call.data[ATTR_MAX_PARALLEL])
+
+
+async def _async_rebalance(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Carry out the recommended migrations of every cluster."""
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        # Entries sharing a poll loop target the same cluster, balance it once
+        if coordinator.leader is not None:
+            continue
+        # Recompute on current data, the slow-tier recommendation may be minutes old
+        moves = recommend(coordinator.data)["recommendations"]
+        if not moves:
+            continue
+        migrations = [
+            Migration(
+                vm_type="qemu",
+                vmid=move["vmid"],
+                name=move["name"],
+                source=move["source"],
+                target=move["target"],
+                online=True,
+            )
+            for move in moves
+        ]
+        coordinator.async_start_migrations("rebalance", migrations, call.data[ATTR_MAX_PARALLEL])
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the PetalPVE services once for all entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_EVACUATE_NODE):
+        return
+
+    async def async_evacuate_node(call: ServiceCall) -> None:
+        await _async_evacuate_node(hass, call)
+
+    async def async_rebalance(call: ServiceCall) -> None:
+        await _async_rebalance(hass, call)
+
+    async def async_snapshot_create(call: ServiceCall) -> None:
+        await _async_snapshot_tasks(
+            hass, call, "create_snapshot",
+            description=call.data.get(ATTR_DESCRIPTION), vmstate=call.data[ATTR_INCLUDE_RAM],
+        )
+
+    async def async_snapshot_rollback(call: ServiceCall) -> None:
+        await _async_snapshot_tasks(hass, call, "rollback_snapshot")
+
+    async def async_snapshot_delete(call: ServiceCall) -> None:
+        await _async_snapshot_tasks(hass, call, "delete_snapshot")
+
+    async def async_snapshot_list(call: ServiceCall) -> ServiceResponse:
+        return await _async_snapshot_list(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_EVACUATE_NODE, async_evacuate_node, schema=EVACUATE_NODE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_REBALANCE, async_rebalance, schema=REBALANCE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SNAPSHOT_CREATE, async_snapshot_create, schema=SNAPSHOT_CREATE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SNAPSHOT_ROLLBACK, async_snapshot_rollback, schema=SNAPSHOT_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SNAPSHOT_DELETE, async_snapshot_delete, schema=SNAPSHOT_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SNAPSHOT_LIST, async_snapshot_list, schema=GUESTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the services once the last entry is unloaded."""
+    if hass.data.get(DOMAIN):
+        return
+    for service in (SERVICE_EVACUATE_NODE, SERVICE_REBALANCE, *SNAPSHOT_SERVICES):
+        hass.services.async_remove(DOMAIN, service)
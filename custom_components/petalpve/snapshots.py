@@ -0,0 +1,72 @@
+"""Per-guest snapshot lists for Proxmox VE."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from .api import ProxmoxClient
+
+
+class SnapshotCache:
+    """Keep the snapshot list of every guest.
+
+    Each guest is listed once, then again only after a snapshot task on it
+    finishes, so there is no per-guest polling.
+    """
+
+    def __init__(self, client: ProxmoxClient) -> None:
+        """Initialize."""
+        self._client = client
+        # (vm_type, vm_id) -> snapshots, without the "current" pseudo snapshot
+        self._snapshots: dict[tuple[str, int], list[dict[str, Any]]] = {}
+
+    def summary(self, vm_type: str, vm_id: int) -> dict[str, Any] | None:
+        """Return the count, oldest snapshot time and names for a guest."""
+        snapshots = self._snapshots.get((vm_type, vm_id))
+        if snapshots is None:
+            return None
+        times = [snapshot["snaptime"] for snapshot in snapshots if snapshot.get("snaptime")]
+        return {
+            "count": len(snapshots),
+            "oldest": min(times) if times else None,
+            "names": [snapshot.get("name") for snapshot in snapshots],
+        }
+
+    def snapshots(self, vm_type: str, vm_id: int) -> list[dict[str, Any]] | None:
+        """Return the cached snapshot list of a guest."""
+        return self._snapshots.get((vm_type, vm_id))
+
+    async def async_refresh_guest(self, vm_type: str, vm_id: int, node: str) -> list[dict[str, Any]] | None:
+        """List the snapshots of one guest."""
+        try:
+            snapshots = await self._client.async_call(self._client.get_snapshots, node, vm_id, vm_type)
+        except TimeoutError:
+            return None
+        if snapshots is not None:
+            self._snapshots[(vm_type, vm_id)] = snapshots
+        return snapshots
+
+    async def async_update(self, vms: dict[int, Any], lxcs: dict[int, Any], deadline: float) -> None:
+        """List guests seen for the first time, as far as the refresh budget allows."""
+        present = set()
+        missing = []
+        for vm_type, guests in (("qemu", vms), ("lxc", lxcs)):
+            for vm_id, guest in guests.items():
+                present.add((vm_type, vm_id))
+                if (vm_type, vm_id) not in self._snapshots and "stale_since" not in guest:
+                    missing.append((vm_type, vm_id, guest["node"]))
+        for index in set(self._snapshots) - present:
+            self._snapshots.pop(index)
+
+        remaining = deadline - time.monotonic()
+        if not missing or remaining <= 0:
+            return
+        tasks = [
+            asyncio.ensure_future(self.async_refresh_guest(vm_type, vm_id, node))
+            for vm_type, vm_id, node in missing
+        ]
+        # Guests left over are listed by a later refresh
+        _, pending = await asyncio.wait(tasks, timeout=remaining)
+        for task in pending:
+            task.cancel()
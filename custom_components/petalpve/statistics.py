@@ -0,0 +1,119 @@
+"""Hourly guest statistics for the statistics-only entity profile."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import PERCENTAGE, UnitOfInformation
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER
+
+# metric -> (unit, value function)
+GUEST_METRICS = {
+    "cpu": (PERCENTAGE, lambda x: x.get("cpu", 0) * 100),
+    "memory": (UnitOfInformation.GIGABYTES, lambda x: x.get("mem", 0) / 1073741824),
+}
+
+
+class _Accumulator:
+    """Running mean/min/max for one guest metric within the current hour."""
+
+    __slots__ = ("count", "total", "minimum", "maximum")
+
+    def __init__(self, value: float) -> None:
+        """Start from the first sample."""
+        self.count = 1
+        self.total = value
+        self.minimum = value
+        self.maximum = value
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+
+class GuestStatistics:
+    """Aggregate guest metrics per hour and import them as external statistics.
+
+    Samples are folded into one accumulator per guest and metric, so memory
+    stays constant per guest. When the hour rolls over, the finished hour is
+    imported for every guest in one pass. The recorder imports external
+    statistics one statistic ID per call, so that pass queues one import
+    task per guest and metric. The partial hour in progress at shutdown is
+    not written.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._hour_start: datetime | None = None
+        self._accumulators: dict[tuple[str, int, str], _Accumulator] = {}
+        self._names: dict[tuple[str, int], str] = {}
+
+    @callback
+    def async_add_samples(self, data: dict[str, Any]) -> None:
+        """Fold one refresh worth of guest metrics into the current hour."""
+        hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        if self._hour_start is not None and hour > self._hour_start:
+            self._async_flush()
+        self._hour_start = hour
+
+        for vm_type, key in (("qemu", "vms"), ("lxc", "lxcs")):
+            for vm_id, guest in data[key].items():
+                # Carried-over data from an unreachable node is not a new sample
+                if "stale_since" in guest:
+                    continue
+                self._names[(vm_type, vm_id)] = guest.get("name", str(vm_id))
+                for metric, (_, value_fn) in GUEST_METRICS.items():
+                    value = value_fn(guest)
+                    accumulator = self._accumulators.get((vm_type, vm_id, metric))
+                    if accumulator is None:
+                        self._accumulators[(vm_type, vm_id, metric)] = _Accumulator(value)
+                    else:
+                        accumulator.add(value)
+
+    @callback
+    def _async_flush(self) -> None:
+        """Import the finished hour and start a new one."""
+        accumulators, self._accumulators = self._accumulators, {}
+        names, self._names = self._names, {}
+        if not accumulators or self._hour_start is None:
+            return
+        if "recorder" not in self._hass.config.components:
+            LOGGER.warning("Recorder is not loaded, dropping hourly guest statistics")
+            return
+
+        start = self._hour_start
+        # async_add_external_statistics takes the metadata of a single statistic ID
+        for (vm_type, vm_id, metric), accumulator in accumulators.items():
+            unit, _ = GUEST_METRICS[metric]
+            name = names.get((vm_type, vm_id), str(vm_id))
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{name} {metric.capitalize()}",
+                source=DOMAIN,
+                statistic_id=f"{DOMAIN}:{vm_type}_{vm_id}_{metric}",
+                unit_of_measurement=unit,
+            )
+            statistic = StatisticData(
+                start=start,
+                mean=accumulator.total / accumulator.count,
+                min=accumulator.minimum,
+                max=accumulator.maximum,
+            )
+            async_add_external_statistics(self._hass, metadata, [statistic])
+
+        LOGGER.debug(
+            "Queued %s guest statistics imports for %s guests for the hour starting %s",
+            len(accumulators), len(names), start,
+        )
@@ -10,7 +10,7 @@ from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE, DOMAIN, PROFILE_GUEST_ENTITIES
 from .coordinator import ProxmoxCoordinator
 
 async def async_setup_entry(
@@ -22,6 +22,8 @@ async def async_setup_entry(
     coordinator: ProxmoxCoordinator = hass.data[DOMAIN][entry.entry_id]
 
     entities: list[ProxmoxSwitch] = []
+    if "onboot" not in PROFILE_GUEST_ENTITIES[entry.options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE)]:
+        return
 
     # VM Switches
     for vm_id, vm_data in coordinator.data["vms"].items():
@@ -104,9 +106,13 @@ class ProxmoxSwitch(CoordinatorEntity[ProxmoxCoordinator], SwitchEntity):
             node = data.get("node")
             
         if node:
-             config = await self.hass.async_add_executor_job(
-                 self.coordinator.client.get_vm_config, node, self._vm_id, self._resource_type
-             )
+             try:
+                 config = await self.coordinator.client.async_call(
+                     self.coordinator.client.get_vm_config, node, self._vm_id, self._resource_type
+                 )
+             except TimeoutError:
+                 # Keep the last known state, the next update will try again
+                 return
              if config:
                  self._is_on = bool(config.get("onboot", 0))
 
@@ -117,38 +123,29 @@ class ProxmoxSwitch(CoordinatorEntity[ProxmoxCoordinator], SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
-        node = None
-        if self._resource_type == "qemu":
-             data = self.coordinator.data["vms"].get(self._vm_id)
-        else:
-             data = self.coordinator.data["lxcs"].get(self._vm_id)
-        
-        if not data: return
-        node = data.get("node")
-
-        if await self.hass.async_add_executor_job(
-            self.coordinator.client.set_vm_config, node, self._vm_id, self._resource_type, onboot=1
+        if await self.coordinator.async_guest_action(
+            self.coordinator.client.set_vm_config, self._resource_type, self._vm_id, onboot=1
         ):
             self._is_on = True
             self.async_write_ha_state()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the switch off."""
-        node = None
-        if self._resource_type == "qemu":
-             data = self.coordinator.data["vms"].get(self._vm_id)
-        else:
-             data = self.coordinator.data["lxcs"].get(self._vm_id)
-             
-        if not data: return
-        node = data.get("node")
-
-        if await self.hass.async_add_executor_job(
-            self.coordinator.client.set_vm_config, node, self._vm_id, self._resource_type, onboot=0
+        if await self.coordinator.async_guest_action(
+            self.coordinator.client.set_vm_config, self._resource_type, self._vm_id, onboot=0
         ):
             self._is_on = False
             self.async_write_ha_state()
 
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        if self._resource_type == "qemu":
+            data = self.coordinator.data["vms"].get(self._vm_id)
+        else:
+            data = self.coordinator.data["lxcs"].get(self._vm_id)
+        return super().available and self.coordinator.is_resource_available(data)
+
     @property
     def device_info(self) -> DeviceInfo:
         """Return device information."""
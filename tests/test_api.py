@@ -0,0 +1,82 @@
+"""Test the ProxmoxClient response cache."""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from custom_components.petalpve.api import ProxmoxClient
+
+
+class FakeProxmox:
+    """proxmoxer stand-in whose GETs can be held until released."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.requests: list[tuple[str, str]] = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, path: str) -> "FakeProxmox":
+        """Return self, remembering the path."""
+        self._path = path
+        return self
+
+    def get(self, **params):
+        """Answer a GET once released."""
+        path = self._path
+        self.requests.append(("get", path))
+        self.started.set()
+        self.release.wait(5)
+        return [{"node": "pve1"}]
+
+    def post(self, **data):
+        """Answer a POST."""
+        self.requests.append(("post", self._path))
+        return "UPID:pve1"
+
+
+def _client() -> tuple[ProxmoxClient, FakeProxmox]:
+    """Return a client wired to a FakeProxmox."""
+    client = ProxmoxClient(None, "pve", "root", "", 8006, "pam", False, api_rate=100, api_burst=100)
+    client._proxmox = FakeProxmox()
+    return client, client._proxmox
+
+
+def test_inflight_coalescing() -> None:
+    """Test concurrent identical GETs share one request and get their own copies."""
+    client, proxmox = _client()
+    proxmox.release.clear()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(client._get, "cluster/ceph/status")
+        assert proxmox.started.wait(5)
+        second = pool.submit(client._get, "cluster/ceph/status")
+        # Wait for the second caller to join the request in flight
+        while not client._inflight[("cluster/ceph/status", ())][1]:
+            pass
+        proxmox.release.set()
+        results = [first.result(5), second.result(5)]
+
+    assert proxmox.requests == [("get", "cluster/ceph/status")]
+    assert results[0] == results[1]
+    assert results[0] is not results[1]
+    # Not cached, so the next GET goes out again
+    client._get("cluster/ceph/status")
+    assert len(proxmox.requests) == 2
+    client.shutdown()
+
+
+def test_post_invalidates_inflight_get() -> None:
+    """Test a GET that raced a POST is not cached, while later GETs are."""
+    client, proxmox = _client()
+    proxmox.release.clear()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        racing = pool.submit(client._get, "nodes")
+        assert proxmox.started.wait(5)
+        client._post("nodes/pve1/qemu/100/status/start", invalidate=("nodes",))
+        proxmox.release.set()
+        racing.result(5)
+
+    assert ("nodes", ()) not in client._cache
+    client._get("nodes")
+    client._get("nodes")
+    assert proxmox.requests.count(("get", "nodes")) == 2
+    client.shutdown()
@@ -0,0 +1,40 @@
+"""Test the backup index."""
+from homeassistant.core import HomeAssistant
+
+from custom_components.petalpve.backups import BackupIndex
+
+
+def _volume(volid: str, vm_id: int, ctime: int) -> dict:
+    """Return one item of a backup content listing."""
+    return {"volid": volid, "vmid": vm_id, "ctime": ctime, "content": "backup"}
+
+
+async def test_diff_and_rank(hass: HomeAssistant) -> None:
+    """Test listings are diffed against the index and only affected guests re-ranked."""
+    index = BackupIndex(hass, None, "entry")
+    first = [
+        _volume("nfs:backup/vzdump-qemu-100-a.vma.zst", 100, 100),
+        _volume("nfs:backup/vzdump-qemu-100-b.vma.zst", 100, 200),
+        _volume("nfs:backup/vzdump-lxc-101-a.tar.zst", 101, 50),
+    ]
+    assert index._apply("cluster:lab_nfs", first) == {100, 101}
+    index._rank({100, 101})
+    assert index.newest(100) == {"volid": "nfs:backup/vzdump-qemu-100-b.vma.zst", "storage": "cluster:lab_nfs", "ctime": 200}
+    assert index.newest(101)["ctime"] == 50
+
+    # Nothing changed, nothing to re-rank
+    assert index._apply("cluster:lab_nfs", first) == set()
+
+    # The newest backup of 100 was pruned and 101 got a new one
+    second = [first[0], first[2], _volume("nfs:backup/vzdump-lxc-101-b.tar.zst", 101, 300)]
+    assert index._apply("cluster:lab_nfs", second) == {100, 101}
+    index._rank({100, 101})
+    assert index.newest(100)["volid"] == "nfs:backup/vzdump-qemu-100-a.vma.zst"
+    assert index.newest(101)["ctime"] == 300
+
+    # A newer backup on another storage wins
+    assert index._apply("pbs", [_volume("pbs:backup/vm/100/2024", 100, 500)]) == {100}
+    index._rank({100})
+    assert index.newest(100) == {"volid": "pbs:backup/vm/100/2024", "storage": "pbs", "ctime": 500}
+    assert index.newest(101)["ctime"] == 300
+    assert index.newest(102) is None
@@ -3,6 +3,7 @@ from unittest.mock import patch
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.petalpve.const import DOMAIN
 
@@ -61,3 +62,39 @@ async def test_form_cannot_connect(hass: HomeAssistant, mock_proxmox_client) ->
 
     assert result2["type"] == FlowResultType.FORM
     assert result2["errors"] == {"base": "cannot_connect"}
+
+async def test_options_flow(hass: HomeAssistant) -> None:
+    """Test setting exclusion options."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"host": "1.1.1.1"})
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result2 = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            "node_exclude": "pve-test*",
+            "vm_exclude": "9000-9999, tag:ci",
+            "lxc_exclude": "ci-*, pool:scratch",
+            "unreachable_grace_period": 120,
+        },
+    )
+
+    assert result2["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options["vm_exclude"] == "9000-9999, tag:ci"
+
+async def test_options_flow_invalid_range(hass: HomeAssistant) -> None:
+    """Test an inverted id range is rejected."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"host": "1.1.1.1"})
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result2 = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {"vm_exclude": "200-100"},
+    )
+
+    assert result2["type"] == FlowResultType.FORM
+    assert result2["errors"] == {"vm_exclude": "invalid_exclude"}
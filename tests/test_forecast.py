@@ -0,0 +1,53 @@
+"""Test the storage time-to-full forecast."""
+import pytest
+
+from custom_components.petalpve.const import FORECAST_MIN_SAMPLES
+from custom_components.petalpve.forecast import SECONDS_PER_DAY, StorageForecaster, linear_trend
+
+GIB = 1073741824
+
+
+def test_linear_trend() -> None:
+    """Test the least squares slope, and no slope without spread in time."""
+    assert linear_trend([(0, 1), (10, 21), (20, 41)]) == pytest.approx(2)
+    assert linear_trend([(0, 1), (10, 11), (20, 41)]) == pytest.approx(2)
+    assert linear_trend([(0, 1)]) is None
+    assert linear_trend([(5, 1), (5, 2)]) is None
+
+
+def test_time_to_full() -> None:
+    """Test a storage growing 1 GiB a day, seeded from RRD data and extended with samples."""
+    forecaster = StorageForecaster()
+    assert forecaster.needs_seed("pve1_local")
+    # RRD rows arrive unordered and may have gaps
+    forecaster.seed("pve1_local", [
+        {"time": day * SECONDS_PER_DAY, "used": (10 + day) * GIB} for day in (2, 0, 1)
+    ] + [{"time": 3 * SECONDS_PER_DAY, "used": None}])
+    assert not forecaster.needs_seed("pve1_local")
+    # Too few samples yet
+    assert forecaster.forecast("pve1_local", 12 * GIB, 100 * GIB) is None
+
+    for day in range(3, FORECAST_MIN_SAMPLES + 1):
+        forecaster.add_sample("pve1_local", day * SECONDS_PER_DAY, (10 + day) * GIB)
+    # Samples older than the newest are ignored
+    forecaster.add_sample("pve1_local", SECONDS_PER_DAY / 2, 0)
+
+    used = (10 + FORECAST_MIN_SAMPLES) * GIB
+    forecast = forecaster.forecast("pve1_local", used, 100 * GIB)
+    assert forecast["growth_rate"] == pytest.approx(GIB)
+    assert forecast["days_until_full"] == 100 - 10 - FORECAST_MIN_SAMPLES
+    assert forecast["samples"] == FORECAST_MIN_SAMPLES + 1
+
+
+def test_shrinking_storage() -> None:
+    """Test shrinking usage has a growth rate but is never full."""
+    forecaster = StorageForecaster()
+    forecaster.seed("nfs", [
+        {"time": hour * 3600, "used": (50 - hour) * GIB} for hour in range(FORECAST_MIN_SAMPLES * 2)
+    ])
+    forecast = forecaster.forecast("nfs", 40 * GIB, 100 * GIB)
+    assert forecast["growth_rate"] < 0
+    assert forecast["days_until_full"] is None
+
+    forecaster.prune({"pve1_local"})
+    assert forecaster.needs_seed("nfs")
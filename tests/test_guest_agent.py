@@ -0,0 +1,34 @@
+"""Test the guest agent cache."""
+import asyncio
+import time
+
+from custom_components.petalpve.guest_agent import GuestAgentCache
+
+
+class FakeClient:
+    """Client whose container 101 never answers."""
+
+    async def async_call(self, method, *args):
+        """Run the method."""
+        return await method(*args)
+
+    async def get_lxc_interfaces(self, node, vm_id):
+        """Return one interface, or hang for the dead container."""
+        if vm_id == 101:
+            await asyncio.sleep(60)
+        return [{"name": "eth0", "inet": "192.168.1.10/24"}]
+
+
+async def test_dead_agent_does_not_hold_up_others() -> None:
+    """Test fetches run concurrently and the deadline leaves pending ones uncached."""
+    cache = GuestAgentCache(FakeClient())
+    lxcs = {vm_id: {"status": "running", "node": "pve1"} for vm_id in (100, 101, 102)}
+
+    started = time.monotonic()
+    await cache.async_refresh({}, lxcs, started + 0.2)
+
+    assert time.monotonic() - started < 1
+    assert lxcs[100]["guest_info"]["ip_addresses"] == ["192.168.1.10"]
+    assert lxcs[102]["guest_info"]["ip_addresses"] == ["192.168.1.10"]
+    assert "guest_info" not in lxcs[101]
+    assert ("lxc", 101) not in cache._entries
@@ -0,0 +1,44 @@
+"""Test the PetalPVE setup helpers."""
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.petalpve import _async_migrate_cluster_ids
+from custom_components.petalpve.const import DOMAIN
+
+
+async def test_migrate_storage_ids(hass: HomeAssistant) -> None:
+    """Test shared storage IDs move to the cluster scope and only their per-node leftovers go."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    coordinator = SimpleNamespace(
+        cluster_scope="cluster:lab",
+        data={
+            "nodes": {"pve1": {}},
+            "storage": {
+                "cluster:lab_backup": {"storage": "backup", "node": "pve1", "shared": 1},
+                "pve1_backup_ssd": {"storage": "backup_ssd", "node": "pve1", "shared": 0},
+            },
+        },
+    )
+    registry = er.async_get(hass)
+    for unique_id in (
+        "proxmox_cluster_cluster_guests_total",
+        "proxmox_storage_cluster_backup_used",
+        "proxmox_storage_pve1_backup_used",
+        "proxmox_storage_pve1_backup_ssd_used",
+    ):
+        registry.async_get_or_create("sensor", DOMAIN, unique_id, config_entry=entry)
+
+    _async_migrate_cluster_ids(hass, entry, coordinator)
+
+    assert {
+        entity_entry.unique_id for entity_entry in er.async_entries_for_config_entry(registry, entry.entry_id)
+    } == {
+        "proxmox_cluster_cluster:lab_guests_total",
+        "proxmox_storage_cluster:lab_backup_used",
+        # Local storage whose name starts with the shared one's is left alone
+        "proxmox_storage_pve1_backup_ssd_used",
+    }
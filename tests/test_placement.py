@@ -0,0 +1,51 @@
+"""Test the rebalance recommendations."""
+from custom_components.petalpve.const import REBALANCE_MIN_GAIN
+from custom_components.petalpve.placement import recommend
+
+GIB = 1073741824
+
+
+def _data(big_maxmem: int = 4 * GIB) -> dict:
+    """Return a busy pve1 and an idle pve2, both limited by memory."""
+    node = {"status": "online", "maxmem": 16 * GIB, "cpu": 0.05, "maxcpu": 8}
+    guest = {"status": "running", "node": "pve1", "cpu": 0.01, "cpus": 1}
+    return {
+        "nodes": {"pve1": {**node, "mem": 12 * GIB}, "pve2": {**node, "mem": 2 * GIB}},
+        "vms": {
+            100: {**guest, "name": "big", "mem": 4 * GIB, "maxmem": big_maxmem},
+            101: {**guest, "name": "medium", "mem": 3 * GIB, "maxmem": 3 * GIB},
+            102: {**guest, "name": "small", "mem": GIB // 4, "maxmem": GIB // 4},
+        },
+    }
+
+
+def test_recommend_best_move() -> None:
+    """Test the move that evens out the loads most is recommended, and nothing after it."""
+    result = recommend(_data())
+
+    assert result["node_loads"] == {"pve1": 0.75, "pve2": 0.125}
+    assert result["imbalance"] == 0.312
+    assert result["recommendations"] == [{"vmid": 100, "name": "big", "source": "pve1", "target": "pve2"}]
+    assert result["projected_imbalance"] == 0.062
+
+    # Moving the small guest next still helps, by less than REBALANCE_MIN_GAIN
+    result = recommend(_data(), min_gain=REBALANCE_MIN_GAIN / 4)
+    assert [move["vmid"] for move in result["recommendations"]] == [100, 102]
+    assert result["projected_imbalance"] > 0.062 - REBALANCE_MIN_GAIN
+
+
+def test_recommend_needs_memory_headroom() -> None:
+    """Test a guest is not moved to a node without room for its whole allocation."""
+    result = recommend(_data(big_maxmem=15 * GIB))
+
+    moved = [move["vmid"] for move in result["recommendations"]]
+    assert moved[0] == 101
+    assert 100 not in moved
+
+
+def test_recommend_balanced() -> None:
+    """Test a balanced cluster gets no recommendations."""
+    data = _data()
+    data["nodes"]["pve2"]["mem"] = 12 * GIB
+
+    assert recommend(data)["recommendations"] == []
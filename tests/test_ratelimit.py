@@ -0,0 +1,41 @@
+"""Test the shared API request budget."""
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.petalpve.ratelimit import RateLimitExceeded, TokenBucket
+
+
+def test_priority_reserve() -> None:
+    """Test background callers leave the reserve to priority callers."""
+    with patch("custom_components.petalpve.ratelimit.time.monotonic", return_value=100.0):
+        bucket = TokenBucket(rate=1.0, burst=4, priority_reserve=2)
+        bucket.acquire()
+        bucket.acquire()
+        # Two tokens left, both reserved
+        with pytest.raises(RateLimitExceeded):
+            bucket.acquire(timeout=0)
+        bucket.acquire(priority=True, timeout=0)
+        bucket.acquire(priority=True, timeout=0)
+        with pytest.raises(RateLimitExceeded):
+            bucket.acquire(priority=True, timeout=0)
+
+
+def test_refill() -> None:
+    """Test tokens come back at the configured rate, up to the burst size."""
+    with patch("custom_components.petalpve.ratelimit.time.monotonic") as monotonic:
+        monotonic.return_value = 100.0
+        bucket = TokenBucket(rate=2.0, burst=3, priority_reserve=0)
+        for _ in range(3):
+            bucket.acquire(timeout=0)
+        with pytest.raises(RateLimitExceeded):
+            bucket.acquire(timeout=0)
+
+        monotonic.return_value = 100.5
+        bucket.acquire(timeout=0)
+        with pytest.raises(RateLimitExceeded):
+            bucket.acquire(timeout=0)
+
+        monotonic.return_value = 200.0
+        assert bucket.stats()["tokens_available"] == 3
+        assert bucket.stats()["requests_per_minute"] == 0
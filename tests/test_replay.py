@@ -0,0 +1,174 @@
+"""Test capturing and replaying Proxmox VE API traffic.
+
+Also the replay harness, see custom_components/petalpve/replay.py.
+"""
+import gzip
+import json
+import os
+import time
+from typing import Any
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.petalpve.const import (
+    CONF_ENTITY_PROFILE,
+    CONF_REPLAY_FILE,
+    CONF_REPLAY_REALTIME,
+    CONF_VM_EXCLUDE,
+    DOMAIN,
+    PROFILE_MINIMAL,
+    RECORDING_VERSION,
+    REDACTED,
+)
+from custom_components.petalpve.coordinator import ProxmoxCoordinator
+from custom_components.petalpve.recording import TrafficRecorder
+from custom_components.petalpve.replay import ReplayError, ReplayProxmox, async_benchmark
+
+NODE = {
+    "node": "pve1", "status": "online", "cpu": 0.1, "maxcpu": 8,
+    "mem": 4294967296, "maxmem": 17179869184, "disk": 10737418240, "maxdisk": 107374182400, "uptime": 3600,
+}
+VM = {
+    "vmid": 100, "name": "web", "status": "running", "cpu": 0.05, "cpus": 2,
+    "mem": 1073741824, "maxmem": 2147483648, "disk": 0, "maxdisk": 34359738368, "uptime": 3600,
+}
+STORAGE = {
+    "storage": "local", "type": "dir", "content": "images,rootdir", "active": 1, "enabled": 1,
+    "shared": 0, "used": 10737418240, "total": 107374182400, "avail": 96636764160,
+}
+
+
+def _write_capture(path: str, requests: list[tuple[float, str, dict[str, Any], Any]]) -> None:
+    """Write a capture of (offset, path, params, result) GETs."""
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        file.write(json.dumps({"version": RECORDING_VERSION, "started": 0}) + "\n")
+        for offset, api_path, params, result in requests:
+            record = {"t": offset, "method": "get", "path": api_path, "params": params, "duration": 0.01, "result": result}
+            file.write(json.dumps(record) + "\n")
+
+
+async def _async_setup_replay(
+    hass: HomeAssistant, path: str, realtime: bool, options: dict[str, Any] | None = None
+) -> tuple[MockConfigEntry, ProxmoxCoordinator]:
+    """Set up an entry that replays a capture."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="replay",
+        data={CONF_REPLAY_FILE: path, CONF_REPLAY_REALTIME: realtime},
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry, hass.data[DOMAIN][entry.entry_id]
+
+
+def test_capture_round_trip(tmp_path) -> None:
+    """Test a capture replays in order, without its secrets."""
+    path = str(tmp_path / "capture.jsonl.gz")
+    recorder = TrafficRecorder(path)
+    recorder.record("get", "nodes", {}, time.monotonic(), result=[{"node": "pve1"}])
+    recorder.record("get", "nodes", {}, time.monotonic(), result=[{"node": "pve1"}, {"node": "pve2"}])
+    recorder.record(
+        "post", "nodes/pve1/qemu/100/status/start", {"password": "hunter2"}, time.monotonic(),
+        error=Exception("500 Internal Server Error"),
+    )
+    recorder.record("get", "access/ticket", {}, time.monotonic(), result={"ticket": "PVE:secret"})
+    recorder.close()
+
+    proxmox = ReplayProxmox(path, realtime=False)
+    assert proxmox("nodes").get() == [{"node": "pve1"}]
+    assert proxmox("nodes").get() == [{"node": "pve1"}, {"node": "pve2"}]
+    # The last response repeats once the capture runs out
+    assert proxmox("nodes").get() == [{"node": "pve1"}, {"node": "pve2"}]
+    assert proxmox("access/ticket").get() == {"ticket": REDACTED}
+
+    with pytest.raises(ReplayError, match="500"):
+        proxmox("nodes/pve1/qemu/100/status/start").post(password="anything")
+    with pytest.raises(ReplayError, match="No captured response"):
+        proxmox("nodes/pve1/lxc").get()
+
+
+async def test_replay_through_coordinator(hass: HomeAssistant, tmp_path) -> None:
+    """Test a small capture replays through the coordinator and is benchmarked."""
+    path = str(tmp_path / "capture.jsonl.gz")
+    cycle = [
+        ("nodes", {}, [NODE]),
+        ("nodes/pve1/qemu", {}, [VM]),
+        ("nodes/pve1/lxc", {}, []),
+        ("nodes/pve1/storage", {}, [STORAGE]),
+    ]
+    _write_capture(path, [
+        (0.0, "version", {}, {"version": "8.2.4"}),
+        (0.02, "cluster/status", {}, [{"type": "node", "name": "pve1", "local": 1}]),
+        *((0.04 + index * 0.02, *request) for index, request in enumerate(cycle)),
+        (0.2, "nodes/pve1/storage/local/rrddata", {"timeframe": "week", "cf": "AVERAGE"}, []),
+        (0.22, "cluster/ha/status/current", {}, []),
+        (0.24, "cluster/replication", {}, []),
+        *((30.0 + index * 0.02, *request) for index, request in enumerate(cycle)),
+    ])
+
+    entry, coordinator = await _async_setup_replay(
+        hass, path, realtime=False, options={CONF_ENTITY_PROFILE: PROFILE_MINIMAL}
+    )
+    assert coordinator.cluster_id == "node:pve1"
+    assert coordinator.data["vms"][100]["name"] == "web"
+    assert "pve1_local" in coordinator.data["storage"]
+
+    result = await async_benchmark(coordinator, 2)
+    assert coordinator.last_update_success
+    assert result["refreshes"]["count"] == 2
+    assert result["requests"] > 0
+    # Two cycles 30 seconds apart, of 9 and 4 requests
+    assert result["captured"]["requests"] == 13
+    assert result["captured"]["cycles"]["count"] == 2
+    assert result["captured"]["cycles"]["max"] == pytest.approx(0.25)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_followers_derive_their_own_view(hass: HomeAssistant, tmp_path) -> None:
+    """Test entries sharing a poll loop keep per-node allocation of their own guests."""
+    path = str(tmp_path / "capture.jsonl.gz")
+    _write_capture(path, [
+        (0.0, "version", {}, {"version": "8.2.4"}),
+        (0.02, "cluster/status", {}, [{"type": "cluster", "name": "lab"}, {"type": "node", "name": "pve1", "local": 1}]),
+        (0.04, "nodes", {}, [NODE]),
+        (0.06, "nodes/pve1/qemu", {}, [VM, {**VM, "vmid": 101, "name": "db", "maxmem": 4294967296}]),
+        (0.08, "nodes/pve1/lxc", {}, []),
+        (0.1, "nodes/pve1/storage", {}, [STORAGE]),
+    ])
+
+    leader_entry, leader = await _async_setup_replay(
+        hass, path, realtime=False, options={CONF_ENTITY_PROFILE: PROFILE_MINIMAL, CONF_VM_EXCLUDE: "101"}
+    )
+    follower_entry, follower = await _async_setup_replay(
+        hass, path, realtime=False, options={CONF_ENTITY_PROFILE: PROFILE_MINIMAL, CONF_VM_EXCLUDE: "100"}
+    )
+    assert follower.leader is leader
+    await leader.async_refresh()
+
+    assert list(leader.data["vms"]) == [100]
+    assert list(follower.data["vms"]) == [101]
+    assert leader.data["nodes"]["pve1"]["allocated_mem"] == 2147483648
+    assert follower.data["nodes"]["pve1"]["allocated_mem"] == 4294967296
+    assert leader.data["cluster"]["committed_mem"] == 2147483648
+    assert follower.data["cluster"]["committed_mem"] == 4294967296
+
+    assert await hass.config_entries.async_unload(follower_entry.entry_id)
+    assert await hass.config_entries.async_unload(leader_entry.entry_id)
+
+
+@pytest.mark.skipif("PETALPVE_REPLAY_FILE" not in os.environ, reason="No capture to benchmark")
+async def test_benchmark(hass: HomeAssistant) -> None:
+    """Benchmark refreshes against the capture in PETALPVE_REPLAY_FILE."""
+    entry, coordinator = await _async_setup_replay(
+        hass,
+        os.environ["PETALPVE_REPLAY_FILE"],
+        realtime=os.environ.get("PETALPVE_REPLAY_REALTIME", "1") != "0",
+    )
+    result = await async_benchmark(coordinator, int(os.environ.get("PETALPVE_REPLAY_CYCLES", "10")))
+    print(json.dumps(result, indent=2))
+    assert await hass.config_entries.async_unload(entry.entry_id)
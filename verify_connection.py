@@ -1,65 +1,457 @@
-import sys
+"""Probe a Proxmox VE cluster and size the PetalPVE polling for it.
+
+Measures the latency of the endpoints the integration polls, per endpoint
+and per node, times the different ways of crawling the cluster, and
+recommends scan intervals and a concurrency limit.
+
+    python verify_connection.py --host 192.168.1.10 --user root@pam
+    python verify_connection.py --fake --fake-nodes 5 --fake-guests 120
+    python verify_connection.py --replay petalpve_<entry>_<time>.jsonl.gz
+
+Runs standalone: only proxmoxer is needed, and only against a real cluster.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import getpass
-from proxmoxer import ProxmoxAPI
-import urllib3
-
-# Disable SSL warnings for this script
-urllib3.disable_warnings()
-
-def main():
-    print("--- Proxmox Connection Verifier ---")
-    host = input("Proxmox Host (e.g., 192.168.1.10 or https://192.168.1.10): ").strip()
-    
-    # Simulate the cleanup logic we added to the integration
-    clean_host = host.replace("https://", "").replace("http://", "").rstrip("/")
-    print(f"DEBUG: Connecting to cleaned host: '{clean_host}'")
-    
-    user = input("Username (e.g., root): ").strip()
-    realm = input("Realm (e.g., pam, pve): ").strip()
-    full_user = f"{user}@{realm}"
-    
-    password = getpass.getpass("Password: ")
-    
-    print("\nAttempting connection...")
-    
-    try:
-        proxmox = ProxmoxAPI(
-            clean_host,
-            user=full_user,
-            password=password,
-            verify_ssl=False,
-            port=8006
+import gzip
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Callable
+
+# Mirrors custom_components/petalpve/const.py, which cannot be imported without Home Assistant
+SCAN_INTERVAL_FAST = 30
+SCAN_INTERVAL_SLOW = 300
+API_MAX_WORKERS = 4
+REFRESH_BUDGET = 25
+DEFAULT_API_RATE = 10.0
+DEFAULT_API_BURST = 20
+GUEST_AGENT_TTL = 120
+BACKUP_SCAN_INTERVAL = 3600
+DISK_HEALTH_INTERVAL = 86400
+UPDATES_INTERVAL = 21600
+
+# Per-node calls of every refresh, see ProxmoxCoordinator._async_fetch_node
+NODE_ENDPOINTS = ("qemu", "lxc", "storage")
+CLUSTER_ENDPOINTS = ("version", "nodes", "cluster/status", "cluster/resources")
+# Slow-tier calls of the whole cluster: HA status and replication jobs,
+# see ProxmoxCoordinator._async_update_health
+SLOW_CLUSTER_CALLS = 2
+# Per-node detail calls besides one SMART query per disk: disks, ZFS pools
+# daily; apt updates, apt versions and node status four times a day
+DISK_HEALTH_CALLS = 2
+UPDATES_CALLS = 3
+# Concurrency limits tried when sizing the worker pool
+CONCURRENCY_STEPS = (1, 2, 4, 8)
+# pveproxy starts three worker processes by default
+FAKE_SERVER_WORKERS = 3
+
+
+class Backend(ABC):
+    """Something that answers GET requests like the Proxmox VE API."""
+
+    name = "backend"
+
+    @abstractmethod
+    def get(self, path: str, **params: Any) -> Any:
+        """Return the response to a GET."""
+
+
+class LiveBackend(Backend):
+    """A real cluster, through proxmoxer."""
+
+    name = "live"
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """Log in."""
+        from proxmoxer import ProxmoxAPI
+        import urllib3
+
+        if not args.verify_ssl:
+            urllib3.disable_warnings()
+        host = args.host.replace("https://", "").replace("http://", "").rstrip("/")
+        password = args.password or os.environ.get("PVE_PASSWORD") or getpass.getpass("Password: ")
+        self._proxmox = ProxmoxAPI(
+            host, user=args.user, password=password, port=args.port, verify_ssl=args.verify_ssl, timeout=10
         )
-        
-        # Test 1: Get Version
-        version = proxmox.version.get()
-        print(f"\n✅ SUCCESS! Connected to Proxmox VE version: {version['version']}")
-        
-        # Test 2: Get Nodes
-        print("\nFetching Nodes...")
-        nodes = proxmox.nodes.get()
-        for node in nodes:
-            print(f"- Node: {node['node']} (Status: {node['status']})")
-            
-            # Test 3: Get VMs for this node
-            print(f"  Fetching VMs for {node['node']}...")
-            vms = proxmox.nodes(node['node']).qemu.get()
-            for vm in vms:
-                print(f"  -- VM: {vm['name']} (ID: {vm['vmid']}, Status: {vm['status']})")
-                
-            # Test 4: Get LXCs for this node
-            print(f"  Fetching LXCs for {node['node']}...")
-            lxcs = proxmox.nodes(node['node']).lxc.get()
-            for lxc in lxcs:
-                 print(f"  -- LXC: {lxc['name']} (ID: {lxc['vmid']}, Status: {lxc['status']})")
-                 
-    except Exception as e:
-        print(f"\n❌ FAILED to connect!")
-        print(f"Error: {e}")
-        print("\nTroubleshooting:")
-        print("1. Check if the IP is correct and reachable (ping it).")
-        print("2. Check credentials.")
-        print("3. Ensure user has permissions.")
+
+    def get(self, path: str, **params: Any) -> Any:
+        """GET from the cluster."""
+        return self._proxmox(path).get(**params)
+
+
+class FakeBackend(Backend):
+    """A generated cluster with simulated latency and a limited number of API workers."""
+
+    name = "fake"
+
+    def __init__(self, nodes: int, guests: int, latency: float, seed: int = 0) -> None:
+        """Generate the cluster."""
+        rng = random.Random(seed)
+        self._latency = latency
+        self._server = threading.Semaphore(FAKE_SERVER_WORKERS)
+        self.nodes = [f"pve{index + 1}" for index in range(nodes)]
+        # One node answers noticeably slower, as a busy or remote node would
+        self._node_factor = {node: 1.0 for node in self.nodes}
+        if nodes > 1:
+            self._node_factor[self.nodes[-1]] = 3.0
+        self._guests: dict[str, list[dict[str, Any]]] = {node: [] for node in self.nodes}
+        for vm_id in range(100, 100 + guests):
+            node = rng.choice(self.nodes)
+            self._guests[node].append({
+                "vmid": vm_id,
+                "name": f"guest{vm_id}",
+                "type": "lxc" if vm_id % 3 == 0 else "qemu",
+                "status": "running" if rng.random() < 0.8 else "stopped",
+                "cpu": rng.random() * 0.5,
+                "mem": rng.randint(1, 8) << 30,
+                "maxmem": 8 << 30,
+            })
+
+    def _respond(self, path: str) -> Any:
+        """Build the response for a path."""
+        parts = path.split("/")
+        if path == "version":
+            return {"version": "8.2.4", "release": "8.2"}
+        if path == "nodes":
+            return [{"node": node, "status": "online"} for node in self.nodes]
+        if path == "cluster/status":
+            return [{"type": "cluster", "name": "fake", "nodes": len(self.nodes)}] + [
+                {"type": "node", "name": node, "online": 1} for node in self.nodes
+            ]
+        if path == "cluster/resources":
+            return [
+                {**guest, "node": node} for node, guests in self._guests.items() for guest in guests
+            ]
+        if len(parts) == 3 and parts[0] == "nodes":
+            node, kind = parts[1], parts[2]
+            if kind in ("qemu", "lxc"):
+                return [guest for guest in self._guests[node] if guest["type"] == kind]
+            if kind == "storage":
+                return [
+                    {"storage": "local", "type": "dir", "content": "iso,vztmpl", "active": 1},
+                    {"storage": "nfs", "type": "nfs", "content": "images,backup", "shared": 1, "active": 1},
+                ]
+            if kind == "status":
+                return {"uptime": 1}
+        if len(parts) == 4 and parts[0] == "nodes" and path.endswith("/disks/list"):
+            return [{"devpath": "/dev/sda"}, {"devpath": "/dev/nvme0n1"}]
+        raise KeyError(f"Not simulated: {path}")
+
+    def get(self, path: str, **params: Any) -> Any:
+        """Answer after a latency that grows with the response size."""
+        response = self._respond(path)
+        size = len(response) if isinstance(response, list) else 1
+        parts = path.split("/")
+        factor = self._node_factor.get(parts[1], 1.0) if parts[0] == "nodes" and len(parts) > 1 else 1.0
+        with self._server:
+            time.sleep(self._latency * factor * (1 + size / 200))
+        return response
+
+
+class ReplayBackend(Backend):
+    """A capture written by the integration's record_traffic option."""
+
+    name = "replay"
+
+    def __init__(self, path: str) -> None:
+        """Load the capture."""
+        # path -> (last response, recorded durations)
+        self._paths: dict[str, tuple[Any, list[float]]] = {}
+        self._served: dict[str, int] = {}
+        self._lock = threading.Lock()
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            file.readline()
+            for line in file:
+                record = json.loads(line)
+                if record["method"] != "get" or "error" in record:
+                    continue
+                _, durations = self._paths.get(record["path"], (None, []))
+                durations.append(record["duration"])
+                self._paths[record["path"]] = (record["result"], durations)
+
+    def get(self, path: str, **params: Any) -> Any:
+        """Answer with the captured response, taking the captured time."""
+        if path not in self._paths:
+            raise KeyError(f"Not in the capture: {path}")
+        response, durations = self._paths[path]
+        with self._lock:
+            served = self._served.get(path, 0)
+            self._served[path] = served + 1
+        time.sleep(durations[served % len(durations)])
+        return response
+
+
+def timed(call: Callable[[], Any]) -> tuple[float, Any]:
+    """Return how long a call took and its result, or the exception it raised."""
+    started = time.monotonic()
+    try:
+        result = call()
+    except Exception as err:
+        result = err
+    return time.monotonic() - started, result
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Return min, median and max of latency samples, in milliseconds."""
+    return {
+        "min": round(min(samples) * 1000, 1),
+        "median": round(statistics.median(samples) * 1000, 1),
+        "max": round(max(samples) * 1000, 1),
+    }
+
+
+def probe_endpoints(backend: Backend, nodes: list[str], samples: int) -> dict[str, Any]:
+    """Time every endpoint a refresh uses, one request at a time."""
+    endpoints: dict[str, list[float]] = {}
+    failures: dict[str, str] = {}
+    paths = list(CLUSTER_ENDPOINTS) + [f"nodes/{node}/{kind}" for node in nodes for kind in NODE_ENDPOINTS]
+    for path in paths:
+        for _ in range(samples):
+            elapsed, result = timed(lambda: backend.get(path))
+            if isinstance(result, Exception):
+                failures[path] = str(result)
+                break
+            endpoints.setdefault(path, []).append(elapsed)
+
+    per_node = {}
+    for node in nodes:
+        node_samples = [
+            sample for kind in NODE_ENDPOINTS for sample in endpoints.get(f"nodes/{node}/{kind}", [])
+        ]
+        if node_samples:
+            per_node[node] = summarize(node_samples)
+    return {
+        "endpoints": {path: summarize(values) for path, values in endpoints.items()},
+        "nodes": per_node,
+        "failures": failures,
+    }
+
+
+def crawl_per_node(backend: Backend, nodes: list[str], workers: int) -> float:
+    """Time a refresh the way the integration does it: nodes, then three calls per node."""
+    started = time.monotonic()
+    backend.get("nodes")
+    paths = [f"nodes/{node}/{kind}" for node in nodes for kind in NODE_ENDPOINTS]
+    if workers == 1:
+        for path in paths:
+            timed(lambda: backend.get(path))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda path: timed(lambda: backend.get(path)), paths))
+    return time.monotonic() - started
+
+
+def crawl_cluster_resources(backend: Backend) -> float | None:
+    """Time a refresh built from the single cluster-wide resource list, None if unavailable."""
+    started = time.monotonic()
+    backend.get("nodes")
+    _, result = timed(lambda: backend.get("cluster/resources", type="vm"))
+    if isinstance(result, Exception):
+        return None
+    return time.monotonic() - started
+
+
+def count_workload(backend: Backend, nodes: list[str]) -> dict[str, int]:
+    """Count what the integration's calls scale with besides nodes: guests, storages and disks."""
+    workload = {"nodes": len(nodes), "vms": 0, "running_vms": 0, "lxcs": 0, "running_lxcs": 0,
+                "storages": 0, "backup_storages": 0, "ceph": 0, "disks": 0}
+    shared: set[str] = set()
+    for node in nodes:
+        for kind, key in (("qemu", "vms"), ("lxc", "lxcs")):
+            _, guests = timed(lambda: backend.get(f"nodes/{node}/{kind}"))
+            for guest in guests if isinstance(guests, list) else []:
+                workload[key] += 1
+                workload[f"running_{key}"] += guest.get("status") == "running"
+        _, storages = timed(lambda: backend.get(f"nodes/{node}/storage"))
+        for store in storages if isinstance(storages, list) else []:
+            # Shared storage is one storage, however many nodes report it
+            if store.get("shared"):
+                if store["storage"] in shared:
+                    continue
+                shared.add(store["storage"])
+            workload["storages"] += 1
+            workload["backup_storages"] += "backup" in store.get("content", "").split(",")
+            workload["ceph"] |= store.get("type") in ("rbd", "cephfs")
+        _, disks = timed(lambda: backend.get(f"nodes/{node}/disks/list"))
+        workload["disks"] += sum(1 for disk in disks if disk.get("devpath")) if isinstance(disks, list) else 0
+    return workload
+
+
+def count_calls(workload: dict[str, int]) -> dict[str, dict[str, float]]:
+    """Return the calls of each endpoint tier: per cycle it runs in and how often that is."""
+    nodes = workload["nodes"]
+    tiers = {
+        # Every refresh: the node list, then guests and storage of each node
+        "refresh": (1 + len(NODE_ENDPOINTS) * nodes, SCAN_INTERVAL_FAST),
+        # Running VMs: agent interfaces and filesystems; containers: interfaces.
+        # Assumes every VM has the agent enabled.
+        "guest_agent": (2 * workload["running_vms"] + workload["running_lxcs"], GUEST_AGENT_TTL),
+        # Whether a VM has the agent enabled, from its config
+        "guest_config": (workload["running_vms"], SCAN_INTERVAL_SLOW),
+        "backups": (workload["backup_storages"], BACKUP_SCAN_INTERVAL),
+        # HA and replication, replication status per node, Ceph if in use
+        "slow_tier": (SLOW_CLUSTER_CALLS + nodes + workload["ceph"], SCAN_INTERVAL_SLOW),
+        "disk_health": (DISK_HEALTH_CALLS * nodes + workload["disks"], DISK_HEALTH_INTERVAL),
+        "updates": (UPDATES_CALLS * nodes, UPDATES_INTERVAL),
+    }
+    return {
+        tier: {"calls": calls, "interval": interval, "per_minute": round(calls * 60 / interval, 1)}
+        for tier, (calls, interval) in tiers.items()
+    }
+
+
+def recommend(crawls: dict[int, float], workload: dict[str, int]) -> dict[str, Any]:
+    """Pick a concurrency limit, scan intervals and a request budget from the measured crawls."""
+    best = min(crawls.values())
+    # The smallest pool that gets within 10% of the fastest crawl; more only adds server load
+    workers = min(step for step, elapsed in crawls.items() if elapsed <= best * 1.1)
+    refresh = crawls[workers]
+    tiers = count_calls(workload)
+    # Guest caches, backup listings and the slow tier all start with the first refresh,
+    # so their cycles keep coinciding. Node details are spread out by the collector.
+    peak = sum(tiers[tier]["calls"] for tier in ("refresh", "guest_agent", "guest_config", "backups", "slow_tier"))
+    per_minute = sum(tier["per_minute"] for tier in tiers.values())
+    # Leave the cluster idle at least half the time, in steps of 5 seconds
+    fast = max(SCAN_INTERVAL_FAST, 5 * math.ceil(refresh * 2 / 5))
+    return {
+        "calls": tiers,
+        "calls_per_refresh": tiers["refresh"]["calls"],
+        "calls_peak": peak,
+        # Snapshot lists are fetched once per guest, by the first refresh
+        "calls_startup": peak + workload["vms"] + workload["lxcs"],
+        "calls_per_minute": round(per_minute, 1),
+        "refresh_seconds": round(refresh, 2),
+        "within_budget": refresh < REFRESH_BUDGET,
+        "concurrency": workers,
+        "scan_interval_fast": fast,
+        "scan_interval_slow": max(SCAN_INTERVAL_SLOW, fast * 10),
+        # A burst covers the peak cycle, the rate refills it well within one interval
+        # and keeps up with twice the sustained load
+        "api_rate": round(max(DEFAULT_API_RATE, peak * 2 / fast, per_minute * 2 / 60), 1),
+        "api_burst": max(peak, DEFAULT_API_BURST),
+    }
+
+
+def run(backend: Backend, samples: int) -> dict[str, Any]:
+    """Measure the cluster and return the report."""
+    elapsed, version = timed(lambda: backend.get("version"))
+    if isinstance(version, Exception):
+        raise SystemExit(f"FAILED to query the API: {version}")
+    nodes = [node["node"] for node in backend.get("nodes") if node.get("status", "online") == "online"]
+
+    report: dict[str, Any] = {
+        "backend": backend.name,
+        "version": version.get("version"),
+        "nodes": nodes,
+        "latency": probe_endpoints(backend, nodes, samples),
+    }
+    crawls = {workers: crawl_per_node(backend, nodes, workers) for workers in CONCURRENCY_STEPS}
+    report["crawls"] = {
+        "per_node": {str(workers): round(elapsed, 3) for workers, elapsed in crawls.items()},
+        "cluster_resources": round(cluster, 3) if (cluster := crawl_cluster_resources(backend)) is not None else None,
+        "integration": round(crawls[API_MAX_WORKERS], 3),
+    }
+    report["workload"] = count_workload(backend, nodes)
+    report["recommendation"] = recommend(crawls, report["workload"])
+    return report
+
+
+def print_report(report: dict[str, Any]) -> None:
+    """Print the report as tables."""
+    print(f"Proxmox VE {report['version']} via {report['backend']}, {len(report['nodes'])} online nodes\n")
+
+    print(f"{'Endpoint':<40} {'min ms':>8} {'median':>8} {'max':>8}")
+    for path, latency in report["latency"]["endpoints"].items():
+        print(f"{path:<40} {latency['min']:>8} {latency['median']:>8} {latency['max']:>8}")
+    for path, error in report["latency"]["failures"].items():
+        print(f"{path:<40} FAILED: {error}")
+
+    print(f"\n{'Node':<20} {'min ms':>8} {'median':>8} {'max':>8}")
+    for node, latency in report["latency"]["nodes"].items():
+        print(f"{node:<20} {latency['min']:>8} {latency['median']:>8} {latency['max']:>8}")
+
+    crawls = report["crawls"]
+    print("\nFull crawl")
+    for workers, elapsed in crawls["per_node"].items():
+        label = "serial" if workers == "1" else f"{workers} concurrent"
+        print(f"  per node, {label:<14} {elapsed:>7.3f} s")
+    if crawls["cluster_resources"] is not None:
+        print(f"  cluster/resources         {crawls['cluster_resources']:>7.3f} s")
+
+    rec = report["recommendation"]
+    workload = report["workload"]
+    print(f"\nWorkload: {workload['running_vms']}/{workload['vms']} VMs and "
+          f"{workload['running_lxcs']}/{workload['lxcs']} containers running, "
+          f"{workload['storages']} storages ({workload['backup_storages']} for backups), {workload['disks']} disks")
+    print(f"\n{'Calls':<16} {'per cycle':>9} {'every':>8} {'per min':>8}")
+    for tier, calls in rec["calls"].items():
+        print(f"{tier:<16} {calls['calls']:>9} {calls['interval']:>7}s {calls['per_minute']:>8}")
+    print(f"{'peak cycle':<16} {rec['calls_peak']:>9}")
+    print(f"{'first refresh':<16} {rec['calls_startup']:>9}")
+
+    print(f"\nCurrent integration ({API_MAX_WORKERS} workers): {rec['calls_per_refresh']} calls, "
+          f"{crawls['integration']:.2f} s per refresh")
+    if not rec["within_budget"]:
+        print(f"  Exceeds the {REFRESH_BUDGET} s refresh budget, slow nodes will keep stale data")
+    print("\nRecommended")
+    print(f"  concurrency limit   {rec['concurrency']} (API_MAX_WORKERS)")
+    print(f"  fast scan interval  {rec['scan_interval_fast']} s")
+    print(f"  slow scan interval  {rec['scan_interval_slow']} s")
+    print(f"  api_rate / burst    {rec['api_rate']} / {rec['api_burst']}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--host", help="Proxmox VE host, e.g. 192.168.1.10")
+    target.add_argument("--fake", action="store_true", help="probe a generated local cluster")
+    target.add_argument("--replay", metavar="FILE", help="probe a capture made with the record_traffic option")
+    parser.add_argument("--user", default="root@pam", help="user@realm (default: %(default)s)")
+    parser.add_argument("--password", help="password, else $PVE_PASSWORD or a prompt")
+    parser.add_argument("--port", type=int, default=8006)
+    parser.add_argument("--verify-ssl", action="store_true")
+    parser.add_argument("--samples", type=int, default=3, help="requests per endpoint (default: %(default)s)")
+    parser.add_argument("--fake-nodes", type=int, default=3)
+    parser.add_argument("--fake-guests", type=int, default=40)
+    parser.add_argument("--fake-latency", type=float, default=0.05, help="seconds per fake request")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if not (args.host or args.fake or args.replay):
+        args.host = input("Proxmox Host (e.g., 192.168.1.10 or https://192.168.1.10): ").strip()
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the probe."""
+    args = parse_args(argv)
+    if args.fake:
+        backend: Backend = FakeBackend(args.fake_nodes, args.fake_guests, args.fake_latency)
+    elif args.replay:
+        backend = ReplayBackend(args.replay)
+    else:
+        try:
+            backend = LiveBackend(args)
+        except Exception as err:
+            print(f"FAILED to connect: {err}", file=sys.stderr)
+            print("Check that the host is reachable, the credentials and the user's permissions.", file=sys.stderr)
+            sys.exit(1)
+
+    report = run(backend, max(args.samples, 1))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
 
 if __name__ == "__main__":
     main()